@@ -0,0 +1,188 @@
+"""
+Admission control for the endpoints that write to the database: per-client
+rate limits (GCRA, keyed by user id or client IP) answered with 429, and a cap
+on concurrent admitted requests answered with 503 before the connection pool
+runs dry. Both set Retry-After.
+"""
+import math
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from threading import Lock
+from time import monotonic
+from typing import Callable
+
+from fastapi import HTTPException, Request
+
+from .database import settings
+
+# Atomic GCRA step on the Redis server's clock; returns seconds to wait, "0" if admitted
+_GCRA_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now)
+local allow_at = tat + interval - burst * interval
+if now < allow_at then
+    return tostring(allow_at - now)
+end
+redis.call('SET', KEYS[1], tostring(tat + interval), 'PX', math.ceil((tat + interval - now) * 1000))
+return '0'
+"""
+
+
+class RateLimitBackend(ABC):
+    """
+    GCRA state per key. A key may send `burst` requests at once and then one per
+    `interval` seconds; the only state is the key's theoretical arrival time.
+    """
+
+    @abstractmethod
+    async def acquire(self, key: str, interval: float, burst: int) -> float:
+        """Admit one request for `key`. Returns 0 if admitted, else seconds until it would be."""
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process table of one float per key in LRU order, so a check is O(1) and
+    memory is bounded by `maxsize`. An evicted key starts over with a full burst;
+    keys idle long enough to be evicted have usually refilled anyway.
+    """
+
+    def __init__(self, maxsize: int = 100_000, clock: Callable[[], float] = monotonic):
+        self.maxsize = maxsize
+        self._clock = clock
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    async def acquire(self, key: str, interval: float, burst: int) -> float:
+        now = self._clock()
+        with self._lock:
+            tat = max(self._tats.get(key, now), now)
+            allow_at = tat + interval - burst * interval
+            if now < allow_at:
+                return allow_at - now
+            self._tats[key] = tat + interval
+            self._tats.move_to_end(key)
+            if len(self._tats) > self.maxsize:
+                self._tats.popitem(last=False)
+        return 0.0
+
+    async def clear(self):
+        with self._lock:
+            self._tats.clear()
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Limits shared by every worker on a Redis-compatible server. Each check is one
+    script call; keys expire once their budget has fully refilled.
+    """
+
+    def __init__(self, client, prefix: str = "snake:rate:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisRateLimitBackend":
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis needs the 'redis' package installed")
+        return cls(redis.from_url(url))
+
+    async def acquire(self, key: str, interval: float, burst: int) -> float:
+        return float(await self.client.eval(_GCRA_SCRIPT, 1, self.prefix + key, interval, burst))
+
+    async def clear(self):
+        # Shared with other workers; keys expire on their own
+        pass
+
+
+class AdmissionControl:
+    """
+    Rate limits and the concurrency cap in front of the write endpoints. A
+    failing backend admits the request: the limiter must never take the API
+    down with it.
+    """
+
+    def __init__(self, backend: RateLimitBackend, max_concurrent: int = 0):
+        self.backend = backend
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self.limited = 0
+        self.shed = 0
+        self.errors = 0
+
+    async def check_rate(self, scope: str, key: str, per_second: float, burst: int):
+        """Raise 429 if `key` is over its budget for `scope`."""
+        if not settings.RATE_LIMIT_ENABLED or per_second <= 0:
+            return
+        try:
+            wait = await self.backend.acquire(f"{scope}:{key}", 1.0 / per_second, burst)
+        except Exception as e:
+            self.errors += 1
+            print(f"Rate limit check failed: {e}")
+            return
+        if wait > 0:
+            self.limited += 1
+            raise HTTPException(
+                status_code=429, detail="Too many requests, slow down", headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of `max_concurrent` slots for the request, or raise 503 if none is free."""
+        if self.max_concurrent > 0 and self.in_flight >= self.max_concurrent:
+            self.shed += 1
+            raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    async def clear(self):
+        await self.backend.clear()
+
+    def stats(self) -> dict:
+        stats = {
+            "backend": type(self.backend).__name__,
+            "inFlight": self.in_flight,
+            "maxConcurrent": self.max_concurrent,
+            "limited": self.limited,
+            "shed": self.shed,
+            "errors": self.errors,
+        }
+        if isinstance(self.backend, MemoryRateLimitBackend):
+            stats["keys"] = len(self.backend)
+        return stats
+
+
+def client_ip(request: Request) -> str:
+    # The X-Forwarded-For client when the peer is a trusted proxy (FORWARDED_ALLOW_IPS, see main.py)
+    return request.client.host if request.client else "unknown"
+
+
+async def admit_by_ip(request: Request):
+    """Dependency for unauthenticated writes (login, signup): rate limit by client IP, then take a slot."""
+    await admission.check_rate("auth", client_ip(request), settings.RATE_LIMIT_AUTH_PER_SECOND, settings.RATE_LIMIT_AUTH_BURST)
+    async with admission.slot():
+        yield
+
+
+def make_rate_limit_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitBackend.from_url(settings.REDIS_URL)
+    return MemoryRateLimitBackend(maxsize=settings.RATE_LIMIT_TABLE_SIZE)
+
+
+admission = AdmissionControl(make_rate_limit_backend(), max_concurrent=settings.ADMISSION_MAX_CONCURRENT)
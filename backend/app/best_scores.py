@@ -0,0 +1,65 @@
+from typing import Iterable, List
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+
+from .db_models import DBLeaderboard, DBUserBestScore
+
+_best = DBUserBestScore.__table__
+_history = DBLeaderboard.__table__
+
+def upsert_if_higher(table, key_columns, dialect_name: str):
+    """
+    INSERT ... ON CONFLICT on `key_columns` that only replaces a row when the new
+    score is strictly higher, so the earliest submission keeps a tied best.
+    Execute it with a list of rows to update many keys in one executemany.
+    """
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={
+            "username": stmt.excluded.username,
+            "score": stmt.excluded.score,
+            "date": stmt.excluded.date,
+            "entryId": stmt.excluded.entryId,
+        },
+        where=table.c.score < stmt.excluded.score,
+    )
+
+def upsert_best_scores(dialect_name: str):
+    return upsert_if_higher(_best, [_best.c.userId, _best.c.mode], dialect_name)
+
+def best_rows(rows: Iterable[dict]) -> List[dict]:
+    """Reduce leaderboard rows (in submission order) to one best row per (userId, mode)."""
+    best = {}
+    for row in rows:
+        key = (row["userId"], row["mode"])
+        if key not in best or row["score"] > best[key]["score"]:
+            best[key] = row
+    return [
+        {"userId": r["userId"], "mode": r["mode"], "username": r["username"],
+         "score": r["score"], "date": r["date"], "entryId": r["id"]}
+        for r in best.values()
+    ]
+
+def rebuild_best_scores(conn: Connection) -> int:
+    """Recompute user_best_scores from the full leaderboard history. Returns the row count."""
+    ranked = select(
+        _history.c.userId, _history.c.mode, _history.c.username, _history.c.score,
+        _history.c.date, _history.c.id,
+        func.row_number().over(
+            partition_by=(_history.c.userId, _history.c.mode),
+            order_by=(_history.c.score.desc(), _history.c.date.asc(), _history.c.id.asc()),
+        ).label("position"),
+    ).subquery()
+    best = select(
+        ranked.c.userId, ranked.c.mode, ranked.c.username, ranked.c.score, ranked.c.date, ranked.c.id,
+    ).where(ranked.c.position == 1)
+
+    conn.execute(delete(_best))
+    conn.execute(insert(_best).from_select(
+        ["userId", "mode", "username", "score", "date", "entryId"], best,
+    ))
+    return conn.execute(select(func.count()).select_from(_best)).scalar_one()
@@ -0,0 +1,27 @@
+"""Accept-Encoding parsing for responses sent compressed (static files, exports)."""
+from typing import Dict, Optional
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Content codings from an Accept-Encoding header and their q-values (0 means refused)."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, *params = part.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def accepts_encoding(accepted: Dict[str, float], coding: str) -> float:
+    # "*" covers every coding the header does not name
+    return accepted.get(coding, accepted.get("*", 0.0))
@@ -1,16 +1,124 @@
 from datetime import datetime
-from typing import Generator, List, Optional
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from typing import AsyncGenerator, Optional
+from sqlalchemy import create_engine, event, func, insert, inspect, select, text, update
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
 from pydantic_settings import BaseSettings
 import os
 
-from .models import GameMode, Point, Direction, LiveGame, User as PydanticUser, LeaderboardEntry as PydanticLeaderboard
-from .db_models import Base, DBUser, DBLeaderboard
+from .models import GameMode, Point, Direction, LiveGame
+from .db_models import Base, DBUser, DBLeaderboard, DBReplay, DBUserBestScore, DBWindowBestScore, DBSchemaVersion, generate_uuid
+from .best_scores import rebuild_best_scores
+from .engine import ReplayError, verify_replay
+from .windowed_scores import rebuild_window_scores
+from .live_games import LiveGameRegistry
 
 class Settings(BaseSettings):
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./snake_game.db")
+    # "production" skips demo seeding on boot (run python -m app.init_db --seed instead)
+    APP_ENV: str = "development"
+    SEED_ON_STARTUP: Optional[bool] = None
+
+    # Leaderboard paging
+    LEADERBOARD_DEFAULT_LIMIT: int = 50
+    LEADERBOARD_MAX_LIMIT: int = 100
+    # How often expired day/week/month leaderboard buckets are deleted
+    LEADERBOARD_WINDOW_COMPACT_SECONDS: float = 3600.0
+    # Rows fetched per server-side cursor round trip by /api/leaderboard/export
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Authenticated principal cache
+    AUTH_CACHE_SIZE: int = 10000
+    AUTH_CACHE_TTL_SECONDS: float = 60.0
+
+    # Live games that stop sending updates are dropped after this long
+    LIVE_GAME_TTL_SECONDS: float = 300.0
+    LIVE_GAME_SWEEP_SECONDS: float = 30.0
+    # "local" keeps live games in this process; "sqlite" shares them between workers on one host
+    LIVE_GAME_BACKEND: str = "local"
+    LIVE_GAME_STATE_PATH: str = "./live_games.db"
+    LIVE_GAME_POLL_MS: int = 50
+
+    # Score ingestion: SCORE_WRITE_BEHIND coalesces single submits into batched writes
+    SCORE_WRITE_BEHIND: bool = False
+    SCORE_FLUSH_INTERVAL_MS: int = 50
+    SCORE_FLUSH_MAX_BATCH: int = 500
+    SCORE_BATCH_MAX_SIZE: int = 100
+    # Replays are re-simulated in a process pool before their score is accepted
+    REPLAY_VERIFY_WORKERS: int = 2
+    REPLAY_MAX_BYTES: int = 256 * 1024
+    REPLAY_MAX_TICKS: int = 200_000
+    # Reject plain score submits; only scores backed by a verified replay are saved
+    REQUIRE_VERIFIED_SCORES: bool = False
+
+    # Admission control for score submits and login/signup: GCRA rate limits per user id
+    # (scores) and client IP (auth), answered with 429; "memory" (per process) or "redis" (shared)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_TABLE_SIZE: int = 100_000
+    RATE_LIMIT_SCORE_PER_SECOND: float = 2.0
+    RATE_LIMIT_SCORE_BURST: int = 10
+    RATE_LIMIT_AUTH_PER_SECOND: float = 1.0
+    RATE_LIMIT_AUTH_BURST: int = 10
+    # Bloom filters behind GET /api/auth/availability: sized for max(this, 2x users) at startup
+    # Off with several workers: each filter only sees its own worker's signups
+    NAME_FILTER_ENABLED: bool = True
+    NAME_FILTER_MIN_CAPACITY: int = 100_000
+    NAME_FILTER_ERROR_RATE: float = 0.01
+    RATE_LIMIT_AVAILABILITY_PER_SECOND: float = 5.0
+    RATE_LIMIT_AVAILABILITY_BURST: int = 20
+    # Concurrent admitted requests per process before new ones get 503 (0 = no cap); keep it
+    # below DB_POOL_SIZE + DB_MAX_OVERFLOW so reads still find a connection
+    ADMISSION_MAX_CONCURRENT: int = 20
+
+    # Encode hot read endpoints straight from column tuples instead of per-row models
+    FAST_JSON: bool = False
+
+    # Response cache for leaderboard/stats reads: "memory" (per process), "redis" or "none"
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_SIZE: int = 2048
+    RESPONSE_CACHE_TTL_SECONDS: float = 30.0
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Request latency/size/query metrics at /api/_internal/metrics
+    METRICS_ENABLED: bool = True
+    # /api/_internal/* needs "X-Internal-Token: <this>"; empty = loopback clients only
+    INTERNAL_TOKEN: str = ""
+
+    # Password hashing: scrypt cost (n = 2**LOG_N) and the thread pool it runs on
+    PASSWORD_SCRYPT_LOG_N: int = 14
+    PASSWORD_SCRYPT_R: int = 8
+    PASSWORD_SCRYPT_P: int = 1
+    PASSWORD_HASH_WORKERS: int = 4
+
+    # Serve ranks from an in-memory index; off with several workers, where each
+    # index only sees its own worker's writes and ranks come from COUNT queries
+    RANK_INDEX_ENABLED: bool = True
+    # Cross-check in-memory ranks against COUNT queries (slow, for debugging drift)
+    RANK_INDEX_VERIFY: bool = False
+
+    # Connection pool (Postgres)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # SQLite pragmas applied to every new connection
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 64000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
     
+    @property
+    def seed_on_startup(self) -> bool:
+        if self.SEED_ON_STARTUP is not None:
+            return self.SEED_ON_STARTUP
+        return self.APP_ENV != "production"
+
     @property
     def sqlalchemy_database_url(self) -> str:
         # Render provides postgres:// but SQLAlchemy 1.4+ requires postgresql://
@@ -18,98 +126,232 @@ class Settings(BaseSettings):
             return self.DATABASE_URL.replace("postgres://", "postgresql://", 1)
         return self.DATABASE_URL
 
+    @property
+    def async_database_url(self) -> str:
+        # Same database, async driver: aiosqlite for SQLite, asyncpg for Postgres
+        url = make_url(self.sqlalchemy_database_url)
+        if url.get_backend_name() == "sqlite":
+            url = url.set(drivername="sqlite+aiosqlite")
+        elif url.get_backend_name() == "postgresql":
+            url = url.set(drivername="postgresql+asyncpg")
+        return url.render_as_string(hide_password=False)
+
 settings = Settings()
 
-# SQLAlchemy Setup
-connect_args = {"check_same_thread": False} if settings.sqlalchemy_database_url.startswith("sqlite") else {}
-engine = create_engine(settings.sqlalchemy_database_url, connect_args=connect_args)
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    finally:
+        cursor.close()
+
+def engine_options(url: str) -> dict:
+    """Keyword arguments for create_engine/create_async_engine, driven by settings."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+def configure_engine(sync_engine: Engine) -> Engine:
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", _set_sqlite_pragmas)
+    return sync_engine
+
+def make_engine(url: str = settings.sqlalchemy_database_url) -> Engine:
+    return configure_engine(create_engine(url, **engine_options(url)))
+
+def make_async_engine(url: str = settings.async_database_url):
+    async_engine = create_async_engine(url, **engine_options(url))
+    configure_engine(async_engine.sync_engine)
+    return async_engine
+
+def pool_status(sync_engine: Engine) -> dict:
+    pool = sync_engine.pool
+    status = {"class": type(pool).__name__}
+    # Only queue pools track checkouts; NullPool/StaticPool do not
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            status[name] = getattr(pool, name)()
+    if "size" in status:
+        status["capacity"] = status["size"] + max(getattr(pool, "_max_overflow", 0), 0)
+        status["utilization"] = round(status["checkedout"] / status["capacity"], 3) if status["capacity"] else 0.0
+    return status
+
+# Sync engine for startup and CLI scripts (init_db, verify_db)
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for request handlers so queries never block the event loop
+async_engine = make_async_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # In-memory storage for Live Games (highly dynamic)
-live_games_db: List[LiveGame] = []
+live_games_db = LiveGameRegistry(ttl_seconds=settings.LIVE_GAME_TTL_SECONDS)
 
-def get_db() -> Generator[Session, None, None]:
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-def init_db():
+# Bump whenever migrate_schema() learns something new, so existing databases re-run it once
+SCHEMA_VERSION = 7
+
+def _add_missing_user_columns():
+    columns = {column["name"] for column in inspect(engine).get_columns("users")}
+    if "tokenVersion" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text('ALTER TABLE users ADD COLUMN "tokenVersion" INTEGER NOT NULL DEFAULT 0'))
+
+def _add_missing_replay_columns():
+    columns = {column["name"] for column in inspect(engine).get_columns("replays")}
+    if "digest" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE replays ADD COLUMN digest VARCHAR"))
+
+def backfill_replay_digests(conn) -> int:
+    """
+    Digest replays stored before digests existed, oldest first. Later copies of
+    an already stored game keep a NULL digest (their rows stay; new copies are
+    refused). Returns the number of replays digested.
+    """
+    seen = set(conn.execute(select(DBReplay.digest).where(DBReplay.digest.is_not(None))).scalars())
+    rows = conn.execute(
+        select(DBReplay.entryId, DBReplay.data).where(DBReplay.digest.is_(None)).order_by(DBReplay.createdAt)
+    ).all()
+    digested = 0
+    for entry_id, data in rows:
+        try:
+            digest = verify_replay(data).digest
+        except ReplayError:
+            continue
+        if digest not in seen:
+            seen.add(digest)
+            conn.execute(update(DBReplay).where(DBReplay.entryId == entry_id).values(digest=digest))
+            digested += 1
+    return digested
+
+def backfill_entry_dates(conn) -> int:
+    """
+    Give leaderboard rows without a date (from before the column was required)
+    their player's signup time, so every row can be ordered and paged. Returns
+    the number of rows fixed.
+    """
+    signed_up = select(DBUser.createdAt).where(DBUser.id == DBLeaderboard.userId).scalar_subquery()
+    fixed = conn.execute(
+        update(DBLeaderboard).where(DBLeaderboard.date.is_(None)).values(date=func.coalesce(signed_up, datetime.now()))
+    ).rowcount
+    if conn.dialect.name == "postgresql":
+        # SQLite cannot change a column's nullability in place; the backfill is what matters there
+        conn.execute(text('ALTER TABLE leaderboard ALTER COLUMN "date" SET NOT NULL'))
+    return fixed
+
+def schema_version() -> int:
+    """Version recorded by the last migration, 0 for a new or pre-versioning database."""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(func.max(DBSchemaVersion.version))).scalar() or 0
+    except ProgrammingError:
+        # Postgres: schema_version table does not exist yet
+        return 0
+    except OperationalError as e:
+        # SQLite reports a missing table as an OperationalError too; anything else is a connection problem
+        if "no such table" in str(e):
+            return 0
+        raise
+
+def migrate_schema():
+    Base.metadata.create_all(bind=engine)
+    # create_all skips indexes and columns on tables that already exist
+    _add_missing_user_columns()
+    _add_missing_replay_columns()
+    with engine.begin() as conn:
+        fixed = backfill_entry_dates(conn)
+        digested = backfill_replay_digests(conn)
+    if fixed:
+        print(f"Backfilled {fixed} leaderboard dates.")
+    if digested:
+        print(f"Backfilled {digested} replay digests.")
+    for model in (DBUser, DBLeaderboard, DBUserBestScore, DBWindowBestScore, DBReplay):
+        for index in model.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+    with SessionLocal() as db:
+        if db.query(DBUserBestScore).count() == 0 and db.query(DBLeaderboard).count() > 0:
+            # Backfill the best-score projection for databases created before it existed
+            print(f"Built {rebuild_best_scores(db.connection())} user best scores.")
+        if db.query(DBWindowBestScore).count() == 0 and db.query(DBLeaderboard).count() > 0:
+            print(f"Built {rebuild_window_scores(db.connection())} windowed best scores.")
+        db.merge(DBSchemaVersion(version=SCHEMA_VERSION, appliedAt=datetime.now()))
+        db.commit()
+
+def ensure_schema() -> bool:
+    """Migrate only if the schema is behind. Returns True if a migration ran."""
     import time
-    from sqlalchemy.exc import OperationalError
-    
+
     # Simple retry logic for database connection (useful for Render/Docker startup)
     max_retries = 5
     retry_delay = 2
-    
+
     for attempt in range(max_retries):
         try:
-            # Create tables
-            Base.metadata.create_all(bind=engine)
-            break
+            # One query on the common path: an up-to-date database skips everything else
+            if schema_version() >= SCHEMA_VERSION:
+                return False
+            migrate_schema()
+            return True
         except OperationalError as e:
             if attempt == max_retries - 1:
                 print(f"Failed to connect to database after {max_retries} attempts.")
                 raise e
             print(f"Database connection attempt {attempt + 1} failed. Retrying in {retry_delay}s...")
             time.sleep(retry_delay)
-    
-    db = SessionLocal()
-    try:
-        # Check if users already exist
-        if db.query(DBUser).count() == 0:
-            # Create some mock users
-            mock_users = [
-                {"username": "SnakeMaster", "email": "snake@example.com", "password": "test123", "highScore": 2450, "gamesPlayed": 156},
-                {"username": "RetroGamer", "email": "retro@example.com", "password": "test123", "highScore": 1890, "gamesPlayed": 89},
-                {"username": "PixelKing", "email": "pixel@example.com", "password": "test123", "highScore": 1650, "gamesPlayed": 234},
-                {"username": "ArcadeQueen", "email": "arcade@example.com", "password": "test123", "highScore": 1420, "gamesPlayed": 67},
-                {"username": "NeonNinja", "email": "neon@example.com", "password": "test123", "highScore": 1280, "gamesPlayed": 112},
-            ]
-            
-            for u in mock_users:
-                db_user = DBUser(
-                    username=u["username"],
-                    email=u["email"],
-                    password=u["password"],
-                    highScore=u["highScore"],
-                    gamesPlayed=u["gamesPlayed"],
-                    createdAt=datetime.now()
-                )
-                db.add(db_user)
-            db.commit()
-
-            # Seed leaderboard after users exist
-            if db.query(DBLeaderboard).count() == 0:
-                # Prepare leaderboard entries safely
-                leaderboard_data = []
-                entries = [
-                    ("SnakeMaster", 2450, "walls"),
-                    ("RetroGamer", 1890, "pass-through"),
-                    ("PixelKing", 1650, "walls"),
-                    ("ArcadeQueen", 1420, "pass-through"),
-                    ("NeonNinja", 1280, "walls"),
-                ]
-
-                for username, score, mode in entries:
-                    user = db.query(DBUser).filter(DBUser.username == username).first()
-                    if user:
-                        leaderboard_data.append(
-                            DBLeaderboard(userId=user.id, username=user.username, score=score, mode=mode, date=datetime.now())
-                        )
-                    else:
-                        print(f"Warning: Could not find user {username} for leaderboard seeding.")
-
-                if leaderboard_data:
-                    db.add_all(leaderboard_data)
-                    db.commit()
-    finally:
-        db.close()
 
-    # Initial mock live games (kept in-memory)
+MOCK_USERS = [
+    ("SnakeMaster", "snake@example.com", 2450, 156, "walls"),
+    ("RetroGamer", "retro@example.com", 1890, 89, "pass-through"),
+    ("PixelKing", "pixel@example.com", 1650, 234, "walls"),
+    ("ArcadeQueen", "arcade@example.com", 1420, 67, "pass-through"),
+    ("NeonNinja", "neon@example.com", 1280, 112, "walls"),
+]
+
+def seed_db() -> bool:
+    """Insert demo users and their leaderboard rows in one transaction if the database is empty."""
+    from .passwords import password_hasher
+
+    with engine.begin() as conn:
+        if conn.execute(select(DBUser.id).limit(1)).first() is not None:
+            return False
+        now = datetime.now()
+        # Every demo user shares a password, so hash it once
+        password = password_hasher.hash_sync("test123")
+        users = [
+            {"id": generate_uuid(), "username": username, "email": email, "password": password,
+             "highScore": high_score, "gamesPlayed": games_played, "createdAt": now, "tokenVersion": 0}
+            for username, email, high_score, games_played, _ in MOCK_USERS
+        ]
+        entries = [
+            {"id": generate_uuid(), "userId": user["id"], "username": user["username"],
+             "score": user["highScore"], "mode": mode, "date": now}
+            for user, (*_, mode) in zip(users, MOCK_USERS)
+        ]
+        conn.execute(insert(DBUser), users)
+        conn.execute(insert(DBLeaderboard), entries)
+        rebuild_best_scores(conn)
+        rebuild_window_scores(conn)
+    return True
+
+def seed_live_games():
+    # Initial mock live games (kept in-memory, never expire)
     if not live_games_db:
-        live_games_db.extend([
+        for game in [
              LiveGame(
                 id="1", playerId="2", playerName="RetroGamer", score=340, mode=GameMode.walls, 
                 startedAt=datetime.now(), snake=[Point(x=10, y=10)], food=Point(x=15, y=8), direction=Direction.RIGHT
@@ -118,5 +360,5 @@ def init_db():
                 id="2", playerId="3", playerName="PixelKing", score=560, mode=GameMode.pass_through, 
                 startedAt=datetime.now(), snake=[Point(x=5, y=15)], food=Point(x=12, y=5), direction=Direction.DOWN
             )
-        ])
-
+        ]:
+            live_games_db.add(game, expires=False)
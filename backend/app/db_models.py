@@ -1,6 +1,6 @@
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, DateTime, Enum, ForeignKey
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy import Column, String, Integer, DateTime, Enum, ForeignKey, Index, LargeBinary
+from sqlalchemy.orm import declarative_base, relationship, synonym
 import uuid
 from .models import GameMode
 
@@ -19,10 +19,22 @@ class DBUser(Base):
     highScore = Column(Integer, default=0)
     gamesPlayed = Column(Integer, default=0)
     createdAt = Column(DateTime, default=datetime.utcnow)
+    # Bumped to revoke every token issued for this user
+    tokenVersion = Column(Integer, default=0, nullable=False, server_default="0")
 
     # Relationship to leaderboard entries (optional, but good practice)
     scores = relationship("DBLeaderboard", back_populates="user", cascade="all, delete-orphan")
 
+# Serves COUNT-based user ranks when the in-memory rank index is off: WHERE highScore > ?
+Index("ix_users_high_score", DBUser.highScore)
+
+class DBSchemaVersion(Base):
+    """Schema versions applied by migrate_schema(); boot only reads MAX(version)."""
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True)
+    appliedAt = Column(DateTime, default=datetime.utcnow)
+
 class DBLeaderboard(Base):
     __tablename__ = "leaderboard"
 
@@ -31,6 +43,82 @@ class DBLeaderboard(Base):
     username = Column(String, nullable=False) # Copied for easy access or consistency
     score = Column(Integer, nullable=False, index=True)
     mode = Column(String, nullable=False) # Storing as string to handle "walls" | "pass-through"
-    date = Column(DateTime, default=datetime.utcnow)
+    # Part of every leaderboard cursor; older databases are backfilled by migrate_schema()
+    date = Column(DateTime, nullable=False, default=datetime.utcnow)
 
     user = relationship("DBUser", back_populates="scores")
+
+# Serves keyset pagination and top-N reads: WHERE mode = ? ORDER BY score DESC, date, id
+Index(
+    "ix_leaderboard_mode_score_date_id",
+    DBLeaderboard.mode,
+    DBLeaderboard.score.desc(),
+    DBLeaderboard.date,
+    DBLeaderboard.id,
+)
+
+# Serves exports: WHERE date >= ? AND date < ? ORDER BY date, id, resumable after (date, id)
+Index("ix_leaderboard_date_id", DBLeaderboard.date, DBLeaderboard.id)
+
+class DBUserBestScore(Base):
+    """Best leaderboard row per user and mode, maintained on every score write."""
+    __tablename__ = "user_best_scores"
+
+    userId = Column(String, ForeignKey("users.id"), primary_key=True)
+    mode = Column(String, primary_key=True)
+    username = Column(String, nullable=False)
+    score = Column(Integer, nullable=False)
+    date = Column(DateTime, nullable=False)
+    # The leaderboard row this best came from; exposed as id so it reads like a DBLeaderboard
+    entryId = Column(String, nullable=False)
+    id = synonym("entryId")
+
+Index(
+    "ix_user_best_scores_mode_score_date_entry",
+    DBUserBestScore.mode,
+    DBUserBestScore.score.desc(),
+    DBUserBestScore.date,
+    DBUserBestScore.entryId,
+)
+
+class DBWindowBestScore(Base):
+    """
+    Best score per user and mode within one day/week/month window, keyed by the
+    window's start. Only current windows are kept; older ones are compacted away.
+    """
+    __tablename__ = "leaderboard_window_scores"
+
+    window = Column(String, primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    mode = Column(String, primary_key=True)
+    userId = Column(String, ForeignKey("users.id"), primary_key=True)
+    username = Column(String, nullable=False)
+    score = Column(Integer, nullable=False)
+    date = Column(DateTime, nullable=False)
+    entryId = Column(String, nullable=False)
+    id = synonym("entryId")
+
+# Top-N of one window: WHERE window = ? AND bucket = ? AND mode = ? ORDER BY score DESC, date, entryId
+Index(
+    "ix_leaderboard_window_scores_top",
+    DBWindowBestScore.window,
+    DBWindowBestScore.bucket,
+    DBWindowBestScore.mode,
+    DBWindowBestScore.score.desc(),
+    DBWindowBestScore.date,
+    DBWindowBestScore.entryId,
+)
+
+class DBReplay(Base):
+    """Verified replay behind a leaderboard row, stored in its packed wire format."""
+    __tablename__ = "replays"
+
+    entryId = Column(String, ForeignKey("leaderboard.id"), primary_key=True)
+    userId = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    ticks = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    createdAt = Column(DateTime, default=datetime.utcnow)
+    # Replay.digest: one game is accepted once. NULL only for copies stored before this existed
+    digest = Column(String, nullable=True)
+
+Index("ix_replays_digest", DBReplay.digest, unique=True)
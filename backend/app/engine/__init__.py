@@ -0,0 +1,14 @@
+"""Server-side snake rules, kept in step with frontend/src/game/gameLogic.ts."""
+from .game import SnakeGame
+from .prng import Mulberry32
+from .replay import Replay, ReplayError, ReplayRecorder, decode_replay, encode_replay, simulate, verify_replay
+from .rules import (
+    GRID_SIZE, INITIAL_SPEED, MIN_SPEED, POINTS_PER_FOOD, SPEED_INCREMENT,
+    is_opposite_direction, max_score, move_table,
+)
+
+__all__ = [
+    "SnakeGame", "Mulberry32", "Replay", "ReplayError", "ReplayRecorder", "decode_replay", "encode_replay", "simulate", "verify_replay",
+    "GRID_SIZE", "INITIAL_SPEED", "MIN_SPEED", "POINTS_PER_FOOD", "SPEED_INCREMENT",
+    "is_opposite_direction", "max_score", "move_table",
+]
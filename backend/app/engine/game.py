@@ -0,0 +1,132 @@
+import random
+from collections import deque
+from typing import Deque, Iterable, Optional
+
+from ..models import Direction, GameMode, LiveGame, Point
+from .rules import (
+    DIRECTIONS, GRID_SIZE, INITIAL_LENGTH, INITIAL_SPEED, MIN_SPEED, POINTS_PER_FOOD, SPEED_INCREMENT, WALL,
+    is_opposite_direction, move_table,
+)
+
+_DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+
+
+class SnakeGame:
+    """
+    One game, advanced one tick at a time with the same rules as the browser.
+    The board is a bytearray occupancy map and the body a deque of cell
+    indexes (head first), so a tick is a table lookup, a byte test and two
+    deque operations instead of list copies and coordinate scans.
+
+    Food is placed with `rng` (random.Random or Mulberry32); seed it to replay
+    a game exactly.
+    """
+
+    __slots__ = (
+        "mode", "grid_size", "rng", "cells", "body", "food", "direction", "next_direction",
+        "score", "speed", "ticks", "over", "_moves",
+    )
+
+    def __init__(
+        self,
+        mode: GameMode,
+        body: Iterable[int],
+        food: Optional[int],
+        direction: Direction = Direction.RIGHT,
+        score: int = 0,
+        grid_size: int = GRID_SIZE,
+        rng: Optional[random.Random] = None,
+    ):
+        self.mode = GameMode(mode)
+        self.grid_size = grid_size
+        self.rng = rng or random.Random()
+        self.cells = bytearray(grid_size * grid_size)
+        self.body: Deque[int] = deque(body)
+        for cell in self.body:
+            self.cells[cell] = 1
+        self.direction = Direction(direction)
+        self.next_direction = self.direction
+        self.score = score
+        self.speed = max(MIN_SPEED, INITIAL_SPEED - score // POINTS_PER_FOOD * SPEED_INCREMENT)
+        self.ticks = 0
+        self.over = False
+        self._moves = move_table(grid_size, self.mode)
+        self.food = food if food is not None else self.place_food()
+
+    @classmethod
+    def new(cls, mode: GameMode, grid_size: int = GRID_SIZE, rng: Optional[random.Random] = None) -> "SnakeGame":
+        """Three cells facing right from the centre, like createInitialState."""
+        center = grid_size // 2
+        body = [center * grid_size + center - i for i in range(INITIAL_LENGTH)]
+        return cls(mode, body, None, grid_size=grid_size, rng=rng)
+
+    @classmethod
+    def from_live_game(cls, game: LiveGame, grid_size: int = GRID_SIZE, rng: Optional[random.Random] = None) -> "SnakeGame":
+        cell = lambda p: int(p.y) * grid_size + int(p.x)
+        for p in (*game.snake, game.food):
+            if not (0 <= p.x < grid_size and 0 <= p.y < grid_size and float(p.x).is_integer() and float(p.y).is_integer()):
+                raise ValueError(f"Point ({p.x}, {p.y}) is not a cell of a {grid_size}x{grid_size} board")
+        return cls(game.mode, map(cell, game.snake), cell(game.food), game.direction, game.score, grid_size, rng)
+
+    def point(self, cell: int) -> Point:
+        y, x = divmod(cell, self.grid_size)
+        return Point(x=x, y=y)
+
+    @property
+    def snake(self):
+        return [self.point(cell) for cell in self.body]
+
+    def place_food(self) -> Optional[int]:
+        """
+        A random free cell (generateFood), or None once the snake fills the board.
+        One draw per food: the free cells in row-major order, indexed by
+        randrange(free). Replays depend on this; see app/engine/replay.py.
+        """
+        free = [cell for cell, taken in enumerate(self.cells) if not taken]
+        if not free:
+            return None
+        return free[self.rng.randrange(len(free))]
+
+    def turn(self, direction: Direction) -> bool:
+        """Queue a direction for the next tick (setDirection). Reversing onto the body is ignored."""
+        direction = Direction(direction)
+        if self.over or is_opposite_direction(self.direction, direction):
+            return False
+        self.next_direction = direction
+        return True
+
+    def tick(self) -> bool:
+        """Advance one step (moveSnake). Returns False once the game is over."""
+        if self.over:
+            return False
+        target = self._moves[self.body[0] * 4 + _DIRECTION_INDEX[self.next_direction]]
+        # The tail moves out of the way this tick, so running into it is allowed
+        if target == WALL or (self.cells[target] and target != self.body[-1]):
+            self.over = True
+            return False
+
+        self.direction = self.next_direction
+        self.ticks += 1
+        eating = target == self.food
+        if not eating:
+            self.cells[self.body.pop()] = 0
+        self.body.appendleft(target)
+        self.cells[target] = 1
+        if eating:
+            self.score += POINTS_PER_FOOD
+            self.speed = max(MIN_SPEED, self.speed - SPEED_INCREMENT)
+            self.food = self.place_food()
+            if self.food is None:
+                # Board is full: nothing left to eat
+                self.over = True
+                return False
+        return True
+
+    def apply_to(self, game: LiveGame) -> LiveGame:
+        """Copy this state onto a LiveGame (same id, player and start time)."""
+        return game.model_copy(update={
+            "snake": self.snake,
+            "food": self.point(self.food) if self.food is not None else game.food,
+            "direction": self.direction,
+            "score": self.score,
+        })
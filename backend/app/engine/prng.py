@@ -0,0 +1,39 @@
+from typing import Sequence, TypeVar
+
+T = TypeVar("T")
+_MASK = 0xFFFFFFFF
+
+
+class Mulberry32:
+    """
+    Small 32-bit PRNG that is easy to reproduce bit-for-bit in JavaScript, so a
+    browser and the server place food identically from the same seed:
+
+        function mulberry32(a) {
+          return () => {
+            let t = (a = (a + 0x6D2B79F5) | 0);
+            t = Math.imul(t ^ (t >>> 15), t | 1);
+            t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+            return (t ^ (t >>> 14)) >>> 0;
+          };
+        }
+
+    randrange(n) is next() % n, which clients must use the same way.
+    """
+
+    __slots__ = ("state",)
+
+    def __init__(self, seed: int):
+        self.state = seed & _MASK
+
+    def next(self) -> int:
+        self.state = t = (self.state + 0x6D2B79F5) & _MASK
+        t = ((t ^ (t >> 15)) * (t | 1)) & _MASK
+        t ^= (t + (((t ^ (t >> 7)) * (t | 61)) & _MASK)) & _MASK
+        return t ^ (t >> 14)
+
+    def randrange(self, n: int) -> int:
+        return self.next() % n
+
+    def choice(self, seq: Sequence[T]) -> T:
+        return seq[self.randrange(len(seq))]
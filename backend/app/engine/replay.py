@@ -0,0 +1,175 @@
+"""
+Compact game replays and their verification.
+
+A replay is the food seed plus every direction change, so the server can play
+the game again and compute the score itself. Wire format, version 1, as a
+sequence of unsigned LEB128 varints:
+
+    version, mode (index in GameMode), grid size, seed (u32), score, ticks, turns
+    then per turn: (ticks since the previous turn << 2) | direction index
+
+`ticks` counts the moves the snake made; a fatal move is not one of them.
+Directions are indexed UP, DOWN, LEFT, RIGHT. A turn at tick t is applied
+before tick t runs (several turns may share a tick, like repeated key presses
+between frames). A typical game of a few hundred turns packs into well under a
+kilobyte.
+
+Food is placed with Mulberry32(seed), one draw per food: the first places the
+starting food, then one after every food eaten. With n = next(), food goes to
+free[n % len(free)], where free lists the empty cells in row-major order (y,
+then x; the cell index y * grid size + x ascending). generateFood in
+frontend/src/game/gameLogic.ts does the same, and
+frontend/src/game/foodPlacement.vectors.json pins both to the same output.
+"""
+import hashlib
+from dataclasses import dataclass, field, replace
+from itertools import islice
+from typing import List, Optional, Tuple
+
+from ..models import Direction, GameMode
+from .game import SnakeGame
+from .prng import Mulberry32
+from .rules import DIRECTIONS, GRID_SIZE
+
+REPLAY_VERSION = 1
+_MODES = list(GameMode)
+
+
+class ReplayError(ValueError):
+    """The replay is malformed or does not reproduce its claimed score."""
+
+
+@dataclass
+class Replay:
+    mode: GameMode
+    seed: int
+    score: int
+    ticks: int
+    # (tick, direction) in tick order
+    turns: List[Tuple[int, Direction]] = field(default_factory=list)
+    grid_size: int = GRID_SIZE
+    # Set by verify_replay: hash of the game actually played, the same for every
+    # encoding of it (padded varints, ignored or superseded turns)
+    digest: str = field(default="", compare=False)
+
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _varints(data: bytes):
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            if shift > 63:
+                raise ReplayError("Varint too long")
+        else:
+            yield value
+            value = shift = 0
+    if shift:
+        raise ReplayError("Truncated varint")
+
+
+def encode_replay(replay: Replay) -> bytes:
+    out = bytearray()
+    for value in (REPLAY_VERSION, _MODES.index(GameMode(replay.mode)), replay.grid_size, replay.seed,
+                  replay.score, replay.ticks, len(replay.turns)):
+        _write_varint(out, value)
+    previous = 0
+    for tick, direction in replay.turns:
+        _write_varint(out, (tick - previous) << 2 | DIRECTIONS.index(Direction(direction)))
+        previous = tick
+    return bytes(out)
+
+
+def decode_replay(data: bytes, max_ticks: int = 0) -> Replay:
+    """Parse a replay, rejecting anything that would be expensive or impossible to simulate."""
+    values = _varints(data)
+    header = list(islice(values, 7))
+    if len(header) < 7:
+        raise ReplayError("Truncated replay header")
+    version, mode, grid_size, seed, score, ticks, count = header
+    if version != REPLAY_VERSION:
+        raise ReplayError(f"Unsupported replay version {version}")
+    if mode >= len(_MODES):
+        raise ReplayError(f"Unknown mode {mode}")
+    if grid_size != GRID_SIZE:
+        raise ReplayError(f"Grid size must be {GRID_SIZE}")
+    if seed > 0xFFFFFFFF:
+        raise ReplayError("Seed must fit in 32 bits")
+    if max_ticks and ticks > max_ticks:
+        raise ReplayError(f"Replay is longer than {max_ticks} ticks")
+
+    turns, tick = [], 0
+    for packed in values:
+        tick += packed >> 2
+        turns.append((tick, DIRECTIONS[packed & 3]))
+    if len(turns) != count:
+        raise ReplayError(f"Replay declares {count} turns but has {len(turns)}")
+    if tick > ticks:
+        raise ReplayError("Turn after the last tick")
+    return Replay(_MODES[mode], seed, score, ticks, turns, grid_size)
+
+
+def simulate(replay: Replay, moves: Optional[List[Tuple[int, Direction]]] = None) -> SnakeGame:
+    """
+    Play the replay from a fresh game. Stops early if the snake dies. If `moves`
+    is given, the direction changes the snake actually made are appended to it.
+    """
+    game = SnakeGame.new(replay.mode, replay.grid_size, rng=Mulberry32(replay.seed))
+    turns, next_turn = replay.turns, 0
+    for tick in range(replay.ticks):
+        while next_turn < len(turns) and turns[next_turn][0] == tick:
+            game.turn(turns[next_turn][1])
+            next_turn += 1
+        if moves is not None and game.next_direction != game.direction:
+            moves.append((tick, game.next_direction))
+        if not game.tick():
+            break
+    return game
+
+
+class ReplayRecorder:
+    """Plays a game like the browser does and records it as a Replay."""
+
+    def __init__(self, mode: GameMode, seed: int):
+        self.seed = seed & 0xFFFFFFFF
+        self.game = SnakeGame.new(mode, rng=Mulberry32(self.seed))
+        self.turns: List[Tuple[int, Direction]] = []
+
+    def turn(self, direction: Direction) -> bool:
+        # Rejected turns change nothing on replay either, so they are not recorded
+        accepted = self.game.turn(direction)
+        if accepted:
+            self.turns.append((self.game.ticks, Direction(direction)))
+        return accepted
+
+    def tick(self) -> bool:
+        return self.game.tick()
+
+    def replay(self) -> Replay:
+        game = self.game
+        return Replay(game.mode, self.seed, game.score, game.ticks, list(self.turns), game.grid_size)
+
+
+def verify_replay(data: bytes, max_ticks: int = 0) -> Replay:
+    """
+    Decode and re-simulate a replay; if the simulation reaches the claimed
+    score after exactly the claimed number of ticks, return it with its digest
+    and without its turns (the caller already has them in `data`, and a process
+    pool would only pickle them back). Module-level so it can run in a process pool.
+    """
+    replay = decode_replay(data, max_ticks)
+    moves = []
+    game = simulate(replay, moves)
+    if game.ticks != replay.ticks:
+        raise ReplayError(f"Snake died after {game.ticks} of {replay.ticks} ticks")
+    if game.score != replay.score:
+        raise ReplayError(f"Replay scores {game.score}, not {replay.score}")
+    digest = hashlib.blake2b(encode_replay(replace(replay, turns=moves)), digest_size=16).hexdigest()
+    return replace(replay, turns=[], digest=digest)
@@ -0,0 +1,53 @@
+"""
+Game constants and movement rules, mirroring frontend/src/game/gameLogic.ts and
+gameTypes.ts. Cells are addressed by index (y * grid_size + x) so boards fit in
+a bytearray and moves are table lookups.
+"""
+from array import array
+from functools import lru_cache
+
+from ..models import GRID_SIZE, POINTS_PER_FOOD, Direction, GameMode
+
+INITIAL_SPEED = 150
+SPEED_INCREMENT = 5
+MIN_SPEED = 50
+INITIAL_LENGTH = 3
+
+DIRECTIONS = list(Direction)
+# y grows downwards, like the canvas
+DELTAS = {Direction.UP: (0, -1), Direction.DOWN: (0, 1), Direction.LEFT: (-1, 0), Direction.RIGHT: (1, 0)}
+OPPOSITE = {Direction.UP: Direction.DOWN, Direction.DOWN: Direction.UP, Direction.LEFT: Direction.RIGHT, Direction.RIGHT: Direction.LEFT}
+# Moves into a wall in walls mode
+WALL = -1
+
+
+def is_opposite_direction(current: Direction, requested: Direction) -> bool:
+    return OPPOSITE[current] == requested
+
+
+@lru_cache(maxsize=None)
+def move_table(grid_size: int, mode: GameMode) -> array:
+    """
+    Next cell for every (cell, direction) pair, at cell * 4 + direction index.
+    Pass-through wraps around the edges; walls mode maps off-board moves to WALL.
+    Built once per board shape and shared by every game on it.
+    """
+    table = array("i", bytes(4 * grid_size * grid_size * len(DIRECTIONS)))
+    wrap = GameMode(mode) == GameMode.pass_through
+    for y in range(grid_size):
+        for x in range(grid_size):
+            for d, direction in enumerate(DIRECTIONS):
+                dx, dy = DELTAS[direction]
+                nx, ny = x + dx, y + dy
+                if wrap:
+                    nx, ny = nx % grid_size, ny % grid_size
+                elif not (0 <= nx < grid_size and 0 <= ny < grid_size):
+                    table[(y * grid_size + x) * 4 + d] = WALL
+                    continue
+                table[(y * grid_size + x) * 4 + d] = ny * grid_size + nx
+    return table
+
+
+def max_score(grid_size: int = GRID_SIZE) -> int:
+    """Highest reachable score: every free cell eaten once."""
+    return (grid_size * grid_size - INITIAL_LENGTH) * POINTS_PER_FOOD
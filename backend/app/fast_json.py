@@ -0,0 +1,42 @@
+"""
+Fast JSON encoding for hot read paths. Produces the same bytes FastAPI does for
+a response_model (compact separators, raw UTF-8, pydantic's datetime format)
+without building and validating a model per row. Uses orjson when installed.
+"""
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, datetime):
+        # pydantic writes UTC as "Z", every other offset as +HH:MM
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        # Datetimes go through _default so both encoders format them identically
+        return orjson.dumps(value, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(value, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that takes plain data or already-encoded bytes."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
@@ -0,0 +1,64 @@
+import argparse
+import time
+from sqlalchemy import func, select
+from app.database import engine, ensure_schema, settings
+from app.db_models import Base, DBUser
+from app.passwords import password_hasher
+from app.synthetic_data import BATCH_SIZE, SYNTHETIC_PASSWORD, SyntheticDataset, bulk_load
+
+def load_live_games(dataset: SyntheticDataset, count: int) -> bool:
+    """Write live games where the workers will pick them up; only the sqlite backend is shared."""
+    if settings.LIVE_GAME_BACKEND != "sqlite":
+        return False
+    from app.live_game_sync import SqliteLiveGameSync
+    from app.live_games import LiveGameRegistry
+
+    sync = SqliteLiveGameSync(LiveGameRegistry(), settings.LIVE_GAME_STATE_PATH)
+    sync.open()
+    try:
+        for game in dataset.live_games(count):
+            sync.registry.add(game)
+    finally:
+        sync.close()
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and bulk-load synthetic users, scores and live games.")
+    parser.add_argument("--rows", type=int, default=100_000, help="Leaderboard rows to generate.")
+    parser.add_argument("--players", type=int, default=0, help="Users to spread them over (default rows / 10).")
+    parser.add_argument("--live-games", type=int, default=0, help="Live games to publish (needs LIVE_GAME_BACKEND=sqlite).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per transaction.")
+    parser.add_argument("--password", default=SYNTHETIC_PASSWORD, help="Password shared by every generated user.")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate every table first.")
+    args = parser.parse_args()
+
+    if args.reset:
+        print("Dropping all tables...")
+        Base.metadata.drop_all(bind=engine)
+    ensure_schema()
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(DBUser)).scalar_one() and not args.reset:
+            parser.error("database already has users; pass --reset to replace them")
+
+    print(f"Generating {args.rows} scores for {args.players or 'rows / 10'} players (seed {args.seed})...")
+    started = time.perf_counter()
+    dataset = SyntheticDataset(args.rows, players=args.players, seed=args.seed)
+    # Every user shares a password, so hash it once
+    password_hash = password_hasher.hash_sync(args.password)
+    print(f"Generated in {time.perf_counter() - started:.2f}s.")
+
+    report = bulk_load(engine, dataset, password_hash, batch_size=args.batch_size)
+    print(f"Loaded {report['users']} users, {report['scores']} scores, {report['bestScores']} best scores "
+          f"and {report['windowScores']} windowed best scores "
+          f"in {report['seconds']:.2f}s ({report['rowsPerSecond']:,.0f} rows/s; "
+          f"inserts {report['loadSeconds']:.2f}s, indexes {report['indexSeconds']:.2f}s).")
+
+    if args.live_games:
+        if load_live_games(dataset, args.live_games):
+            print(f"Published {args.live_games} live games to {settings.LIVE_GAME_STATE_PATH}.")
+        else:
+            print("Skipped live games: with LIVE_GAME_BACKEND=local they only exist inside a server process.")
+
+if __name__ == "__main__":
+    main()
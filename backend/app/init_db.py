@@ -1,16 +1,26 @@
 import argparse
-from app.database import init_db
+import time
+from app.database import ensure_schema, seed_db, SCHEMA_VERSION
 
 def main():
     parser = argparse.ArgumentParser(description="Initialize and seed the database.")
-    parser.add_argument("--seed", action="store_true", help="Seed the database with initial data.")
+    parser.add_argument("--seed", action="store_true", help="Seed the database with demo users and scores.")
     args = parser.parse_args()
 
-    # The init_db function already seeds if empty, but we can pass args if we want more control.
-    # For now, we'll just call it.
+    started = time.perf_counter()
     print("Initializing database...")
-    init_db()
-    print("Database initialized successfully.")
+    if ensure_schema():
+        print(f"Schema migrated to version {SCHEMA_VERSION}.")
+    else:
+        print(f"Schema already at version {SCHEMA_VERSION}.")
+
+    if args.seed:
+        # One transaction with bulk inserts; a database that has users is left alone
+        if seed_db():
+            print("Seeded demo users and leaderboard.")
+        else:
+            print("Database already has users, skipping seed.")
+    print(f"Database initialized successfully in {time.perf_counter() - started:.2f}s.")
 
 if __name__ == "__main__":
     main()
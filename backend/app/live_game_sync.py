@@ -0,0 +1,227 @@
+import asyncio
+import sqlite3
+import time
+import uuid
+from threading import Lock
+from typing import List, Optional, Tuple
+
+from .database import live_games_db, settings
+from .live_games import LiveGameRegistry
+from .models import LiveGame
+
+
+class LiveGameSync:
+    """
+    Keeps a worker's LiveGameRegistry in step with the other workers. The
+    registry stays the local read model (lookups, indexes, spectator listeners);
+    a sync backend only carries changes between processes. This base class is
+    the single-process stand-in and does nothing.
+    """
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class SqliteLiveGameSync(LiveGameSync):
+    """
+    Shares live games between workers on one host through a SQLite file in WAL
+    mode. Every local change is appended to an event log and mirrored into a
+    state table; each worker polls the log for other workers' events and
+    replays them into its registry, which also drives its spectator sockets.
+    New workers load the state table first, then follow the log from there.
+
+    Local changes are written from a thread, never on the event loop: a write
+    can wait up to the busy timeout for another worker's lock. Changes made
+    while a write is in progress go out together in the next transaction.
+    """
+
+    def __init__(self, registry: LiveGameRegistry, path: str, poll_interval: float = 0.05, retention: float = 60.0):
+        self.registry = registry
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.origin = uuid.uuid4().hex
+        self.last_seq = 0
+        self._writer: Optional[sqlite3.Connection] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._write_lock = Lock()
+        self._applying = False
+        # (game_id, payload, at) published but not yet written, in order
+        self._outbox: List[Tuple[str, Optional[str], float]] = []
+        self._flushing: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_prune = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def open(self):
+        self._writer = self._connect()
+        self._reader = self._connect()
+        self._writer.executescript("""
+            CREATE TABLE IF NOT EXISTS live_game_events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                origin TEXT NOT NULL,
+                game_id TEXT NOT NULL,
+                payload TEXT,
+                at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS live_game_state (
+                game_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                at REAL NOT NULL
+            );
+        """)
+        self._load_snapshot()
+        self.registry.add_listener(self._publish)
+
+    def close(self):
+        self.registry.remove_listener(self._publish)
+        leftover = self._take_outbox()
+        if leftover:
+            self._write(leftover)
+        with self._write_lock:
+            for conn in (self._writer, self._reader):
+                if conn is not None:
+                    conn.close()
+            self._writer = self._reader = None
+
+    async def start(self):
+        self.open()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        self.close()
+
+    def _load_snapshot(self):
+        # One read transaction so the state and the log position agree
+        self._reader.execute("BEGIN")
+        try:
+            self.last_seq = self._reader.execute("SELECT COALESCE(MAX(seq), 0) FROM live_game_events").fetchone()[0]
+            # Skip games nobody has touched for a full TTL (e.g. their worker died)
+            cutoff = time.time() - self.registry.ttl_seconds
+            rows = self._reader.execute("SELECT game_id, payload FROM live_game_state WHERE at > ?", (cutoff,)).fetchall()
+        finally:
+            self._reader.execute("COMMIT")
+        self._apply(rows)
+
+    def _publish(self, game_id: str, before: Optional[LiveGame], after: Optional[LiveGame]):
+        if self._applying or self._writer is None:
+            return
+        payload = after.model_dump_json() if after is not None else None
+        self._outbox.append((game_id, payload, time.time()))
+        if self._flushing is None or self._flushing.done():
+            try:
+                self._flushing = asyncio.get_running_loop().create_task(self._drain())
+            except RuntimeError:
+                # No event loop (scripts): nothing else to block, write in place
+                self._write(self._take_outbox())
+
+    def _take_outbox(self) -> List[Tuple[str, Optional[str], float]]:
+        changes, self._outbox = self._outbox, []
+        return changes
+
+    async def _drain(self):
+        while self._outbox:
+            await asyncio.to_thread(self._write, self._take_outbox())
+
+    async def flush(self):
+        """Wait until every change published so far is written."""
+        if self._flushing is not None:
+            await self._flushing
+
+    def _write(self, changes: List[Tuple[str, Optional[str], float]]):
+        with self._write_lock:
+            if self._writer is None:
+                return
+            try:
+                self._writer.execute("BEGIN IMMEDIATE")
+                for game_id, payload, at in changes:
+                    self._writer.execute(
+                        "INSERT INTO live_game_events (origin, game_id, payload, at) VALUES (?, ?, ?, ?)",
+                        (self.origin, game_id, payload, at),
+                    )
+                    if payload is None:
+                        self._writer.execute("DELETE FROM live_game_state WHERE game_id = ?", (game_id,))
+                    else:
+                        self._writer.execute(
+                            "INSERT INTO live_game_state (game_id, payload, at) VALUES (?, ?, ?) "
+                            "ON CONFLICT(game_id) DO UPDATE SET payload = excluded.payload, at = excluded.at",
+                            (game_id, payload, at),
+                        )
+                self._writer.execute("COMMIT")
+            except sqlite3.Error as e:
+                # The local changes stand; other workers catch up on the next change to each game
+                if self._writer.in_transaction:
+                    self._writer.execute("ROLLBACK")
+                print(f"Live game sync could not publish {len(changes)} change(s): {e}")
+
+    def _read_events(self) -> List[Tuple[int, str, str, Optional[str]]]:
+        return self._reader.execute(
+            "SELECT seq, origin, game_id, payload FROM live_game_events WHERE seq > ? ORDER BY seq",
+            (self.last_seq,),
+        ).fetchall()
+
+    def _apply(self, changes: List[Tuple[str, Optional[str]]]):
+        # Replayed changes must not be published again
+        self._applying = True
+        try:
+            for game_id, payload in changes:
+                if payload is None:
+                    self.registry.remove(game_id)
+                else:
+                    self.registry.add(LiveGame.model_validate_json(payload))
+        finally:
+            self._applying = False
+
+    async def poll(self) -> int:
+        """Replay other workers' events since the last poll. Returns how many were applied."""
+        events = await asyncio.to_thread(self._read_events)
+        if not events:
+            return 0
+        self.last_seq = events[-1][0]
+        remote = [(game_id, payload) for _, origin, game_id, payload in events if origin != self.origin]
+        self._apply(remote)
+        return len(remote)
+
+    def prune(self):
+        with self._write_lock:
+            self._writer.execute("DELETE FROM live_game_events WHERE at < ?", (time.time() - self.retention,))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+                if time.monotonic() - self._last_prune > self.retention / 4:
+                    self._last_prune = time.monotonic()
+                    await asyncio.to_thread(self.prune)
+            except sqlite3.Error as e:
+                print(f"Live game sync failed: {e}")
+
+
+def make_live_game_sync(registry: LiveGameRegistry) -> LiveGameSync:
+    if settings.LIVE_GAME_BACKEND == "sqlite":
+        return SqliteLiveGameSync(
+            registry,
+            settings.LIVE_GAME_STATE_PATH,
+            poll_interval=settings.LIVE_GAME_POLL_MS / 1000,
+        )
+    return LiveGameSync()
+
+
+live_game_sync = make_live_game_sync(live_games_db)
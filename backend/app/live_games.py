@@ -0,0 +1,152 @@
+from collections import OrderedDict
+from threading import RLock
+from time import monotonic
+from typing import Callable, Dict, List, Optional
+
+from .models import GameMode, LiveGame
+
+# Listener signature: (game_id, previous state or None, new state or None when the game ended)
+GameListener = Callable[[str, Optional[LiveGame], Optional[LiveGame]], None]
+
+
+class LiveGameRegistry:
+    """
+    In-memory store of live games with O(1) lookup by id, secondary indexes by
+    mode and player, and TTL eviction of games that stop sending updates.
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0, clock: Callable[[], float] = monotonic):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = RLock()
+        self._games: Dict[str, LiveGame] = {}
+        # Dicts used as insertion-ordered sets
+        self._by_mode: Dict[GameMode, Dict[str, None]] = {mode: {} for mode in GameMode}
+        self._by_player: Dict[str, Dict[str, None]] = {}
+        # Last update time per expiring game, oldest first
+        self._touched: "OrderedDict[str, float]" = OrderedDict()
+        self._listeners: List[GameListener] = []
+
+    def add_listener(self, listener: GameListener):
+        """
+        Call `listener` after every create, update or removal (including expiry).
+        Listeners run after the registry lock is released, so they may call back in.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: GameListener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, game_id: str, before: Optional[LiveGame], after: Optional[LiveGame]):
+        for listener in list(self._listeners):
+            listener(game_id, before, after)
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def __iter__(self):
+        return iter(self.list())
+
+    def add(self, game: LiveGame, expires: bool = True) -> LiveGame:
+        with self._lock:
+            before = self._remove(game.id) if game.id in self._games else None
+            self._games[game.id] = game
+            self._by_mode[game.mode][game.id] = None
+            self._by_player.setdefault(game.playerId, {})[game.id] = None
+            if expires:
+                self._touched[game.id] = self._clock()
+        self._notify(game.id, before, game)
+        return game
+
+    def get(self, game_id: str) -> Optional[LiveGame]:
+        with self._lock:
+            expired = self._remove(game_id) if self._is_expired(game_id) else None
+            game = self._games.get(game_id)
+        if expired is not None:
+            self._notify(game_id, expired, None)
+        return game
+
+    def update(self, game_id: str, **changes) -> Optional[LiveGame]:
+        """Apply changes to a game and refresh its TTL. id, mode and player are immutable."""
+        with self._lock:
+            expired = self._remove(game_id) if self._is_expired(game_id) else None
+            before = self._games.get(game_id)
+            if before is not None:
+                changes = {k: v for k, v in changes.items() if k not in ("id", "mode", "playerId")}
+                game = before.model_copy(update=changes)
+                self._games[game_id] = game
+                if game_id in self._touched:
+                    self._touched[game_id] = self._clock()
+                    self._touched.move_to_end(game_id)
+        if expired is not None:
+            self._notify(game_id, expired, None)
+        if before is None:
+            return None
+        self._notify(game_id, before, game)
+        return game
+
+    def remove(self, game_id: str) -> Optional[LiveGame]:
+        with self._lock:
+            game = self._remove(game_id)
+        if game is not None:
+            self._notify(game_id, game, None)
+        return game
+
+    def list(self, mode: Optional[GameMode] = None, player_id: Optional[str] = None) -> List[LiveGame]:
+        with self._lock:
+            expired = self._expire()
+            if player_id is not None:
+                ids = self._by_player.get(player_id, {})
+                if mode is not None:
+                    ids = [i for i in ids if i in self._by_mode[mode]]
+            elif mode is not None:
+                ids = self._by_mode[mode]
+            else:
+                ids = self._games
+            games = [self._games[i] for i in ids]
+        for game in expired:
+            self._notify(game.id, game, None)
+        return games
+
+    def expire(self) -> List[str]:
+        """Drop games whose last update is older than the TTL. Cost is O(expired)."""
+        with self._lock:
+            expired = self._expire()
+        for game in expired:
+            self._notify(game.id, game, None)
+        return [game.id for game in expired]
+
+    def _expire(self) -> List[LiveGame]:
+        # Caller holds the lock and notifies listeners once it is released
+        expired = []
+        deadline = self._clock() - self.ttl_seconds
+        while self._touched:
+            game_id, touched_at = next(iter(self._touched.items()))
+            if touched_at > deadline:
+                break
+            expired.append(self._remove(game_id))
+        return expired
+
+    def clear(self):
+        with self._lock:
+            removed = [self._remove(game_id) for game_id in list(self._games)]
+        for game in removed:
+            self._notify(game.id, game, None)
+
+    def _is_expired(self, game_id: str) -> bool:
+        touched_at = self._touched.get(game_id)
+        return touched_at is not None and touched_at <= self._clock() - self.ttl_seconds
+
+    def _remove(self, game_id: str) -> Optional[LiveGame]:
+        game = self._games.pop(game_id, None)
+        if game is None:
+            return None
+        self._touched.pop(game_id, None)
+        self._by_mode[game.mode].pop(game_id, None)
+        player_games = self._by_player.get(game.playerId)
+        if player_games is not None:
+            player_games.pop(game_id, None)
+            if not player_games:
+                del self._by_player[game.playerId]
+        return game
@@ -1,16 +1,86 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from sqlalchemy.exc import SQLAlchemyError
 import os
-from app.routers import auth, leaderboard, games, users
-from app.database import init_db
+from app.routers import auth, leaderboard, games, users, internal
+from app.database import ensure_schema, seed_db, seed_live_games, AsyncSessionLocal, async_engine, live_games_db, settings
+from app.rank_index import rank_index
+from app.routers.auth import principal_cache
+from app.response_cache import response_cache
+from app.admission import admission
+from app.name_filter import name_filter
+from app.spectators import spectator_hub
+from app.scores import score_queue
+from app.live_game_sync import live_game_sync
+from app.replays import replay_verifier
+from app.windowed_scores import compact_window_scores
+from app.static_files import StaticSite
+from app.metrics import MetricsMiddleware, request_metrics, startup_metrics
+
+async def sweep_live_games():
+    while True:
+        await asyncio.sleep(settings.LIVE_GAME_SWEEP_SECONDS)
+        live_games_db.expire()
+
+async def compact_leaderboard_windows():
+    while True:
+        await asyncio.sleep(settings.LEADERBOARD_WINDOW_COMPACT_SECONDS)
+        try:
+            async with async_engine.begin() as conn:
+                removed = await conn.run_sync(compact_window_scores)
+            if removed:
+                print(f"Compacted {removed} expired leaderboard window rows.")
+        except SQLAlchemyError as e:
+            print(f"Leaderboard window compaction failed: {e}")
+
+async def warm_name_filter():
+    # Not on the startup path: scanning every user takes seconds on big tables
+    try:
+        async with AsyncSessionLocal() as db:
+            await name_filter.warm(db)
+    except SQLAlchemyError as e:
+        print(f"Name filter warm-up failed, availability checks will query the database: {e}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_db()
+    startup_metrics.start()
+    with startup_metrics.phase("schema"):
+        ensure_schema()
+    if settings.seed_on_startup:
+        with startup_metrics.phase("seed"):
+            seed_db()
+            seed_live_games()
+    principal_cache.clear()
+    await response_cache.clear()
+    await admission.clear()
+    if settings.RANK_INDEX_ENABLED:
+        with startup_metrics.phase("rank_index"):
+            async with AsyncSessionLocal() as db:
+                await rank_index.warm(db)
+    # Pick up games other workers already host before serving requests
+    with startup_metrics.phase("live_game_sync"):
+        await live_game_sync.start()
+    spectator_hub.bind_loop(asyncio.get_running_loop())
+    live_games_db.add_listener(spectator_hub.on_game_change)
+    sweeper = asyncio.create_task(sweep_live_games())
+    compactor = asyncio.create_task(compact_leaderboard_windows())
+    name_filter_warmer = asyncio.create_task(warm_name_filter())
+    if settings.SCORE_WRITE_BEHIND:
+        score_queue.start()
+    startup_metrics.finish()
     yield
+    # Drain queued scores before the database goes away
+    await score_queue.stop()
+    replay_verifier.shutdown()
+    live_games_db.remove_listener(spectator_hub.on_game_change)
+    await live_game_sync.stop()
+    for task in (sweeper, compactor, name_filter_warmer):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await async_engine.dispose()
 
 app = FastAPI(
     title="Snake Spectacle Game",
@@ -26,13 +96,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+if settings.METRICS_ENABLED:
+    # Outermost, so latency includes every other middleware
+    app.add_middleware(MetricsMiddleware, metrics=request_metrics)
+    request_metrics.instrument_engine(async_engine.sync_engine)
+
 # API Routes
 app.include_router(auth.router, prefix="/api")
 app.include_router(leaderboard.router, prefix="/api")
 app.include_router(games.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
+app.include_router(internal.router, prefix="/api")
 
 @app.get("/api")
 @app.get("/api/")
@@ -42,21 +119,19 @@ async def api_root():
 # Serve static files from the 'frontend/dist' directory
 # (This directory will be populated during the Docker build)
 FRONTEND_PATH = os.path.join(os.getcwd(), "static")
+# Read once: index.html, hashed assets and their precompressed variants are served from memory
+static_site = StaticSite(FRONTEND_PATH)
 
-if os.path.exists(FRONTEND_PATH):
-    app.mount("/assets", StaticFiles(directory=os.path.join(FRONTEND_PATH, "assets")), name="assets")
-
-    @app.get("/{full_path:path}")
-    async def serve_spa(full_path: str):
+if os.path.exists(FRONTEND_PATH) and static_site.load():
+    @app.api_route("/{full_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+    async def serve_spa(request: Request, full_path: str):
         # If the path starts with api, it should have been caught by the routers
         if full_path.startswith("api"):
             return {"detail": "Not Found"}
-        
-        # Serve index.html for all other routes to support SPA
-        index_path = os.path.join(FRONTEND_PATH, "index.html")
-        if os.path.exists(index_path):
-            return FileResponse(index_path)
-        return {"detail": "Frontend assets not found"}
+        # Known files as themselves, anything else as index.html to support SPA routes
+        return static_site.response(
+            full_path, request.headers.get("accept-encoding"), request.headers.get("if-none-match"),
+        )
 else:
     @app.get("/")
     async def root():
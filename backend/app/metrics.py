@@ -0,0 +1,221 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class StartupTimer:
+    """Wall-clock time of each boot phase, reported once the app is ready."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.started: Optional[float] = None
+        self.total: Optional[float] = None
+
+    def start(self):
+        self.phases = {}
+        self.started = time.perf_counter()
+        self.total = None
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def finish(self) -> float:
+        self.total = time.perf_counter() - self.started
+        breakdown = ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.phases.items())
+        print(f"Startup completed in {self.total * 1000:.0f}ms ({breakdown})")
+        return self.total
+
+    def as_dict(self) -> dict:
+        return {
+            "totalSeconds": self.total,
+            "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+        }
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout, one series per label set."""
+
+    def __init__(self, name: str, help: str, buckets: Iterable[float], labels: Tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, label_values: Tuple[str, ...], value: float):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series.setdefault(label_values, ([0] * (len(self.buckets) + 1), [0.0]))
+        counts, total = series
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total) in sorted(self._series.items()):
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total[0]}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Queries issued while handling the current request; None outside requests
+_current_queries: ContextVar[Optional[QueryStats]] = ContextVar("current_queries", default=None)
+_query_started: ContextVar[float] = ContextVar("query_started", default=0.0)
+
+
+class RequestMetrics:
+    """
+    Per-route latency, response size and DB query histograms plus an in-flight
+    gauge. Routes are labelled by their path template, so cardinality stays
+    bounded by the number of routes.
+    """
+
+    LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+    SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000)
+    QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+    def __init__(self):
+        self._lock = Lock()
+        labels = ("method", "route", "status")
+        self.latency = Histogram("http_request_duration_seconds", "Request latency", self.LATENCY_BUCKETS, labels)
+        self.size = Histogram("http_response_size_bytes", "Response body size", self.SIZE_BUCKETS, labels)
+        self.queries = Histogram("db_queries_per_request", "SQL statements per request", self.QUERY_BUCKETS, labels)
+        self.query_time = Histogram("db_query_seconds_per_request", "Time spent in SQL per request", self.LATENCY_BUCKETS, labels)
+        self.in_flight = 0
+        self.queries_outside_requests = 0
+
+    def record(self, method: str, route: str, status: int, seconds: float, size: int, queries: QueryStats):
+        label_values = (method, route, str(status))
+        with self._lock:
+            self.latency.observe(label_values, seconds)
+            self.size.observe(label_values, size)
+            self.queries.observe(label_values, queries.count)
+            self.query_time.observe(label_values, queries.seconds)
+
+    def instrument_engine(self, sync_engine: Engine):
+        """Count statements and their time against the request that issued them."""
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        _query_started.set(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stats = _current_queries.get()
+        if stats is None:
+            self.queries_outside_requests += 1
+            return
+        stats.count += 1
+        stats.seconds += time.perf_counter() - _query_started.get()
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP http_requests_in_flight Requests currently being handled",
+                "# TYPE http_requests_in_flight gauge",
+                f"http_requests_in_flight {self.in_flight}",
+                "# HELP db_queries_outside_requests_total SQL statements issued outside a request (startup, background tasks)",
+                "# TYPE db_queries_outside_requests_total counter",
+                f"db_queries_outside_requests_total {self.queries_outside_requests}",
+            ]
+            for histogram in (self.latency, self.size, self.queries, self.query_time):
+                lines.extend(histogram.render())
+        return "\n".join(lines) + "\n"
+
+
+def route_template(scope) -> str:
+    """Path template of the matched route, e.g. /api/users/{userId}/stats."""
+    route = scope.get("route")
+    template = getattr(route, "path_format", None)
+    if template is None:
+        return "unmatched"
+    # Routes from included routers only know the part after the include prefix,
+    # so recover the prefix from the concrete path
+    concrete = template
+    for name, value in scope.get("path_params", {}).items():
+        concrete = concrete.replace("{" + name + "}", str(value))
+    path = scope["path"]
+    if path.endswith(concrete):
+        return path[:len(path) - len(concrete)] + template
+    return template
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware (no per-request task or body buffering) feeding RequestMetrics."""
+
+    def __init__(self, app, metrics: "RequestMetrics"):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        queries = QueryStats()
+        token = _current_queries.set(queries)
+        self.metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.in_flight -= 1
+            _current_queries.reset(token)
+            self.metrics.record(scope["method"], route_template(scope), status, elapsed, size, queries)
+
+
+def render_startup(timer: StartupTimer) -> str:
+    lines = [
+        "# HELP app_startup_seconds Time spent in each startup phase",
+        "# TYPE app_startup_seconds gauge",
+    ]
+    for phase, seconds in timer.phases.items():
+        lines.append(f'app_startup_seconds{{phase="{_escape(phase)}"}} {seconds}')
+    if timer.total is not None:
+        lines.append(f'app_startup_seconds{{phase="total"}} {timer.total}')
+    return "\n".join(lines) + "\n"
+
+
+startup_metrics = StartupTimer()
+request_metrics = RequestMetrics()
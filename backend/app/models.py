@@ -1,15 +1,35 @@
 from datetime import datetime
 from enum import Enum
 from typing import List, Optional
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
+
+# Board edge in cells; coordinates run from 0 to GRID_SIZE - 1
+GRID_SIZE = 20
+# Every score is a whole number of foods
+POINTS_PER_FOOD = 10
+# Highest score a game can reach: every free cell of the 20x20 board eaten once
+# (app.engine.max_score()). Bounds every score the API accepts.
+MAX_SCORE = 3970
+# A snake can't be longer than the board has cells
+MAX_SNAKE_LENGTH = GRID_SIZE * GRID_SIZE
+USERNAME_MAX_LENGTH = 50
 
 class GameMode(str, Enum):
     walls = "walls"
     pass_through = "pass-through"
 
+class LeaderboardWindow(str, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
 class Point(BaseModel):
-    x: float
-    y: float
+    x: int = Field(ge=0, lt=GRID_SIZE)
+    y: int = Field(ge=0, lt=GRID_SIZE)
 
 class Direction(str, Enum):
     UP = "UP"
@@ -32,15 +52,25 @@ class User(UserBase):
 
     model_config = {"from_attributes": True}
 
+class AuthPrincipal(User):
+    # What an authenticated request knows about its user without a DB round trip
+    tokenVersion: int = 0
+
 class LoginRequest(BaseModel):
     email: EmailStr
     password: str
 
 class SignupRequest(BaseModel):
-    username: str
+    # Copied into live games and leaderboard rows, so keep it short
+    username: str = Field(max_length=USERNAME_MAX_LENGTH)
     email: EmailStr
     password: str
 
+class AvailabilityResponse(BaseModel):
+    # Only the fields that were asked about are set
+    usernameAvailable: Optional[bool] = None
+    emailAvailable: Optional[bool] = None
+
 class AuthResponse(BaseModel):
     user: User
     token: str
@@ -57,13 +87,24 @@ class LeaderboardEntry(BaseModel):
     model_config = {"from_attributes": True}
 
 class SubmitScoreRequest(BaseModel):
-    score: int
+    score: int = Field(ge=0, le=MAX_SCORE, multiple_of=POINTS_PER_FOOD)
     mode: GameMode
 
 class SubmitScoreResponse(BaseModel):
     success: bool
     rank: int
 
+class SubmitReplayResponse(SubmitScoreResponse):
+    score: int
+    entryId: str
+
+class SubmitScoreBatchRequest(BaseModel):
+    scores: List[SubmitScoreRequest] = Field(min_length=1)
+
+class SubmitScoreBatchResponse(BaseModel):
+    success: bool
+    ranks: List[int]
+
 class LiveGame(BaseModel):
     id: str
     playerId: str
@@ -75,6 +116,26 @@ class LiveGame(BaseModel):
     food: Point
     direction: Direction
 
+class SnakeEncoding(str, Enum):
+    json = "json"
+    # `snake` as base64 of packed little-endian u16 (x, y) pairs
+    base64 = "base64"
+    # Whole game as application/octet-stream, see app/snake_codec.py
+    binary = "binary"
+
+class LiveGameCreate(BaseModel):
+    mode: GameMode
+    snake: List[Point] = Field(max_length=MAX_SNAKE_LENGTH)
+    food: Point
+    direction: Direction
+    score: int = Field(0, ge=0, le=MAX_SCORE)
+
+class LiveGameUpdate(BaseModel):
+    score: Optional[int] = Field(None, ge=0, le=MAX_SCORE)
+    snake: Optional[List[Point]] = Field(None, max_length=MAX_SNAKE_LENGTH)
+    food: Optional[Point] = None
+    direction: Optional[Direction] = None
+
 class UserStats(BaseModel):
     highScore: int
     gamesPlayed: int
@@ -0,0 +1,145 @@
+"""
+Bloom filters over every username and email, so availability checks for names
+that were never registered are answered from memory. A filter can only say
+"maybe taken" or "definitely free"; "maybe" is settled with one indexed query.
+Built in the background after startup (checks go to the database until it is
+ready) and extended on every signup in this process. Disabled with several
+workers, where a signup on one worker never reaches the others' filters.
+"""
+import hashlib
+import math
+from threading import Lock
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import settings
+from .db_models import DBUser
+
+FIELDS = ("username", "email")
+
+
+class BloomFilter:
+    """Fixed-size bit array with k probes per item from one blake2b digest (double hashing)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        # Optimal size and probe count for `capacity` items at `error_rate`
+        self.size = max(64, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.probes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> list:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        size = self.size
+        # Reduced first so the probe arithmetic stays in small ints; the step is never 0
+        position = int.from_bytes(digest[:8], "little") % size
+        step = int.from_bytes(digest[8:], "little") % (size - 1) + 1
+        positions = [position]
+        for _ in range(self.probes - 1):
+            position += step
+            if position >= size:
+                position -= size
+            positions.append(position)
+        return positions
+
+    def add(self, item: str):
+        bits = self.bits
+        for position in self._positions(item):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        for position in self._positions(item):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def expected_error_rate(self) -> float:
+        """False positive rate at the current fill; rises past error_rate once count > capacity."""
+        return (1 - math.exp(-self.probes * self.count / self.size)) ** self.probes
+
+
+class NameFilter:
+    """
+    Usernames and emails seen by this process. Only trustworthy when this
+    process takes every signup; when disabled, every check goes to the database.
+    """
+
+    def __init__(self, min_capacity: int = 100_000, error_rate: float = 0.01, enabled: bool = True):
+        self.enabled = enabled
+        self.min_capacity = min_capacity
+        self.error_rate = error_rate
+        self._lock = Lock()
+        self.filters = {field: BloomFilter(min_capacity, error_rate) for field in FIELDS}
+        self.ready = False
+        # Signups seen while warm() scans the table, replayed into the new filters
+        self._pending = None
+        self.filtered = 0
+        self.db_checks = 0
+
+    async def warm(self, db: AsyncSession, batch_size: int = 2000):
+        """
+        Rebuild from the users table, sized for twice the current user count.
+        Hashing is a few microseconds per name, so rows come in small partitions
+        and requests are served between them.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._pending = []
+        try:
+            users = await db.scalar(select(func.count()).select_from(DBUser))
+            capacity = max(self.min_capacity, 2 * users)
+            filters = {field: BloomFilter(capacity, self.error_rate) for field in FIELDS}
+            result = await db.stream(select(DBUser.username, DBUser.email).execution_options(yield_per=batch_size))
+            async for rows in result.partitions():
+                for username, email in rows:
+                    filters["username"].add(username)
+                    filters["email"].add(email)
+            with self._lock:
+                for username, email in self._pending:
+                    filters["username"].add(username)
+                    filters["email"].add(email)
+                self.filters = filters
+                self.ready = True
+        finally:
+            with self._lock:
+                self._pending = None
+
+    def add(self, username: str, email: str):
+        with self._lock:
+            self.filters["username"].add(username)
+            self.filters["email"].add(email)
+            if self._pending is not None:
+                self._pending.append((username, email))
+
+    def maybe_taken(self, field: str, value: str) -> bool:
+        """False only if `value` was never registered as `field` ("username" or "email")."""
+        if not (self.enabled and self.ready):
+            return True
+        with self._lock:
+            taken = value in self.filters[field]
+        if taken:
+            self.db_checks += 1
+        else:
+            self.filtered += 1
+        return taken
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "users": self.filters["username"].count,
+            "capacity": self.filters["username"].capacity,
+            "bytes": sum(len(f.bits) for f in self.filters.values()),
+            "expectedErrorRate": round(max(f.expected_error_rate() for f in self.filters.values()), 6),
+            "filtered": self.filtered,
+            "dbChecks": self.db_checks,
+        }
+
+
+name_filter = NameFilter(settings.NAME_FILTER_MIN_CAPACITY, settings.NAME_FILTER_ERROR_RATE, settings.NAME_FILTER_ENABLED)
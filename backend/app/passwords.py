@@ -0,0 +1,87 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from .database import settings
+
+# Stored as scrypt$<log2 n>$<r>$<p>$<salt>$<hash>, salt and hash base64 without padding
+SCHEME = "scrypt"
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.b64encode(raw).decode().rstrip("=")
+
+def _b64decode(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+def _scrypt(password: str, salt: bytes, log_n: int, r: int, p: int) -> bytes:
+    n = 1 << log_n
+    # OpenSSL refuses anything above maxmem; 128 * n * r is what scrypt needs, plus slack
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, dklen=HASH_BYTES, maxmem=256 * n * r + 1024 * 1024)
+
+
+class PasswordHasher:
+    """
+    scrypt password hashing run on a bounded thread pool, so a login never
+    blocks the event loop (hashlib releases the GIL while it works). Hashes
+    record their own cost; verify() reports when a hash should be upgraded
+    to the current cost, including legacy plaintext rows.
+    """
+
+    def __init__(self, log_n: int = 14, r: int = 8, p: int = 1, workers: int = 4):
+        self.log_n = log_n
+        self.r = r
+        self.p = p
+        # workers=0 hashes inline on the event loop (only for benchmarks)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash") if workers > 0 else None
+        self._dummy: Optional[str] = None
+
+    def hash_sync(self, password: str) -> str:
+        salt = os.urandom(SALT_BYTES)
+        digest = _scrypt(password, salt, self.log_n, self.r, self.p)
+        return f"{SCHEME}${self.log_n}${self.r}${self.p}${_b64encode(salt)}${_b64encode(digest)}"
+
+    def verify_sync(self, password: str, stored: str) -> Tuple[bool, bool]:
+        """Return (matches, needs_rehash)."""
+        parts = stored.split("$")
+        if len(parts) != 6 or parts[0] != SCHEME:
+            # Legacy plaintext row: compare in constant time, then upgrade it
+            return hmac.compare_digest(password.encode(), stored.encode()), True
+        try:
+            log_n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            salt, expected = _b64decode(parts[4]), _b64decode(parts[5])
+        except ValueError:
+            return False, False
+        matches = hmac.compare_digest(_scrypt(password, salt, log_n, r, p), expected)
+        return matches, (log_n, r, p) != (self.log_n, self.r, self.p)
+
+    async def _run(self, fn, *args):
+        if self._pool is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.hash_sync, password)
+
+    async def verify(self, password: str, stored: str) -> Tuple[bool, bool]:
+        return await self._run(self.verify_sync, password, stored)
+
+    async def verify_missing_user(self, password: str):
+        """Spend the same time as a real check so unknown emails can't be told apart by latency."""
+        if self._dummy is None:
+            self._dummy = await self.hash("not-a-real-password")
+        await self.verify(password, self._dummy)
+
+
+password_hasher = PasswordHasher(
+    log_n=settings.PASSWORD_SCRYPT_LOG_N,
+    r=settings.PASSWORD_SCRYPT_R,
+    p=settings.PASSWORD_SCRYPT_P,
+    workers=settings.PASSWORD_HASH_WORKERS,
+)
@@ -0,0 +1,177 @@
+from threading import Lock
+from typing import Dict, Iterable, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import MAX_SCORE, GameMode
+from .db_models import DBUser, DBLeaderboard
+
+
+class FenwickTree:
+    """Binary indexed tree of counts per integer score bucket."""
+
+    def __init__(self, size: int = 1024):
+        self.size = 1
+        while self.size < size:
+            self.size *= 2
+        self.tree = [0] * (self.size + 1)
+        self.total = 0
+
+    def _grow(self, index: int):
+        # With a power-of-two size, every new node below the new root covers
+        # only empty buckets, so doubling is just zero padding plus the root.
+        while index >= self.size:
+            self.tree.extend([0] * self.size)
+            self.size *= 2
+            self.tree[self.size] = self.total
+
+    def add(self, index: int, delta: int = 1):
+        self._grow(index)
+        self.total += delta
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index: int) -> int:
+        """Sum of counts for buckets 0..index inclusive."""
+        if index < 0:
+            return 0
+        i = min(index + 1, self.size)
+        result = 0
+        while i > 0:
+            result += self.tree[i]
+            i -= i & -i
+        return result
+
+    @classmethod
+    def from_counts(cls, counts: Iterable[Tuple[int, int]]) -> "FenwickTree":
+        counts = list(counts)
+        tree = cls(max((score for score, _ in counts), default=0) + 1)
+        for score, count in counts:
+            tree.tree[score + 1] += count
+            tree.total += count
+        # O(n) build: push each node's partial sum to its parent
+        for i in range(1, tree.size + 1):
+            parent = i + (i & -i)
+            if parent <= tree.size:
+                tree.tree[parent] += tree.tree[i]
+        return tree
+
+
+class ScoreRankIndex:
+    """
+    Order statistics over integer scores in 0..max_score. The tree is dense, so
+    scores outside that range (rows written before the API bounded them) are
+    clamped to it rather than growing the tree to their size.
+    """
+
+    def __init__(self, counts: Iterable[Tuple[int, int]] = (), max_score: int = MAX_SCORE):
+        self.max_score = max_score
+        self._tree = FenwickTree.from_counts((self._bucket(score), count) for score, count in counts)
+
+    def __len__(self) -> int:
+        return self._tree.total
+
+    def _bucket(self, score: int) -> int:
+        return min(max(score, 0), self.max_score)
+
+    def add(self, score: int):
+        self._tree.add(self._bucket(score), 1)
+
+    def remove(self, score: int):
+        self._tree.add(self._bucket(score), -1)
+
+    def count_above(self, score: int) -> int:
+        return self._tree.total - self._tree.prefix(score)
+
+    def rank(self, score: int) -> int:
+        return self.count_above(score) + 1
+
+
+async def db_score_rank(db: AsyncSession, mode: GameMode, score: int) -> int:
+    """Rank of `score` within `mode`, counted in the database."""
+    return await db.scalar(
+        select(func.count()).select_from(DBLeaderboard).where(
+            DBLeaderboard.mode == mode,
+            DBLeaderboard.score > score
+        )
+    ) + 1
+
+
+async def db_user_rank(db: AsyncSession, high_score: int) -> int:
+    """Global rank of a user high score, counted in the database."""
+    return await db.scalar(
+        select(func.count()).select_from(DBUser).where(DBUser.highScore > high_score)
+    ) + 1
+
+
+class RankIndex:
+    """
+    Per-mode rank of every submitted score plus the global rank of user high scores.
+    Warmed from the database at startup and kept up to date by the routers.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.modes: Dict[GameMode, ScoreRankIndex] = {mode: ScoreRankIndex() for mode in GameMode}
+        self.high_scores = ScoreRankIndex()
+
+    async def warm(self, db: AsyncSession):
+        rows = (await db.execute(
+            select(DBLeaderboard.mode, DBLeaderboard.score, func.count())
+            .group_by(DBLeaderboard.mode, DBLeaderboard.score)
+        )).all()
+        high_scores = (await db.execute(
+            select(DBUser.highScore, func.count()).group_by(DBUser.highScore)
+        )).all()
+
+        modes = {}
+        for mode in GameMode:
+            modes[mode] = ScoreRankIndex((score, count) for m, score, count in rows if m == mode.value)
+        with self._lock:
+            self.modes = modes
+            self.high_scores = ScoreRankIndex((score or 0, count) for score, count in high_scores)
+
+    def record_score(self, mode: GameMode, score: int) -> int:
+        """Add a committed submission and return its rank within the mode."""
+        with self._lock:
+            index = self.modes[GameMode(mode)]
+            index.add(score)
+            return index.rank(score)
+
+    def score_rank(self, mode: GameMode, score: int) -> int:
+        with self._lock:
+            return self.modes[GameMode(mode)].rank(score)
+
+    def add_user(self, high_score: int = 0):
+        with self._lock:
+            self.high_scores.add(high_score)
+
+    def update_high_score(self, old: int, new: int):
+        if old == new:
+            return
+        with self._lock:
+            self.high_scores.remove(old)
+            self.high_scores.add(new)
+
+    def user_rank(self, high_score: int) -> int:
+        with self._lock:
+            return self.high_scores.rank(high_score)
+
+    async def check_score_rank(self, db: AsyncSession, mode: GameMode, score: int, rank: int) -> int:
+        """Compare an index rank with the database and rebuild the index on drift."""
+        db_rank = await db_score_rank(db, mode, score)
+        return await self._reconcile(db, f"{GameMode(mode).value} score {score}", rank, db_rank)
+
+    async def check_user_rank(self, db: AsyncSession, high_score: int, rank: int) -> int:
+        db_rank = await db_user_rank(db, high_score)
+        return await self._reconcile(db, f"high score {high_score}", rank, db_rank)
+
+    async def _reconcile(self, db: AsyncSession, what: str, rank: int, db_rank: int) -> int:
+        if db_rank != rank:
+            print(f"Rank index drift for {what}: index={rank} db={db_rank}. Rebuilding.")
+            await self.warm(db)
+        return db_rank
+
+rank_index = RankIndex()
@@ -0,0 +1,23 @@
+import argparse
+import time
+from app.database import engine
+from app.db_models import DBUserBestScore, DBWindowBestScore
+from app.best_scores import rebuild_best_scores
+from app.windowed_scores import rebuild_window_scores
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the best-score tables (all-time and day/week/month) from leaderboard history.")
+    parser.parse_args()
+
+    print("Rebuilding user best scores...")
+    started = time.perf_counter()
+    DBUserBestScore.__table__.create(bind=engine, checkfirst=True)
+    DBWindowBestScore.__table__.create(bind=engine, checkfirst=True)
+    # One transaction: readers see either the old projections or the new ones
+    with engine.begin() as conn:
+        count = rebuild_best_scores(conn)
+        windowed = rebuild_window_scores(conn)
+    print(f"Rebuilt {count} best scores and {windowed} windowed best scores in {time.perf_counter() - started:.2f}s.")
+
+if __name__ == "__main__":
+    main()
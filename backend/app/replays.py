@@ -0,0 +1,48 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from .database import settings
+from .engine import Replay, verify_replay
+
+
+class ReplayVerifier:
+    """
+    Re-simulates uploaded replays on a process pool. Simulation is pure Python
+    and holds the GIL for its whole run, so a thread pool would still stall
+    the event loop; separate processes keep request handling responsive and
+    use every core. The pool starts on first use and is rebuilt if a worker dies.
+    """
+
+    def __init__(self, workers: int = 2, max_ticks: int = 0):
+        # workers=0 verifies inline on the event loop (tests and benchmarks)
+        self.workers = workers
+        self.max_ticks = max_ticks
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs an event loop and DB pools is unsafe
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def verify(self, data: bytes) -> Replay:
+        """Return the decoded replay, or raise ReplayError if it does not check out."""
+        if self.workers <= 0:
+            return verify_replay(data, self.max_ticks)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_pool(), verify_replay, data, self.max_ticks)
+        except BrokenProcessPool:
+            # A worker crashed (e.g. killed for memory); start fresh for the next replay
+            self.shutdown()
+            raise
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+replay_verifier = ReplayVerifier(workers=settings.REPLAY_VERIFY_WORKERS, max_ticks=settings.REPLAY_MAX_TICKS)
@@ -0,0 +1,211 @@
+import hashlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from time import monotonic
+from typing import Callable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from .cache import TTLCache
+from .database import settings
+from .models import GameMode
+
+
+class CacheBackend(ABC):
+    """Storage for cached response bodies. Keys are strings, values are bytes."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float):
+        ...
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        """Atomically increment a counter that must not be evicted while entries depend on it."""
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Per-process LRU. Generation counters live outside the LRU, so a counter in use
+    is never reset. A counter unused for two entry lifetimes is dropped: by then
+    every entry keyed by one of its generations has expired, so starting it over
+    can't serve stale data.
+    """
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 30.0, clock: Callable[[], float] = monotonic):
+        self.entries: TTLCache[bytes] = TTLCache(maxsize=maxsize, ttl=ttl, clock=clock)
+        self.counter_ttl = 2 * ttl
+        self._clock = clock
+        # key -> (value, last used), least recently used first
+        self.counters: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+
+    def _touch_counter(self, key: str, value: int) -> int:
+        now = self._clock()
+        self.counters[key] = (value, now)
+        self.counters.move_to_end(key)
+        while self.counters:
+            oldest = next(iter(self.counters.values()))
+            if oldest[1] > now - self.counter_ttl:
+                break
+            self.counters.popitem(last=False)
+        return value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if key in self.counters:
+            return str(self._touch_counter(key, self.counters[key][0])).encode()
+        return self.entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self.entries.set(key, value)
+
+    async def incr(self, key: str) -> int:
+        value = self.counters[key][0] + 1 if key in self.counters else 1
+        return self._touch_counter(key, value)
+
+    async def clear(self):
+        self.entries.clear()
+        self.counters.clear()
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Shared cache on a Redis-compatible server, so every worker sees the same
+    entries and invalidations. `client` is anything with redis.asyncio's
+    get/set/incr methods.
+    """
+
+    def __init__(self, client, prefix: str = "snake:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCacheBackend":
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis needs the 'redis' package installed")
+        return cls(redis.from_url(url))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.client.set(self.prefix + key, value, ex=max(int(ttl), 1))
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(self.prefix + key)
+
+    async def clear(self):
+        # Shared with other workers; entries age out through their TTL
+        pass
+
+
+class ResponseCache:
+    """
+    Caches serialized responses per namespace. Invalidating a namespace bumps its
+    generation, which is part of every key, so stale entries are never looked up
+    again. Reads must take their key before querying the database; a write that
+    lands in between then only orphans the entry instead of serving stale data.
+    Backend errors are treated as misses so the cache can never fail a request.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: float = 30.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def lookup(self, namespace: str, *parts) -> Tuple[Optional[bytes], Optional[str]]:
+        """Return (cached value or None, key to store a fresh value under)."""
+        if self.backend is None:
+            return None, None
+        try:
+            generation = await self.backend.get(f"gen:{namespace}")
+            key = ":".join([namespace, (generation or b"0").decode(), *map(str, parts)])
+            value = await self.backend.get(key)
+        except Exception as e:
+            self._error("lookup", e)
+            return None, None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value, key
+
+    async def store(self, key: Optional[str], value: bytes):
+        if self.backend is None or key is None:
+            return
+        try:
+            await self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            self._error("store", e)
+
+    async def invalidate(self, *namespaces: str):
+        if self.backend is None:
+            return
+        for namespace in namespaces:
+            try:
+                await self.backend.incr(f"gen:{namespace}")
+            except Exception as e:
+                self._error("invalidate", e)
+
+    async def clear(self):
+        if self.backend is not None:
+            await self.backend.clear()
+
+    def _error(self, action: str, error: Exception):
+        self.errors += 1
+        print(f"Response cache {action} failed: {error}")
+
+    def stats(self) -> dict:
+        stats = {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "notModified": self.not_modified,
+            "errors": self.errors,
+        }
+        if isinstance(self.backend, MemoryCacheBackend):
+            stats["size"] = len(self.backend.entries)
+        return stats
+
+    def json_response(self, request: Request, body: bytes, headers: Optional[dict] = None) -> Response:
+        """Send a JSON body with an ETag, or a bare 304 if the client already has it."""
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        headers = {**(headers or {}), "ETag": etag}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+def leaderboard_namespace(mode: Optional[GameMode] = None) -> str:
+    return f"leaderboard:{GameMode(mode).value if mode else 'all'}"
+
+def stats_namespace(user_id: str) -> str:
+    return f"stats:{user_id}"
+
+
+def make_cache_backend() -> Optional[CacheBackend]:
+    if settings.RESPONSE_CACHE_BACKEND == "none":
+        return None
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisCacheBackend.from_url(settings.REDIS_URL)
+    return MemoryCacheBackend(maxsize=settings.RESPONSE_CACHE_SIZE, ttl=settings.RESPONSE_CACHE_TTL_SECONDS)
+
+
+response_cache = ResponseCache(make_cache_backend(), ttl=settings.RESPONSE_CACHE_TTL_SECONDS)
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from typing import Annotated
+from typing import Annotated, Optional
 import jwt
 from datetime import datetime, timedelta, timezone
-from sqlalchemy.orm import Session
-from app.models import User, LoginRequest, SignupRequest, AuthResponse, Error, UserCreate
-from app.database import get_db
-from app.db_models import DBUser
+from pydantic import EmailStr
+from sqlalchemy import or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import User, LoginRequest, SignupRequest, AuthResponse, AvailabilityResponse, Error, AuthPrincipal
+from app.database import get_db, settings
+from app.db_models import DBUser, generate_uuid
+from app.rank_index import rank_index
+from app.passwords import password_hasher
+from app.cache import TTLCache
+from app.response_cache import response_cache, stats_namespace
+from app.admission import admission, admit_by_ip, client_ip
+from app.name_filter import name_filter
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -27,7 +36,20 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
+def create_user_token(user: DBUser) -> str:
+    # Token carries the user id and version so requests can be authenticated without a DB lookup
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    return create_access_token(
+        data={"sub": user.id, "ver": user.tokenVersion or 0}, expires_delta=access_token_expires
+    )
+
+# Authenticated principals by user id, dropped whenever the user's row changes
+principal_cache: TTLCache[AuthPrincipal] = TTLCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+
+def invalidate_user(user_id: str):
+    principal_cache.pop(user_id)
+
+async def get_current_principal(token: Annotated[str, Depends(oauth2_scheme)], db: AsyncSession = Depends(get_db)) -> AuthPrincipal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -35,62 +57,130 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Se
     )
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+        user_id = payload.get("sub")
+        version = payload.get("ver")
+        if user_id is None or not isinstance(version, int):
             raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
-    
-    user = db.query(DBUser).filter(DBUser.email == email).first()
-    if user is None:
+
+    principal = principal_cache.get(user_id)
+    if principal is None or principal.tokenVersion != version:
+        user = await db.get(DBUser, user_id)
+        if user is None:
+            raise credentials_exception
+        principal = AuthPrincipal.model_validate(user)
+        principal_cache.set(user_id, principal)
+    if principal.tokenVersion != version:
+        # Token was issued before the user's tokens were revoked
         raise credentials_exception
-    return user
+    return principal
 
-@router.post("/login", response_model=AuthResponse, responses={401: {"model": Error}})
-async def login(request: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(DBUser).filter(DBUser.email == request.email).first()
-    if not user or user.password != request.password:
+@router.post(
+    "/login",
+    response_model=AuthResponse,
+    responses={401: {"model": Error}, 429: {"model": Error}, 503: {"model": Error}},
+    dependencies=[Depends(admit_by_ip)],
+)
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
+    user = (await db.execute(select(DBUser).where(DBUser.email == request.email))).scalars().first()
+    if not user:
+        await password_hasher.verify_missing_user(request.password)
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    matches, needs_rehash = await password_hasher.verify(request.password, user.password)
+    if not matches:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if needs_rehash:
+        # Plaintext or older-cost hash: store it at the current cost now that we know the password
+        user.password = await password_hasher.hash(request.password)
+        await db.commit()
     
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
-    return AuthResponse(user=user, token=access_token)
+    return AuthResponse(user=user, token=create_user_token(user))
 
-@router.post("/signup", response_model=AuthResponse, responses={409: {"model": Error}}, status_code=201)
-async def signup(request: SignupRequest, db: Session = Depends(get_db)):
-    if db.query(DBUser).filter(DBUser.email == request.email).first():
-        raise HTTPException(status_code=409, detail="Email already registered")
+@router.post(
+    "/signup",
+    response_model=AuthResponse,
+    responses={409: {"model": Error}, 429: {"model": Error}, 503: {"model": Error}},
+    status_code=201,
+    dependencies=[Depends(admit_by_ip)],
+)
+async def signup(request: SignupRequest, db: AsyncSession = Depends(get_db)):
+    # One INSERT with no lookups first: the unique indexes on email and username
+    # decide, and ON CONFLICT DO NOTHING reports a clash as "no row" instead of
+    # an IntegrityError that would roll back the session's transaction
+    dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    users = DBUser.__table__
+    new_user = (await db.execute(
+        dialect_insert(users).values(
+            id=generate_uuid(),
+            username=request.username,
+            email=request.email,
+            password=await password_hasher.hash(request.password),
+            highScore=0,
+            gamesPlayed=0,
+            createdAt=datetime.now(),
+            tokenVersion=0,
+        ).on_conflict_do_nothing().returning(*users.c)
+    )).first()
+    if new_user is None:
+        name_filter.add(request.username, request.email)
+        raise HTTPException(status_code=409, detail=await _conflict_detail(db, request))
+    await db.commit()
+    name_filter.add(new_user.username, new_user.email)
+    rank_index.add_user(new_user.highScore)
+    # Ranks are not cached, so a new user only touches their own stats entry
+    await response_cache.invalidate(stats_namespace(new_user.id))
     
-    if db.query(DBUser).filter(DBUser.username == request.username).first():
-        raise HTTPException(status_code=409, detail="Username already taken")
-    
-    new_user = DBUser(
-        username=request.username,
-        email=request.email,
-        password=request.password,
-        highScore=0,
-        gamesPlayed=0,
-        createdAt=datetime.now()
+    return AuthResponse(user=User.model_validate(new_user), token=create_user_token(new_user))
+
+async def _conflict_detail(db: AsyncSession, request: SignupRequest) -> str:
+    # Only on the conflict path: find out which unique index the new row hit
+    if (await db.execute(select(DBUser.id).where(DBUser.email == request.email))).first():
+        return "Email already registered"
+    return "Username already taken"
+
+@router.get("/availability", response_model=AvailabilityResponse, responses={429: {"model": Error}})
+async def check_availability(
+    request: Request,
+    username: Optional[str] = None,
+    email: Optional[EmailStr] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Whether a username and/or email could still be registered, for live checks
+    while the signup form is filled in. Names the in-memory filters have never
+    seen are answered without a query.
+    """
+    if username is None and email is None:
+        raise HTTPException(status_code=400, detail="Pass username and/or email")
+    await admission.check_rate(
+        "availability", client_ip(request),
+        settings.RATE_LIMIT_AVAILABILITY_PER_SECOND, settings.RATE_LIMIT_AVAILABILITY_BURST,
     )
-    
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": new_user.email}, expires_delta=access_token_expires
+    response = AvailabilityResponse(
+        usernameAvailable=None if username is None else True,
+        emailAvailable=None if email is None else True,
     )
-    return AuthResponse(user=new_user, token=access_token)
+    # Filter hits may be false positives, so they are confirmed in one query for both fields
+    conditions = []
+    if username is not None and name_filter.maybe_taken("username", username):
+        conditions.append(DBUser.username == username)
+    if email is not None and name_filter.maybe_taken("email", email):
+        conditions.append(DBUser.email == email)
+    if conditions:
+        for taken_username, taken_email in (await db.execute(select(DBUser.username, DBUser.email).where(or_(*conditions)))).all():
+            if taken_username == username:
+                response.usernameAvailable = False
+            if taken_email == email:
+                response.emailAvailable = False
+    return response
 
 @router.post("/logout")
-async def logout(current_user: Annotated[DBUser, Depends(get_current_user)]):
+async def logout(current_user: Annotated[AuthPrincipal, Depends(get_current_principal)]):
     # In stateless JWT, we can't really logout without a blacklist.
     # For now, we'll just return success as the frontend will discard the token.
     return {"message": "Successful logout"}
 
 @router.get("/me", response_model=User)
-async def get_me(current_user: Annotated[DBUser, Depends(get_current_user)]):
+async def get_me(current_user: Annotated[AuthPrincipal, Depends(get_current_principal)]):
     return current_user
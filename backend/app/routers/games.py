@@ -1,17 +1,137 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-from app.models import LiveGame
-from app.database import live_games_db
+from fastapi import APIRouter, Depends, HTTPException, Response, WebSocket, WebSocketDisconnect
+from typing import List, Annotated, Optional
+from pydantic import TypeAdapter
+from datetime import datetime
+import asyncio
+import uuid
+from fastapi.responses import JSONResponse
+from app.models import LiveGame, LiveGameCreate, LiveGameUpdate, GameMode, AuthPrincipal, SnakeEncoding
+from app.database import live_games_db, settings
+from app.fast_json import FastJSONResponse
+from app.routers.auth import get_current_principal
+from app.spectators import spectator_hub, Subscriber
+from app.snake_codec import encode_game, encode_games, game_to_base64_json, games_to_base64_json
 
 router = APIRouter(prefix="/games", tags=["LiveGames"])
 
-@router.get("", response_model=List[LiveGame])
-async def get_live_games():
-    return live_games_db
+live_games_adapter = TypeAdapter(List[LiveGame])
 
-@router.get("/{id}", response_model=LiveGame)
-async def get_game_by_id(id: str):
-    game = next((g for g in live_games_db if g.id == id), None)
+BINARY_MEDIA_TYPE = "application/octet-stream"
+ENCODED_RESPONSES = {
+    200: {"content": {BINARY_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}}},
+    406: {"description": "Game state has coordinates that cannot be packed (listings leave such games out)"},
+}
+
+def _encoded(payload, encoding: SnakeEncoding):
+    """Opt-in wire formats and the FAST_JSON path; None means FastAPI serializes the response_model."""
+    try:
+        if encoding == SnakeEncoding.binary:
+            if isinstance(payload, list):
+                return Response(encode_games(payload), media_type=BINARY_MEDIA_TYPE)
+            return Response(encode_game(payload), media_type=BINARY_MEDIA_TYPE)
+        if encoding == SnakeEncoding.base64:
+            if isinstance(payload, list):
+                return JSONResponse(games_to_base64_json(payload))
+            return JSONResponse(game_to_base64_json(payload))
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    if settings.FAST_JSON:
+        # Registry games are already validated; serialize once instead of
+        # re-validating them against response_model
+        if isinstance(payload, list):
+            return FastJSONResponse(live_games_adapter.dump_json(payload))
+        return FastJSONResponse(payload.model_dump_json().encode())
+    return None
+
+@router.get("", response_model=List[LiveGame], responses=ENCODED_RESPONSES)
+async def get_live_games(
+    mode: Optional[GameMode] = None,
+    playerId: Optional[str] = None,
+    encoding: SnakeEncoding = SnakeEncoding.json,
+):
+    games = live_games_db.list(mode=mode, player_id=playerId)
+    return _encoded(games, encoding) or games
+
+@router.post("", response_model=LiveGame, status_code=201)
+async def create_game(
+    request: LiveGameCreate,
+    current_user: Annotated[AuthPrincipal, Depends(get_current_principal)],
+):
+    game = LiveGame(
+        id=str(uuid.uuid4()),
+        playerId=current_user.id,
+        playerName=current_user.username,
+        startedAt=datetime.now(),
+        **request.model_dump(),
+    )
+    return live_games_db.add(game)
+
+@router.get("/{id}", response_model=LiveGame, responses=ENCODED_RESPONSES)
+async def get_game_by_id(id: str, encoding: SnakeEncoding = SnakeEncoding.json):
+    game = live_games_db.get(id)
+    if game is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return _encoded(game, encoding) or game
+
+def _get_own_game(id: str, current_user: AuthPrincipal) -> LiveGame:
+    game = live_games_db.get(id)
+    if game is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    if game.playerId != current_user.id:
+        raise HTTPException(status_code=403, detail="Not your game")
+    return game
+
+@router.put("/{id}", response_model=LiveGame)
+async def update_game(
+    id: str,
+    request: LiveGameUpdate,
+    current_user: Annotated[AuthPrincipal, Depends(get_current_principal)],
+):
+    _get_own_game(id, current_user)
+    # Keep the validated Point/Direction objects rather than dumping to dicts
+    changes = {field: getattr(request, field) for field in request.model_fields_set}
+    game = live_games_db.update(id, **changes)
     if game is None:
         raise HTTPException(status_code=404, detail="Game not found")
     return game
+
+@router.delete("/{id}", status_code=204)
+async def end_game(
+    id: str,
+    current_user: Annotated[AuthPrincipal, Depends(get_current_principal)],
+):
+    _get_own_game(id, current_user)
+    live_games_db.remove(id)
+    return Response(status_code=204)
+
+async def _watch_for_disconnect(websocket: WebSocket, subscriber: Subscriber):
+    # Spectators only listen; anything they send is ignored until they leave
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscriber.abort()
+
+@router.websocket("/{id}/ws")
+async def spectate_game(websocket: WebSocket, id: str):
+    await websocket.accept()
+    game = live_games_db.get(id)
+    if game is None:
+        await websocket.close(code=4404, reason="Game not found")
+        return
+
+    # First message is a full snapshot, then compact per-tick deltas
+    subscriber = spectator_hub.subscribe(game)
+    watcher = asyncio.create_task(_watch_for_disconnect(websocket, subscriber))
+    try:
+        while (message := await subscriber.next_message()) is not None:
+            await websocket.send_text(message)
+        if not watcher.done():
+            await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        watcher.cancel()
+        spectator_hub.unsubscribe(subscriber)
@@ -0,0 +1,74 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from app.database import engine, async_engine, pool_status, settings
+from app.metrics import render_startup, request_metrics, startup_metrics
+from app.response_cache import response_cache
+from app.routers.auth import principal_cache
+from app.admission import admission, client_ip
+from app.name_filter import name_filter
+
+LOOPBACK = {"127.0.0.1", "::1"}
+
+async def require_internal_access(request: Request, x_internal_token: Optional[str] = Header(None)):
+    """Operators only: the shared INTERNAL_TOKEN if one is set, otherwise a client on this host."""
+    if settings.INTERNAL_TOKEN:
+        if x_internal_token is None or not hmac.compare_digest(x_internal_token.encode(), settings.INTERNAL_TOKEN.encode()):
+            raise HTTPException(status_code=403, detail="Forbidden")
+    elif client_ip(request) not in LOOPBACK or "x-forwarded-for" in request.headers:
+        # A forwarded request came through a proxy, whatever address it claims
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+# Operational endpoints, kept out of the public OpenAPI schema
+router = APIRouter(
+    prefix="/_internal", tags=["Internal"], include_in_schema=False, dependencies=[Depends(require_internal_access)],
+)
+
+@router.get("/db")
+async def get_db_status():
+    return {
+        "dialect": async_engine.dialect.name,
+        "driver": async_engine.dialect.driver,
+        "pools": {
+            "async": pool_status(async_engine.sync_engine),
+            "sync": pool_status(engine),
+        },
+    }
+
+@router.get("/cache")
+async def get_cache_stats():
+    return {
+        "responses": response_cache.stats(),
+        "principals": principal_cache.stats(),
+        "names": name_filter.stats(),
+    }
+
+@router.get("/admission")
+async def get_admission_stats():
+    return admission.stats()
+
+@router.get("/startup")
+async def get_startup_stats():
+    return startup_metrics.as_dict()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    # Prometheus text exposition format
+    cache = response_cache.stats()
+    lines = [
+        "# HELP response_cache_requests_total Response cache lookups by result",
+        "# TYPE response_cache_requests_total counter",
+        f'response_cache_requests_total{{result="hit"}} {cache["hits"]}',
+        f'response_cache_requests_total{{result="miss"}} {cache["misses"]}',
+        f'response_cache_requests_total{{result="not_modified"}} {cache["notModified"]}',
+        "# HELP admission_rejected_total Requests turned away by admission control",
+        "# TYPE admission_rejected_total counter",
+        f'admission_rejected_total{{reason="rate_limited"}} {admission.limited}',
+        f'admission_rejected_total{{reason="shed"}} {admission.shed}',
+        "# HELP admission_in_flight Admitted requests in progress",
+        "# TYPE admission_in_flight gauge",
+        f"admission_in_flight {admission.in_flight}",
+    ]
+    body = request_metrics.render() + render_startup(startup_metrics) + "\n".join(lines) + "\n"
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
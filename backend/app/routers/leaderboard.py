@@ -1,51 +1,293 @@
-from fastapi import APIRouter, Depends
-from typing import List, Annotated, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Annotated, Optional
 from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.models import LeaderboardEntry, SubmitScoreRequest, SubmitScoreResponse, GameMode, User
-from app.database import get_db
-from app.db_models import DBLeaderboard, DBUser
-from app.routers.auth import get_current_user
+import base64
+import json
+from pydantic import TypeAdapter
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from concurrent.futures.process import BrokenProcessPool
+from app.models import (
+    LeaderboardEntry, SubmitScoreRequest, SubmitScoreResponse, SubmitScoreBatchRequest,
+    SubmitScoreBatchResponse, SubmitReplayResponse, ExportFormat, GameMode, LeaderboardWindow, AuthPrincipal, Error,
+)
+from app.database import get_db, settings
+from app.db_models import DBLeaderboard, DBReplay, DBUserBestScore, DBWindowBestScore
+from app.routers.auth import get_current_principal
+from app import fast_json
+from app.fast_json import FastJSONResponse
+from app.response_cache import leaderboard_namespace, response_cache
+from app.engine import ReplayError
+from app.exports import MEDIA_TYPES, accepts_gzip, export_query, export_rows, gzip_chunks, resume_point
+from app.replays import replay_verifier
+from app.admission import admission
+from app.scores import DuplicateReplayError, ScoreSubmission, score_queue, write_scores
+from app.windowed_scores import window_start
 
 router = APIRouter(prefix="/leaderboard", tags=["Leaderboard"])
 
-@router.get("", response_model=List[LeaderboardEntry])
-async def get_leaderboard(mode: Optional[GameMode] = None, db: Session = Depends(get_db)):
-    query = db.query(DBLeaderboard)
-    if mode:
-        query = query.filter(DBLeaderboard.mode == mode)
-    return query.order_by(DBLeaderboard.score.desc()).all()
+BINARY_MEDIA_TYPE = "application/octet-stream"
 
-@router.post("", response_model=SubmitScoreResponse)
+entries_adapter = TypeAdapter(List[LeaderboardEntry])
+ENTRY_FIELDS = tuple(LeaderboardEntry.model_fields)
+
+def leaderboard_order(model):
+    # Keyset ordering: best score first, earlier submissions win ties, id keeps it total.
+    return (model.score.desc(), model.date.asc(), model.id.asc())
+
+LEADERBOARD_ORDER = leaderboard_order(DBLeaderboard)
+
+def leaderboard_source(distinct: bool, window: Optional[LeaderboardWindow] = None, now: Optional[datetime] = None):
+    """Table to read and the filters that select its rows."""
+    if window:
+        # Windowed boards are always one best row per player, from the current bucket only
+        start = window_start(window, now or datetime.now())
+        return DBWindowBestScore, [DBWindowBestScore.window == window.value, DBWindowBestScore.bucket == start]
+    # distinct reads the per-user projection: one row per player per mode
+    return (DBUserBestScore if distinct else DBLeaderboard), []
+
+def entries_query(model):
+    # FAST_JSON reads exactly the LeaderboardEntry columns as tuples instead of ORM objects
+    if settings.FAST_JSON:
+        return select(*(getattr(model, field).label(field) for field in ENTRY_FIELDS))
+    return select(model)
+
+async def fetch_entries(db: AsyncSession, query) -> list:
+    result = await db.execute(query)
+    return result.all() if settings.FAST_JSON else result.scalars().all()
+
+def entries_json(rows) -> bytes:
+    if settings.FAST_JSON:
+        return fast_json.dumps([row._asdict() for row in rows])
+    return entries_adapter.dump_json(entries_adapter.validate_python(rows, from_attributes=True))
+
+def encode_cursor(entry) -> str:
+    raw = json.dumps({"s": entry.score, "d": entry.date.isoformat(), "i": entry.id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[int, datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(data["s"]), datetime.fromisoformat(data["d"]), str(data["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def after_cursor(score: int, date: datetime, entry_id: str, model=DBLeaderboard):
+    # Rows strictly after (score, date, id) in leaderboard order
+    return or_(
+        model.score < score,
+        and_(model.score == score, model.date > date),
+        and_(model.score == score, model.date == date, model.id > entry_id),
+    )
+
+@router.get("", response_model=List[LeaderboardEntry], responses={304: {"description": "Not modified"}})
+async def get_leaderboard(
+    request: Request,
+    mode: Optional[GameMode] = None,
+    limit: int = Query(settings.LEADERBOARD_DEFAULT_LIMIT, ge=1, le=settings.LEADERBOARD_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    distinct: bool = False,
+    window: Optional[LeaderboardWindow] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    now = datetime.now()
+    model, filters = leaderboard_source(distinct, window, now)
+    # The bucket start is part of the key so a rollover never serves last period's page
+    bucket = window_start(window, now).isoformat() if window else ""
+    # Cached value is "<next cursor>\n<body>"; the key is taken before querying
+    cached, cache_key = await response_cache.lookup(
+        leaderboard_namespace(mode), int(distinct), window.value if window else "", bucket, limit, cursor or "",
+    )
+    if cached is None:
+        query = entries_query(model).where(*filters)
+        if mode:
+            query = query.where(model.mode == mode)
+        if cursor:
+            query = query.where(after_cursor(*decode_cursor(cursor), model=model))
+
+        # Fetch one extra row to know whether another page exists
+        rows = await fetch_entries(db, query.order_by(*leaderboard_order(model)).limit(limit + 1))
+        next_cursor = ""
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1])
+        body = entries_json(rows)
+        cached = next_cursor.encode() + b"\n" + body
+        await response_cache.store(cache_key, cached)
+
+    next_cursor, body = cached.split(b"\n", 1)
+    headers = {"X-Next-Cursor": next_cursor.decode()} if next_cursor else {}
+    return response_cache.json_response(request, body, headers)
+
+@router.get("/top", response_model=Dict[GameMode, List[LeaderboardEntry]])
+async def get_top_scores(
+    n: int = Query(10, ge=1, le=settings.LEADERBOARD_MAX_LIMIT),
+    distinct: bool = False,
+    window: Optional[LeaderboardWindow] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    # One small index range scan per mode instead of sorting the whole table
+    model, filters = leaderboard_source(distinct, window)
+    top = {}
+    for mode in GameMode:
+        query = entries_query(model).where(*filters, model.mode == mode).order_by(*leaderboard_order(model)).limit(n)
+        top[mode] = await fetch_entries(db, query)
+    if settings.FAST_JSON:
+        return FastJSONResponse({mode.value: [row._asdict() for row in rows] for mode, rows in top.items()})
+    return top
+
+def _local_time(value: Optional[datetime]) -> Optional[datetime]:
+    # Dates are stored as naive local time; convert offsets from the query string to match
+    return value.astimezone().replace(tzinfo=None) if value and value.tzinfo else value
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {media_type: {}} for media_type in MEDIA_TYPES.values()}, 400: {"model": Error}},
+)
+async def export_leaderboard(
+    request: Request,
+    format: ExportFormat = ExportFormat.ndjson,
+    mode: Optional[GameMode] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Every leaderboard row, oldest first, streamed as NDJSON or CSV. Pass the id
+    of the last row received as `after` to resume an interrupted export.
+    """
+    resume = None
+    if after:
+        resume = await resume_point(db, after)
+        if resume is None:
+            raise HTTPException(status_code=400, detail="Unknown entry id in after")
+    query = export_query(mode, _local_time(since), _local_time(until), resume)
+    chunks = export_rows(db, query, settings.EXPORT_BATCH_SIZE, format)
+    headers = {"Vary": "Accept-Encoding"}
+    if accepts_gzip(request.headers.get("accept-encoding")):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[format], headers=headers)
+
+async def admit_score_submit(current_user: Annotated[AuthPrincipal, Depends(get_current_principal)]):
+    """Rate limit score writes per player, then take an admission slot for the request."""
+    await admission.check_rate(
+        "score", current_user.id, settings.RATE_LIMIT_SCORE_PER_SECOND, settings.RATE_LIMIT_SCORE_BURST,
+    )
+    async with admission.slot():
+        yield
+
+ADMISSION_RESPONSES = {429: {"model": Error}, 503: {"model": Error}}
+
+def _require_unverified_allowed():
+    if settings.REQUIRE_VERIFIED_SCORES:
+        raise HTTPException(status_code=403, detail="Scores must be submitted with a replay")
+
+async def _save_submission(db: AsyncSession, submission: ScoreSubmission) -> int:
+    if settings.SCORE_WRITE_BEHIND and score_queue.running:
+        # Coalesced with other submits; returns once the batch has committed
+        try:
+            return await score_queue.submit(submission)
+        except SQLAlchemyError:
+            raise HTTPException(status_code=503, detail="Could not save score, please retry")
+    return (await write_scores(db, [submission]))[0]
+
+@router.post(
+    "",
+    response_model=SubmitScoreResponse,
+    responses={403: {"model": Error}, **ADMISSION_RESPONSES},
+    dependencies=[Depends(admit_score_submit)],
+)
 async def submit_score(
     request: SubmitScoreRequest, 
-    current_user: Annotated[DBUser, Depends(get_current_user)],
-    db: Session = Depends(get_db)
+    current_user: Annotated[AuthPrincipal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_db)
 ):
-    # Update user stats
-    current_user.gamesPlayed += 1
-    if request.score > current_user.highScore:
-        current_user.highScore = request.score
-    
-    # Add new entry
-    new_entry = DBLeaderboard(
+    _require_unverified_allowed()
+    submission = ScoreSubmission(
         userId=current_user.id,
         username=current_user.username,
         score=request.score,
         mode=request.mode,
-        date=datetime.now()
     )
-    db.add(new_entry)
-    db.add(current_user) # Ensure user is updated
-    db.commit()
-    db.refresh(new_entry)
-    
-    # Calculate rank for this score in this mode
-    # A simple way is to count how many scores in this mode are higher than this one
-    rank = db.query(DBLeaderboard).filter(
-        DBLeaderboard.mode == request.mode,
-        DBLeaderboard.score > request.score
-    ).count() + 1
-    
+    rank = await _save_submission(db, submission)
     return SubmitScoreResponse(success=True, rank=rank)
+
+@router.post(
+    "/replay",
+    response_model=SubmitReplayResponse,
+    responses={409: {"model": Error}, 413: {"model": Error}, 422: {"model": Error}, **ADMISSION_RESPONSES},
+    dependencies=[Depends(admit_score_submit)],
+    openapi_extra={"requestBody": {"required": True, "content": {BINARY_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}}}},
+)
+async def submit_replay(
+    request: Request,
+    current_user: Annotated[AuthPrincipal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_db)
+):
+    """Submit a score as a packed replay (see app/engine/replay.py); the server replays it to get the score."""
+    too_large = HTTPException(status_code=413, detail=f"Replays are limited to {settings.REPLAY_MAX_BYTES} bytes")
+    if int(request.headers.get("content-length") or 0) > settings.REPLAY_MAX_BYTES:
+        raise too_large
+    data = await request.body()
+    if len(data) > settings.REPLAY_MAX_BYTES:
+        raise too_large
+    try:
+        replay = await replay_verifier.verify(data)
+    except ReplayError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except BrokenProcessPool:
+        raise HTTPException(status_code=503, detail="Could not verify replay, please retry")
+
+    submission = ScoreSubmission(
+        userId=current_user.id,
+        username=current_user.username,
+        score=replay.score,
+        mode=replay.mode,
+        replay=data,
+        replayTicks=replay.ticks,
+        replayDigest=replay.digest,
+    )
+    try:
+        rank = await _save_submission(db, submission)
+    except (DuplicateReplayError, IntegrityError):
+        # The same game, however it is re-encoded, only counts once
+        raise HTTPException(status_code=409, detail="Replay already submitted")
+    return SubmitReplayResponse(success=True, rank=rank, score=replay.score, entryId=submission.id)
+
+@router.get(
+    "/{entryId}/replay",
+    response_class=Response,
+    responses={200: {"content": {BINARY_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}}}, 404: {"model": Error}},
+)
+async def get_replay(entryId: str, db: AsyncSession = Depends(get_db)):
+    data = (await db.execute(select(DBReplay.data).where(DBReplay.entryId == entryId))).scalar_one_or_none()
+    if data is None:
+        raise HTTPException(status_code=404, detail="Replay not found")
+    # Replays never change once stored
+    return Response(data, media_type=BINARY_MEDIA_TYPE, headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+@router.post(
+    "/batch",
+    response_model=SubmitScoreBatchResponse,
+    responses={403: {"model": Error}, 413: {"model": Error}, **ADMISSION_RESPONSES},
+    dependencies=[Depends(admit_score_submit)],
+)
+async def submit_score_batch(
+    request: SubmitScoreBatchRequest,
+    current_user: Annotated[AuthPrincipal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_db)
+):
+    _require_unverified_allowed()
+    if len(request.scores) > settings.SCORE_BATCH_MAX_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {settings.SCORE_BATCH_MAX_SIZE} scores per batch")
+    ranks = await write_scores(db, [
+        ScoreSubmission(userId=current_user.id, username=current_user.username, score=s.score, mode=s.mode)
+        for s in request.scores
+    ])
+    return SubmitScoreBatchResponse(success=True, ranks=ranks)
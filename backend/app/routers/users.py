@@ -1,24 +1,38 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Request
+import json
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import UserStats
-from app.database import get_db
+from app.database import get_db, settings
 from app.db_models import DBUser
+from app.rank_index import db_user_rank, rank_index
+from app.response_cache import response_cache, stats_namespace
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-@router.get("/{userId}/stats", response_model=UserStats)
-async def get_user_stats(userId: str, db: Session = Depends(get_db)):
-    user = db.query(DBUser).filter(DBUser.id == userId).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+@router.get("/{userId}/stats", response_model=UserStats, responses={304: {"description": "Not modified"}})
+async def get_user_stats(userId: str, request: Request, db: AsyncSession = Depends(get_db)):
+    # Only the user's own counters are cached; rank moves with everyone else's
+    # scores and is cheap to read from the in-memory index.
+    cached, cache_key = await response_cache.lookup(stats_namespace(userId))
+    if cached is None:
+        user = await db.get(DBUser, userId)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        cached = json.dumps([user.highScore, user.gamesPlayed]).encode()
+        await response_cache.store(cache_key, cached)
+    high_score, games_played = json.loads(cached)
     
-    # Calculate rank based on highScore
-    higher_scores_count = db.query(DBUser).filter(DBUser.highScore > user.highScore).count()
-    rank = higher_scores_count + 1
+    # Rank based on highScore, served from the in-memory index
+    if not settings.RANK_INDEX_ENABLED:
+        rank = await db_user_rank(db, high_score)
+    else:
+        rank = rank_index.user_rank(high_score)
+        if settings.RANK_INDEX_VERIFY:
+            rank = await rank_index.check_user_rank(db, high_score, rank)
     
-    return UserStats(
-        highScore=user.highScore,
-        gamesPlayed=user.gamesPlayed,
+    stats = UserStats(
+        highScore=high_score,
+        gamesPlayed=games_played,
         rank=rank
     )
+    return response_cache.json_response(request, stats.model_dump_json().encode())
@@ -0,0 +1,231 @@
+import asyncio
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, case, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import GameMode
+from .database import AsyncSessionLocal, settings
+from .db_models import DBLeaderboard, DBReplay, DBUser
+from .best_scores import best_rows, upsert_best_scores
+from .windowed_scores import upsert_window_scores, window_rows
+from .rank_index import db_score_rank, rank_index
+from .response_cache import leaderboard_namespace, response_cache, stats_namespace
+from .routers.auth import invalidate_user
+
+_users = DBUser.__table__
+
+# One UPDATE per user per batch, executed as a single executemany
+_FOLD_USER_STATS = (
+    update(_users)
+    .where(_users.c.id == bindparam("user_id"))
+    .values(
+        gamesPlayed=_users.c.gamesPlayed + bindparam("played"),
+        highScore=case(
+            (_users.c.highScore < bindparam("best"), bindparam("best")),
+            else_=_users.c.highScore,
+        ),
+    )
+)
+
+
+@dataclass
+class ScoreSubmission:
+    userId: str
+    username: str
+    score: int
+    mode: GameMode
+    date: datetime = field(default_factory=datetime.now)
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    # Packed replay that proved this score, stored alongside the leaderboard row
+    replay: Optional[bytes] = None
+    replayTicks: int = 0
+    replayDigest: Optional[str] = None
+
+
+class DuplicateReplayError(Exception):
+    """Replays in a batch that were already accepted once (or appear twice in it)."""
+
+    def __init__(self, entry_ids: List[str]):
+        super().__init__("Replay already submitted")
+        self.entry_ids = set(entry_ids)
+
+
+async def _check_replay_digests(db: AsyncSession, submissions: List[ScoreSubmission]):
+    digests = [s.replayDigest for s in submissions if s.replayDigest]
+    if not digests:
+        return
+    seen = set((await db.execute(select(DBReplay.digest).where(DBReplay.digest.in_(digests)))).scalars())
+    duplicates = []
+    for s in submissions:
+        if s.replayDigest in seen:
+            duplicates.append(s.id)
+        elif s.replayDigest:
+            seen.add(s.replayDigest)
+    if duplicates:
+        raise DuplicateReplayError(duplicates)
+
+
+async def write_scores(db: AsyncSession, submissions: List[ScoreSubmission]) -> List[int]:
+    """
+    Persist submissions in one transaction: a bulk INSERT of leaderboard rows (and
+    of any replays behind them), upserts of user_best_scores and the day/week/month
+    windows, and one folded gamesPlayed/highScore UPDATE per
+    user. Returns each submission's rank, assigned in submission order as if the
+    scores had been posted one by one. Raises DuplicateReplayError, before writing
+    anything, if a replay was already accepted; the unique digest index catches
+    copies racing in from other transactions.
+    """
+    if not submissions:
+        return []
+    await _check_replay_digests(db, submissions)
+
+    per_user: Dict[str, Tuple[int, int]] = {}
+    for s in submissions:
+        played, best = per_user.get(s.userId, (0, 0))
+        per_user[s.userId] = (played + 1, max(best, s.score))
+
+    rows = [
+        {"id": s.id, "userId": s.userId, "username": s.username,
+         "score": s.score, "mode": GameMode(s.mode).value, "date": s.date}
+        for s in submissions
+    ]
+    await db.execute(insert(DBLeaderboard), rows)
+    # High scores before this batch, for the rank index. Read after the first write and
+    # locked, so a concurrent batch for the same user waits for this one to commit and
+    # then sees its result: SQLite holds the database write lock from the INSERT on,
+    # Postgres locks the user rows (FOR UPDATE). Otherwise both would read the same old
+    # value and the index would remove it twice.
+    previous = dict((await db.execute(
+        select(DBUser.id, DBUser.highScore).where(DBUser.id.in_(per_user)).with_for_update()
+    )).all())
+    dialect_name = db.get_bind().dialect.name
+    await db.execute(upsert_best_scores(dialect_name), best_rows(rows))
+    await db.execute(upsert_window_scores(dialect_name), window_rows(rows))
+    replays = [
+        {"entryId": s.id, "userId": s.userId, "ticks": s.replayTicks, "data": s.replay, "createdAt": s.date,
+         "digest": s.replayDigest}
+        for s in submissions if s.replay is not None
+    ]
+    if replays:
+        await db.execute(insert(DBReplay), replays)
+    await db.execute(_FOLD_USER_STATS, [
+        {"user_id": user_id, "played": played, "best": best}
+        for user_id, (played, best) in per_user.items()
+    ])
+    await db.commit()
+
+    # Only touch in-memory state once the rows are durable
+    await response_cache.invalidate(
+        leaderboard_namespace(),
+        *{leaderboard_namespace(s.mode) for s in submissions},
+        *(stats_namespace(user_id) for user_id in per_user),
+    )
+    for user_id in per_user:
+        invalidate_user(user_id)
+    if not settings.RANK_INDEX_ENABLED:
+        return [await db_score_rank(db, s.mode, s.score) for s in submissions]
+    for user_id, (_, best) in per_user.items():
+        old = previous.get(user_id) or 0
+        rank_index.update_high_score(old, max(old, best))
+    ranks = [rank_index.record_score(s.mode, s.score) for s in submissions]
+    if settings.RANK_INDEX_VERIFY:
+        ranks = [await rank_index.check_score_rank(db, s.mode, s.score, rank) for s, rank in zip(submissions, ranks)]
+    return ranks
+
+
+class ScoreWriteQueue:
+    """
+    Write-behind queue for single score submits. Submissions that arrive within
+    one flush interval are written together by write_scores. submit() resolves
+    only after the batch has committed, so an acknowledged score is durable; if
+    the flush fails, every submitter in that batch gets the error and nothing
+    from the batch is written.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession], flush_interval: float = 0.05, max_batch: int = 500):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending: List[Tuple[ScoreSubmission, asyncio.Future]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.flushes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still queued, then stop."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    async def submit(self, submission: ScoreSubmission) -> int:
+        if not self.running or self._closing:
+            raise RuntimeError("Score write queue is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((submission, future))
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+        # Shield: a disconnecting client must not cancel a write others share
+        return await asyncio.shield(future)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._pending:
+                await self.flush()
+                if len(self._pending) < self.max_batch:
+                    break
+            if self._closing and not self._pending:
+                return
+
+    async def flush(self):
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if not batch:
+            return
+        self.flushes += 1
+        try:
+            async with self.session_factory() as db:
+                ranks = await write_scores(db, [submission for submission, _ in batch])
+        except DuplicateReplayError as e:
+            # Only the resubmitted replays fail; the rest of the batch goes out without them
+            for submission, future in batch:
+                if submission.id in e.entry_ids and not future.done():
+                    future.set_exception(e)
+            self._pending = [item for item in batch if item[0].id not in e.entry_ids] + self._pending
+            await self.flush()
+            return
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), rank in zip(batch, ranks):
+            if not future.done():
+                future.set_result(rank)
+
+
+score_queue = ScoreWriteQueue(
+    AsyncSessionLocal,
+    flush_interval=settings.SCORE_FLUSH_INTERVAL_MS / 1000,
+    max_batch=settings.SCORE_FLUSH_MAX_BATCH,
+)
@@ -0,0 +1,197 @@
+import base64
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List
+
+from pydantic import TypeAdapter
+
+from .models import Direction, GameMode, LiveGame, Point
+
+# Binary LiveGame layout (little-endian), version 1:
+#   header  <BBBBIHHqI  version, mode, direction, flags, score, food.x, food.y, startedAt (us since epoch), segments
+#   3 strings, each u16 length + UTF-8: id, playerId, playerName
+#   segments * (u16 x, u16 y)
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<BBBBIHHqI")
+_STRLEN = struct.Struct("<H")
+
+_MODES = list(GameMode)
+_DIRECTIONS = list(Direction)
+_NAIVE_STARTED_AT = 1  # flags bit: startedAt had no tzinfo
+_POINTS = TypeAdapter(List[Point])
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _coord(value: float) -> int:
+    if not float(value).is_integer() or not 0 <= value <= 0xFFFF:
+        raise ValueError(f"Coordinate {value!r} cannot be packed as u16")
+    return int(value)
+
+
+class SnakeBuffer:
+    """Snake body as a flat array('H') of x, y pairs, head first."""
+
+    __slots__ = ("coords",)
+
+    def __init__(self, coords: array = None):
+        self.coords = coords if coords is not None else array("H")
+
+    def __len__(self) -> int:
+        return len(self.coords) // 2
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SnakeBuffer) and self.coords == other.coords
+
+    @classmethod
+    def from_points(cls, points: Iterable[Point]) -> "SnakeBuffer":
+        values = [v for p in points for v in (p.x, p.y)]
+        ints = [int(v) for v in values]
+        if ints != values:
+            raise ValueError("Snake coordinates must be whole numbers to be packed")
+        try:
+            return cls(array("H", ints))
+        except OverflowError:
+            raise ValueError("Snake coordinates must be between 0 and 65535 to be packed")
+
+    def to_points(self) -> List[Point]:
+        # One pydantic-core call is far cheaper than a Python-level model per segment
+        c = self.coords
+        return _POINTS.validate_python([{"x": x, "y": y} for x, y in zip(c[0::2], c[1::2])])
+
+    def to_bytes(self) -> bytes:
+        if sys.byteorder == "little":
+            return self.coords.tobytes()
+        swapped = array("H", self.coords)
+        swapped.byteswap()
+        return swapped.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SnakeBuffer":
+        if len(data) % 4:
+            raise ValueError("Snake buffer length must be a multiple of 4 bytes")
+        coords = array("H")
+        coords.frombytes(data)
+        if sys.byteorder != "little":
+            coords.byteswap()
+        return cls(coords)
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.to_bytes()).decode("ascii")
+
+    @classmethod
+    def from_base64(cls, data: str) -> "SnakeBuffer":
+        return cls.from_bytes(base64.b64decode(data, validate=True))
+
+
+def encode_game(game: LiveGame) -> bytes:
+    """Raises ValueError for a game the layout cannot hold (score outside u32, strings over 64 KiB, ...)."""
+    snake = SnakeBuffer.from_points(game.snake)
+    if not 0 <= game.score <= 0xFFFFFFFF:
+        raise ValueError(f"Score {game.score!r} cannot be packed as u32")
+    started = game.startedAt
+    flags = 0
+    if started.tzinfo is None:
+        flags |= _NAIVE_STARTED_AT
+        started = started.replace(tzinfo=timezone.utc)
+    try:
+        parts = [_HEADER.pack(
+            FORMAT_VERSION,
+            _MODES.index(game.mode),
+            _DIRECTIONS.index(game.direction),
+            flags,
+            game.score,
+            _coord(game.food.x),
+            _coord(game.food.y),
+            (started - _EPOCH) // timedelta(microseconds=1),
+            len(snake),
+        )]
+    except struct.error as e:
+        raise ValueError(f"Game {game.id!r} cannot be packed: {e}") from e
+    for text in (game.id, game.playerId, game.playerName):
+        raw = text.encode("utf-8")
+        if len(raw) > 0xFFFF:
+            raise ValueError("Strings longer than 65535 bytes cannot be packed")
+        parts.append(_STRLEN.pack(len(raw)))
+        parts.append(raw)
+    parts.append(snake.to_bytes())
+    return b"".join(parts)
+
+
+def encode_games(games: Iterable[LiveGame]) -> bytes:
+    """Several games, each prefixed with its u32 byte length. Games that cannot be packed are left out."""
+    parts = []
+    for game in games:
+        try:
+            raw = encode_game(game)
+        except ValueError:
+            # One bad game must not make the listing unreadable for everyone
+            continue
+        parts.append(struct.pack("<I", len(raw)))
+        parts.append(raw)
+    return b"".join(parts)
+
+
+def decode_game(data: bytes) -> LiveGame:
+    """Rebuild a LiveGame. Callers that only need coordinates should use decode_snake."""
+    game, body = _decode(data)
+    game.snake = SnakeBuffer.from_bytes(body).to_points()
+    return game
+
+
+def decode_snake(data: bytes) -> SnakeBuffer:
+    """Just the snake body of an encoded game, without building Point models."""
+    return SnakeBuffer.from_bytes(_decode(data)[1])
+
+
+def _decode(data: bytes):
+    try:
+        version, mode, direction, flags, score, food_x, food_y, started_us, segments = _HEADER.unpack_from(data, 0)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snake format version {version}")
+        offset = _HEADER.size
+        strings = []
+        for _ in range(3):
+            (length,) = _STRLEN.unpack_from(data, offset)
+            offset += _STRLEN.size
+            strings.append(data[offset:offset + length].decode("utf-8"))
+            offset += length
+        body = data[offset:]
+        if len(body) != segments * 4:
+            raise ValueError("Snake segment count does not match payload length")
+        started = _EPOCH + timedelta(microseconds=started_us)
+        if flags & _NAIVE_STARTED_AT:
+            started = started.replace(tzinfo=None)
+        game = LiveGame.model_construct(
+            id=strings[0],
+            playerId=strings[1],
+            playerName=strings[2],
+            score=score,
+            mode=_MODES[mode],
+            startedAt=started,
+            snake=[],
+            food=Point(x=food_x, y=food_y),
+            direction=_DIRECTIONS[direction],
+        )
+        return game, body
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed snake payload: {e}") from e
+
+
+def game_to_base64_json(game: LiveGame) -> dict:
+    """LiveGame as JSON with `snake` replaced by base64 of the packed u16 pairs."""
+    data = game.model_dump(mode="json", exclude={"snake"})
+    data["snake"] = SnakeBuffer.from_points(game.snake).to_base64()
+    return data
+
+
+def games_to_base64_json(games: Iterable[LiveGame]) -> List[dict]:
+    """game_to_base64_json for each game, leaving out games that cannot be packed."""
+    encoded = []
+    for game in games:
+        try:
+            encoded.append(game_to_base64_json(game))
+        except ValueError:
+            continue
+    return encoded
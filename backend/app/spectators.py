@@ -0,0 +1,198 @@
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Set
+
+from .models import LiveGame, Point
+
+# Largest number of segments a single tick may add before we fall back to a snapshot
+MAX_HEAD_GROWTH = 4
+
+
+def _xy(point: Point) -> list:
+    x, y = point.x, point.y
+    return [int(x) if float(x).is_integer() else x, int(y) if float(y).is_integer() else y]
+
+
+def encode_frame(frame: dict) -> str:
+    return json.dumps(frame, separators=(",", ":"))
+
+
+def snapshot_frame(game: LiveGame, seq: int) -> dict:
+    return {"type": "snapshot", "seq": seq, "game": game.model_dump(mode="json")}
+
+
+def delta_frame(before: LiveGame, after: LiveGame, seq: int) -> Optional[dict]:
+    """
+    Describe `after` relative to `before` as head segments added and a count of
+    tail segments removed. Returns None when the change is not a simple move,
+    in which case the caller should send a snapshot.
+    """
+    old, new = before.snake, after.snake
+    # Replacing every segment is not a move; keep at least one if there was one
+    max_added = min(len(new) - 1 if old else len(new), MAX_HEAD_GROWTH)
+    for added in range(max(max_added, 0) + 1):
+        kept = len(new) - added
+        if kept <= len(old) and new[added:] == old[:kept]:
+            break
+    else:
+        return None
+
+    frame = {"type": "delta", "seq": seq}
+    if added:
+        frame["head"] = [_xy(p) for p in new[:added]]
+    if len(old) - kept:
+        frame["tail"] = len(old) - kept
+    if after.food != before.food:
+        frame["food"] = _xy(after.food)
+    if after.score != before.score:
+        frame["score"] = after.score
+    if after.direction != before.direction:
+        frame["direction"] = after.direction.value
+    return frame
+
+
+class Subscriber:
+    """
+    One spectator's outbound mailbox. Bounded: a slow reader's backlog of deltas is
+    coalesced into a snapshot. The end frame is kept apart and always delivered.
+    """
+
+    def __init__(self, channel: "GameChannel", max_pending: int):
+        self.channel = channel
+        self.max_pending = max_pending
+        self._pending: Deque[str] = deque()
+        self._end: Optional[str] = None
+        self._ready = asyncio.Event()
+        self.needs_snapshot = True
+        self.closed = False
+
+    def push(self, text: str):
+        if len(self._pending) >= self.max_pending:
+            # Coalesce the backlog into one fresh snapshot instead of growing without bound
+            self._pending.clear()
+            self.needs_snapshot = True
+        else:
+            self._pending.append(text)
+        self._ready.set()
+
+    def close(self):
+        """Deliver what is queued, then stop."""
+        self.closed = True
+        self._ready.set()
+
+    def end(self, text: str):
+        """The game ended: deliver what is queued, then the end frame `text`, then stop."""
+        self._end = text
+        self.close()
+
+    def abort(self):
+        """The spectator went away: drop everything."""
+        self._pending.clear()
+        self._end = None
+        self.needs_snapshot = False
+        self.close()
+
+    async def next_message(self) -> Optional[str]:
+        """Wait for outbound data; returns None once the game has ended."""
+        while True:
+            if self.needs_snapshot:
+                self.needs_snapshot = False
+                self._pending.clear()
+                snapshot = self.channel.snapshot_text()
+                if snapshot is not None:
+                    return snapshot
+            if self._pending:
+                frames = list(self._pending)
+                self._pending.clear()
+                if len(frames) == 1:
+                    return frames[0]
+                # Several ticks queued up: ship them in one message
+                return '{"type":"batch","frames":[' + ",".join(frames) + "]}"
+            if self.closed:
+                end, self._end = self._end, None
+                return end
+            self._ready.clear()
+            await self._ready.wait()
+
+
+class GameChannel:
+    def __init__(self, game: LiveGame):
+        self.game_id = game.id
+        self.game: Optional[LiveGame] = game
+        self.seq = 0
+        self.subscribers: Set[Subscriber] = set()
+        self._snapshot: Optional[str] = None
+
+    def snapshot_text(self) -> Optional[str]:
+        # Serialized at most once per state, however many spectators ask for it
+        if self._snapshot is None and self.game is not None:
+            self._snapshot = encode_frame(snapshot_frame(self.game, self.seq))
+        return self._snapshot
+
+    def publish(self, after: Optional[LiveGame]):
+        self.seq += 1
+        before, self.game, self._snapshot = self.game, after, None
+        if after is None:
+            text = encode_frame({"type": "end", "seq": self.seq})
+        else:
+            frame = delta_frame(before, after, self.seq) if before is not None else None
+            text = encode_frame(frame) if frame is not None else self.snapshot_text()
+        for subscriber in self.subscribers:
+            if after is None:
+                subscriber.end(text)
+            else:
+                subscriber.push(text)
+
+
+class SpectatorHub:
+    """Fans live game updates out to WebSocket spectators, encoding each frame once."""
+
+    def __init__(self, max_pending: int = 64):
+        self.max_pending = max_pending
+        self._channels: Dict[str, GameChannel] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+
+    def subscribe(self, game: LiveGame) -> Subscriber:
+        channel = self._channels.get(game.id)
+        if channel is None:
+            channel = self._channels[game.id] = GameChannel(game)
+        subscriber = Subscriber(channel, self.max_pending)
+        channel.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        channel = subscriber.channel
+        channel.subscribers.discard(subscriber)
+        if not channel.subscribers and self._channels.get(channel.game_id) is channel:
+            del self._channels[channel.game_id]
+
+    def spectator_count(self, game_id: str) -> int:
+        channel = self._channels.get(game_id)
+        return len(channel.subscribers) if channel else 0
+
+    def on_game_change(self, game_id: str, before: Optional[LiveGame], after: Optional[LiveGame]):
+        """LiveGameRegistry listener. Safe to call from any thread."""
+        if game_id not in self._channels:
+            return
+        if self._loop is not None and threading.get_ident() != self._loop_thread:
+            self._loop.call_soon_threadsafe(self._dispatch, game_id, after)
+        else:
+            self._dispatch(game_id, after)
+
+    def _dispatch(self, game_id: str, after: Optional[LiveGame]):
+        channel = self._channels.get(game_id)
+        if channel is None:
+            return
+        channel.publish(after)
+        if after is None:
+            del self._channels[game_id]
+
+
+spectator_hub = SpectatorHub()
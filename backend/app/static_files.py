@@ -0,0 +1,118 @@
+"""
+The built frontend served from memory. Every file under the static directory
+(Vite's dist) is read once at startup together with the .br/.gz variants the
+frontend build writes next to it (frontend/scripts/compress-dist.mjs), so a
+request is a dict lookup and a pick of the smallest encoding the client takes.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from fastapi import Response
+from fastapi.responses import FileResponse, JSONResponse
+
+from .content_coding import accepted_encodings, accepts_encoding
+
+# Vite puts content hashes in file names (assets/index-B1x9kQ2a.js); a new build means a new name
+IMMUTABLE = "public, max-age=31536000, immutable"
+# index.html and unhashed public files: always revalidate, answered with a 304 when unchanged
+REVALIDATE = "no-cache"
+HASHED_NAME = re.compile(r"-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+# Preference order; the build only writes a variant when it is smaller
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+# Larger files stay on disk and go out through FileResponse
+MAX_MEMORY_BYTES = 4 * 1024 * 1024
+
+
+@dataclass
+class StaticFile:
+    path: str
+    media_type: str
+    cache_control: str
+    etag: str
+    # Content coding ("identity", "br", "gzip") -> body; empty for files served from disk
+    bodies: Dict[str, bytes] = field(default_factory=dict)
+
+    def pick(self, accept_encoding: Optional[str]) -> str:
+        if len(self.bodies) > 1:
+            accepted = accepted_encodings(accept_encoding)
+            quality = {coding: accepts_encoding(accepted, coding) for coding, _ in ENCODINGS if coding in self.bodies}
+            # Ties go to the first (smallest) encoding in ENCODINGS
+            best = max(quality, key=quality.get)
+            if quality[best] > 0:
+                return best
+        return "identity"
+
+
+class StaticSite:
+    """Static files by URL path, with index.html for every path that is not a file (client-side routes)."""
+
+    def __init__(self, root: str, index: str = "index.html"):
+        self.root = root
+        self.index_name = index
+        self.files: Dict[str, StaticFile] = {}
+        self.index: Optional[StaticFile] = None
+
+    def load(self) -> int:
+        """(Re)read the directory. Returns the number of files found."""
+        files = {}
+        variant_suffixes = tuple(suffix for _, suffix in ENCODINGS)
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(variant_suffixes):
+                    continue
+                path = os.path.join(directory, name)
+                url_path = os.path.relpath(path, self.root).replace(os.sep, "/")
+                files[url_path] = self._read(path, url_path)
+        self.files = files
+        self.index = files.get(self.index_name)
+        return len(files)
+
+    def _read(self, path: str, url_path: str) -> StaticFile:
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        hashed = url_path.startswith("assets/") and HASHED_NAME.search(url_path)
+        cache_control = IMMUTABLE if hashed else REVALIDATE
+        if os.path.getsize(path) > MAX_MEMORY_BYTES:
+            stat = os.stat(path)
+            return StaticFile(path, media_type, cache_control, f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"')
+
+        with open(path, "rb") as f:
+            body = f.read()
+        bodies = {"identity": body}
+        for coding, suffix in ENCODINGS:
+            if os.path.exists(path + suffix):
+                with open(path + suffix, "rb") as f:
+                    bodies[coding] = f.read()
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        return StaticFile(path, media_type, cache_control, etag, bodies)
+
+    def lookup(self, url_path: str) -> Optional[StaticFile]:
+        """The file for a path, index.html for client-side routes, None for a missing asset."""
+        static_file = self.files.get(url_path.lstrip("/") or self.index_name)
+        if static_file is not None:
+            return static_file
+        # A missing script or stylesheet must 404, not come back as HTML
+        if url_path.lstrip("/").startswith("assets/"):
+            return None
+        return self.index
+
+    def response(self, url_path: str, accept_encoding: Optional[str] = None, if_none_match: Optional[str] = None) -> Response:
+        static_file = self.lookup(url_path)
+        if static_file is None:
+            return JSONResponse({"detail": "Not Found"}, status_code=404)
+        coding = static_file.pick(accept_encoding)
+        # Each encoding is a different representation, so it gets its own validator
+        etag = static_file.etag if coding == "identity" else static_file.etag[:-1] + "-" + coding + '"'
+        headers = {"Cache-Control": static_file.cache_control, "ETag": etag}
+        if len(static_file.bodies) > 1:
+            headers["Vary"] = "Accept-Encoding"
+        if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+        if not static_file.bodies:
+            return FileResponse(static_file.path, media_type=static_file.media_type, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(static_file.bodies[coding], media_type=static_file.media_type, headers=headers)
@@ -0,0 +1,177 @@
+"""
+Deterministic synthetic players, scores and live games, and a bulk loader that
+writes them in batched transactions. Used by the generate_data CLI and the
+load-test benchmarks; the same seed always produces the same data.
+"""
+import csv
+import io
+import random
+import time
+import uuid
+from array import array
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+
+from sqlalchemy import Table, insert, text
+from sqlalchemy.engine import Connection, Engine
+
+from .best_scores import rebuild_best_scores
+from .db_models import DBLeaderboard, DBUser, DBUserBestScore, DBWindowBestScore
+from .models import MAX_SCORE, Direction, GameMode, LiveGame, Point
+from .windowed_scores import rebuild_window_scores
+
+SYNTHETIC_PASSWORD = "synthetic-password"
+# Rows per transaction: big enough to amortize commits, small enough to keep memory flat
+BATCH_SIZE = 50_000
+# Scores are spread over the 90 days before the generator runs, so day/week/month windows have data
+DATE_SPAN_SECONDS = 90 * 24 * 3600
+
+
+def synthetic_email(n: int) -> str:
+    return f"player{n}@synthetic.example.com"
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+class SyntheticDataset:
+    """
+    `rows` leaderboard rows spread over `players` users (default rows / 10).
+    Games are drawn up front into compact arrays so each user's highScore and
+    gamesPlayed are known before the user row is written; the rows themselves
+    are only built batch by batch.
+    """
+
+    def __init__(self, rows: int, players: int = 0, seed: int = 42, end: Optional[datetime] = None):
+        self.rows = rows
+        # Whole hours, so two datasets built in the same hour are identical
+        self.end = end or datetime.now().replace(minute=0, second=0, microsecond=0)
+        self.start = self.end - timedelta(seconds=DATE_SPAN_SECONDS)
+        self.players = players or max(rows // 10, 100)
+        self.seed = seed
+        rng = random.Random(seed)
+        self.user_ids = [_uuid(rng) for _ in range(self.players)]
+        self.player_of = array("i", (rng.randrange(self.players) for _ in range(rows)))
+        # Long tail: most games end early, a few go very long (up to a full board)
+        self.score_of = array("i", (min(int(rng.paretovariate(1.5) * 100) // 10 * 10, MAX_SCORE) for _ in range(rows)))
+        self.second_of = array("i", (rng.randrange(DATE_SPAN_SECONDS) for _ in range(rows)))
+        self.high_scores = array("i", bytes(4 * self.players))
+        self.games_played = array("i", bytes(4 * self.players))
+        for player, score in zip(self.player_of, self.score_of):
+            if score > self.high_scores[player]:
+                self.high_scores[player] = score
+            self.games_played[player] += 1
+
+    def user_batches(self, password_hash: str, size: int = BATCH_SIZE) -> Iterator[List[dict]]:
+        for offset in range(0, self.players, size):
+            yield [
+                {"id": self.user_ids[n], "username": f"player{n}", "email": synthetic_email(n), "password": password_hash,
+                 "highScore": self.high_scores[n], "gamesPlayed": self.games_played[n], "createdAt": self.start,
+                 "tokenVersion": 0}
+                for n in range(offset, min(offset + size, self.players))
+            ]
+
+    def score_batches(self, size: int = BATCH_SIZE) -> Iterator[List[dict]]:
+        rng = random.Random(self.seed + 1)
+        modes = [mode.value for mode in GameMode]
+        for offset in range(0, self.rows, size):
+            yield [
+                {"id": _uuid(rng), "userId": self.user_ids[self.player_of[i]], "username": f"player{self.player_of[i]}",
+                 "score": self.score_of[i], "mode": modes[i % len(modes)],
+                 "date": self.start + timedelta(seconds=self.second_of[i])}
+                for i in range(offset, min(offset + size, self.rows))
+            ]
+
+    def live_games(self, count: int) -> List[LiveGame]:
+        rng = random.Random(self.seed + 2)
+        modes = list(GameMode)
+        games = []
+        for n in range(count):
+            player = n % self.players
+            length = rng.randrange(3, 40)
+            games.append(LiveGame(
+                id=f"synthetic-{n}", playerId=self.user_ids[player], playerName=f"player{player}",
+                score=rng.randrange(0, 2000) // 10 * 10, mode=modes[n % len(modes)], startedAt=datetime.now(),
+                snake=[Point(x=i % 20, y=i // 20) for i in range(length)],
+                food=Point(x=rng.randrange(20), y=rng.randrange(20)), direction=rng.choice(list(Direction)),
+            ))
+        return games
+
+
+def _deferred_indexes():
+    # Non-unique indexes are rebuilt after the load; unique ones stay to guard the data
+    return [
+        index
+        for model in (DBLeaderboard, DBUserBestScore, DBWindowBestScore)
+        for index in model.__table__.indexes
+        if not index.unique
+    ]
+
+
+def _copy_rows(conn: Connection, table: Table, rows: List[dict]):
+    """COPY ... FROM STDIN, several times faster than executemany on Postgres."""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[column].isoformat() if isinstance(row[column], datetime) else row[column] for column in columns])
+    buffer.seek(0)
+    quoted = ", ".join('"' + column + '"' for column in columns)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table.name} ({quoted}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def _insert_rows(conn: Connection, table: Table, rows: List[dict]):
+    if conn.dialect.driver == "psycopg2":
+        _copy_rows(conn, table, rows)
+    else:
+        conn.execute(insert(table), rows)
+
+
+def bulk_load(engine: Engine, dataset: SyntheticDataset, password_hash: str, batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Write the dataset into an empty schema: drop the secondary indexes, insert
+    users and scores one batch per transaction, rebuild user_best_scores and the
+    current day/week/month windows, then recreate the indexes and refresh
+    planner statistics. Returns counts and timings.
+    """
+    started = time.perf_counter()
+    indexes = _deferred_indexes()
+    with engine.begin() as conn:
+        for index in indexes:
+            index.drop(bind=conn, checkfirst=True)
+    try:
+        for batch in dataset.user_batches(password_hash, batch_size):
+            with engine.begin() as conn:
+                _insert_rows(conn, DBUser.__table__, batch)
+        for batch in dataset.score_batches(batch_size):
+            with engine.begin() as conn:
+                _insert_rows(conn, DBLeaderboard.__table__, batch)
+        loaded = time.perf_counter()
+        with engine.begin() as conn:
+            best_scores = rebuild_best_scores(conn)
+            window_scores = rebuild_window_scores(conn)
+    finally:
+        # Also after a failed load, so the schema is never left without its indexes
+        index_started = time.perf_counter()
+        with engine.begin() as conn:
+            for index in indexes:
+                index.create(bind=conn, checkfirst=True)
+            conn.execute(text("ANALYZE"))
+    finished = time.perf_counter()
+
+    total = dataset.players + dataset.rows + best_scores + window_scores
+    return {
+        "users": dataset.players,
+        "scores": dataset.rows,
+        "bestScores": best_scores,
+        "windowScores": window_scores,
+        "loadSeconds": loaded - started,
+        "indexSeconds": finished - index_started,
+        "seconds": finished - started,
+        "rowsPerSecond": total / (finished - started),
+    }
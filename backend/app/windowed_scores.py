@@ -0,0 +1,83 @@
+"""
+Day/week/month leaderboards. Each window keeps a small projection of every
+player's best score per mode, keyed by the window's start (its bucket), and is
+maintained on every score write like user_best_scores. A new day, week or month
+simply has a new bucket key, so windows roll over without a rebuild; buckets
+that are no longer current are deleted by compact_window_scores().
+"""
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import DateTime, String, and_, delete, func, insert, literal, or_, select
+from sqlalchemy.engine import Connection
+
+from .best_scores import upsert_if_higher
+from .db_models import DBLeaderboard, DBWindowBestScore
+from .models import LeaderboardWindow
+
+_windowed = DBWindowBestScore.__table__
+_history = DBLeaderboard.__table__
+WINDOWS = list(LeaderboardWindow)
+
+
+def window_start(window: LeaderboardWindow, at: datetime) -> datetime:
+    """Start of the day, week (Monday) or month containing `at`, in the same timezone as `at`."""
+    day = at.replace(hour=0, minute=0, second=0, microsecond=0)
+    if window == LeaderboardWindow.day:
+        return day
+    if window == LeaderboardWindow.week:
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def upsert_window_scores(dialect_name: str):
+    return upsert_if_higher(
+        _windowed, [_windowed.c.window, _windowed.c.bucket, _windowed.c.mode, _windowed.c.userId], dialect_name,
+    )
+
+
+def window_rows(rows: Iterable[dict]) -> List[dict]:
+    """Reduce leaderboard rows to one best row per (window, bucket, mode, userId)."""
+    best = {}
+    for row in rows:
+        for window in WINDOWS:
+            key = (window.value, window_start(window, row["date"]), row["mode"], row["userId"])
+            if key not in best or row["score"] > best[key]["score"]:
+                best[key] = {
+                    "window": key[0], "bucket": key[1], "mode": row["mode"], "userId": row["userId"],
+                    "username": row["username"], "score": row["score"], "date": row["date"], "entryId": row["id"],
+                }
+    return list(best.values())
+
+
+def compact_window_scores(conn: Connection, now: Optional[datetime] = None) -> int:
+    """Delete every bucket that is not the current one for its window. Returns rows removed."""
+    now = now or datetime.now()
+    result = conn.execute(delete(_windowed).where(or_(*(
+        and_(_windowed.c.window == window.value, _windowed.c.bucket < window_start(window, now))
+        for window in WINDOWS
+    ))))
+    return result.rowcount
+
+
+def rebuild_window_scores(conn: Connection, now: Optional[datetime] = None) -> int:
+    """Recompute the current buckets from leaderboard history. Returns the row count."""
+    now = now or datetime.now()
+    conn.execute(delete(_windowed))
+    for window in WINDOWS:
+        start = window_start(window, now)
+        ranked = select(
+            _history.c.userId, _history.c.mode, _history.c.username, _history.c.score, _history.c.date, _history.c.id,
+            func.row_number().over(
+                partition_by=(_history.c.userId, _history.c.mode),
+                order_by=(_history.c.score.desc(), _history.c.date.asc(), _history.c.id.asc()),
+            ).label("position"),
+        ).where(_history.c.date >= start).subquery()
+        conn.execute(insert(_windowed).from_select(
+            ["window", "bucket", "userId", "mode", "username", "score", "date", "entryId"],
+            select(
+                literal(window.value, String), literal(start, DateTime),
+                ranked.c.userId, ranked.c.mode, ranked.c.username, ranked.c.score, ranked.c.date, ranked.c.id,
+            ).where(ranked.c.position == 1),
+        ))
+    return conn.execute(select(func.count()).select_from(_windowed)).scalar_one()
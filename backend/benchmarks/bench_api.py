@@ -0,0 +1,217 @@
+"""
+Load test for the API hot paths: login, signup, score submission, leaderboard
+pages, user stats and live game reads, against a synthetic dataset of the
+given size. Requests go through the ASGI app in-process, so the numbers cover
+the app and the database but not the network. Prints p50/p95/p99 and RPS per
+scenario and can write them as JSON to compare against a previous run.
+
+Run from the backend directory:
+    uv run python -m benchmarks.bench_api --rows 10000 100000 --output results.json
+    uv run python -m benchmarks.bench_api --rows 10000 --compare results.json
+
+Against a local Postgres (the database name must contain "bench", or pass
+--force; every table is dropped and recreated):
+    uv run python -m benchmarks.bench_api --database-url postgresql://postgres@localhost/snake_bench
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+SCENARIOS = ["leaderboard", "leaderboard_distinct", "leaderboard_week", "stats", "games", "game", "login", "signup", "submit"]
+# Settings that change what is being measured, recorded with every run
+RECORDED_SETTINGS = [
+    "FAST_JSON", "RESPONSE_CACHE_BACKEND", "SCORE_WRITE_BEHIND", "PASSWORD_SCRYPT_LOG_N",
+    "PASSWORD_HASH_WORKERS", "DB_POOL_SIZE", "METRICS_ENABLED", "RATE_LIMIT_ENABLED", "ADMISSION_MAX_CONCURRENT",
+]
+LIVE_GAMES = 200
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies, errors: int, elapsed: float) -> dict:
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50": ms(percentile(latencies, 50)),
+        "p95": ms(percentile(latencies, 95)),
+        "p99": ms(percentile(latencies, 99)),
+        "mean": ms(sum(latencies) / len(latencies)),
+        "max": ms(max(latencies)),
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float):
+    """Return (lines to print, whether anything regressed by more than threshold)."""
+    previous = {(r["rows"], r["scenario"]): r for r in baseline["results"]}
+    lines, regressed = [], False
+    for result in current["results"]:
+        before = previous.get((result["rows"], result["scenario"]))
+        if before is None:
+            continue
+        p99_change = result["p99"] / before["p99"] - 1 if before["p99"] else 0.0
+        rps_change = result["rps"] / before["rps"] - 1 if before["rps"] else 0.0
+        worse = p99_change > threshold or rps_change < -threshold
+        regressed |= worse
+        lines.append(
+            f"{result['rows']:>9} {result['scenario']:<22} p99 {before['p99']:8.2f} -> {result['p99']:8.2f}ms ({p99_change:+6.1%})  "
+            f"rps {before['rps']:8.1f} -> {result['rps']:8.1f} ({rps_change:+6.1%}){'  REGRESSED' if worse else ''}"
+        )
+    return lines, regressed
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run_scenario(make_request, requests: int, concurrency: int) -> dict:
+    latencies, errors = [], 0
+
+    async def worker(first: int):
+        nonlocal errors
+        for i in range(first, requests, concurrency):
+            started = time.perf_counter()
+            res = await make_request(i)
+            latencies.append(time.perf_counter() - started)
+            if res.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def bench_size(args, rows: int) -> list:
+    import httpx
+
+    from app.database import engine, live_games_db
+    from app.main import app
+    from app.models import GameMode
+    from app.passwords import password_hasher
+    from app.routers.auth import create_access_token
+    from app.db_models import Base
+    from app.synthetic_data import SYNTHETIC_PASSWORD, SyntheticDataset, bulk_load, synthetic_email
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    dataset = SyntheticDataset(rows, seed=args.seed)
+    load = bulk_load(engine, dataset, password_hasher.hash_sync(SYNTHETIC_PASSWORD))
+    print(f"\n{rows} rows, {dataset.players} players (loaded in {load['seconds']:.1f}s)")
+    user_ids = dataset.user_ids
+    rng = random.Random(args.seed)
+    modes = [mode.value for mode in GameMode]
+    run_id = int(time.time())
+
+    async with app.router.lifespan_context(app):
+        live_games_db.clear()
+        game_ids = [live_games_db.add(game, expires=False).id for game in dataset.live_games(LIVE_GAMES)]
+        tokens = [create_access_token({"sub": user_ids[n], "ver": 0}) for n in range(min(len(user_ids), 100))]
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            requests = {
+                "leaderboard": lambda i: client.get("/api/leaderboard", params={"mode": modes[i % len(modes)], "limit": 20}),
+                "leaderboard_distinct": lambda i: client.get("/api/leaderboard", params={"mode": modes[i % len(modes)], "limit": 20, "distinct": True}),
+                "leaderboard_week": lambda i: client.get("/api/leaderboard", params={"mode": modes[i % len(modes)], "limit": 20, "window": "week"}),
+                "stats": lambda i: client.get(f"/api/users/{rng.choice(user_ids)}/stats"),
+                "games": lambda i: client.get("/api/games"),
+                "game": lambda i: client.get(f"/api/games/{rng.choice(game_ids)}"),
+                "login": lambda i: client.post("/api/auth/login", json={
+                    "email": synthetic_email(rng.randrange(len(user_ids))), "password": SYNTHETIC_PASSWORD,
+                }),
+                "signup": lambda i: client.post("/api/auth/signup", json={
+                    "username": f"new{run_id}-{i}", "email": f"new{run_id}-{i}@synthetic.example.com", "password": SYNTHETIC_PASSWORD,
+                }),
+                "submit": lambda i: client.post(
+                    "/api/leaderboard", json={"score": rng.randrange(0, 3000) // 10 * 10, "mode": modes[i % len(modes)]},
+                    headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"},
+                ),
+            }
+            results = []
+            for scenario in args.scenarios:
+                # Password hashing dominates these; fewer requests keep runs short
+                count = args.requests // 10 if scenario in ("login", "signup") else args.requests
+                result = {"rows": rows, "scenario": scenario, **await run_scenario(requests[scenario], max(count, args.concurrency), args.concurrency)}
+                results.append(result)
+                print(f"  {scenario:<22} p50={result['p50']:8.2f}ms  p95={result['p95']:8.2f}ms  p99={result['p99']:8.2f}ms  "
+                      f"{result['rps']:8.1f} req/s  errors={result['errors']}")
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load test the API hot paths.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000], help="leaderboard rows to generate, one run per size")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario (login/signup run a tenth)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="database to run against (default: a throwaway SQLite file)")
+    parser.add_argument("--force", action="store_true", help="allow wiping a database whose name lacks 'bench'")
+    parser.add_argument("--output", help="write results as JSON here")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="p99 or RPS change that counts as a regression")
+    args = parser.parse_args()
+
+    if args.database_url:
+        if "bench" not in args.database_url.rsplit("/", 1)[-1] and not args.force:
+            parser.error("refusing to wipe a database whose name does not contain 'bench' (pass --force)")
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='bench-api-')}/bench.db"
+    # The generated dataset is the only data
+    os.environ["SEED_ON_STARTUP"] = "false"
+    # Every simulated client shares one address; measure the endpoints, not the limiter
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    # Imported only now so the settings pick up DATABASE_URL
+    from app.database import engine, settings
+
+    results = []
+    for rows in args.rows:
+        results.extend(await bench_size(args, rows))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "dialect": engine.dialect.name,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "seed": args.seed,
+            "settings": {name: getattr(settings, name) for name in RECORDED_SETTINGS if hasattr(settings, name)},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        lines, regressed = compare(baseline, report, args.threshold)
+        print(f"\nCompared with {args.compare} (commit {baseline['meta'].get('commit')}):")
+        print("\n".join(lines) or "  no matching scenarios")
+        if regressed:
+            print(f"Regression beyond {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+"""
+Ticks per second for the server-side snake engine, with many games advanced
+round-robin the way a game loop would. Each game steers randomly but never
+reverses and restarts when it dies, so boards keep a realistic mix of lengths.
+
+Run from the backend directory:
+    uv run python -m benchmarks.bench_engine --games 1000 --ticks 200
+"""
+import argparse
+import random
+import time
+
+from app.engine import SnakeGame
+from app.models import Direction, GameMode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the snake engine.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=200, help="ticks per game")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    directions = list(Direction)
+    for mode in GameMode:
+        games = [SnakeGame.new(mode, rng=random.Random(rng.random())) for _ in range(args.games)]
+        # Pre-drawn steering so the timing covers the engine, not the RNG
+        turns = [rng.choice(directions) if rng.random() < 0.2 else None for _ in range(4096)]
+        restarts = 0
+        started = time.perf_counter()
+        for t in range(args.ticks):
+            for i, game in enumerate(games):
+                turn = turns[(t * args.games + i) & 4095]
+                if turn is not None:
+                    game.turn(turn)
+                if not game.tick():
+                    games[i] = SnakeGame.new(mode, rng=game.rng)
+                    restarts += 1
+        elapsed = time.perf_counter() - started
+        total = args.games * args.ticks
+        print(f"{mode.value:<13} {total / elapsed:12,.0f} ticks/s  ({elapsed / total * 1e6:.2f} us/tick, "
+              f"{args.games} games, {restarts} restarts)")
+
+
+if __name__ == "__main__":
+    main()
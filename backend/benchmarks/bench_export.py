@@ -0,0 +1,111 @@
+"""
+Peak Python memory and throughput of GET /api/leaderboard/export against
+synthetic datasets of growing size, next to the same rows fetched with .all()
+and encoded in one piece. The streamed peak should stay flat as rows grow.
+Memory is traced with tracemalloc, which also slows everything down, so the
+rows/s figures are for comparing runs rather than absolute.
+
+Run from the backend directory:
+    uv run python -m benchmarks.bench_export --rows 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import urlencode
+
+os.environ["SEED_ON_STARTUP"] = "false"
+
+
+async def measure(run) -> tuple:
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = await run()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+async def asgi_get(app, path: str, params: dict, headers: dict) -> int:
+    """
+    Call the ASGI app directly and count the body bytes. httpx's ASGITransport
+    buffers the whole response, which would hide whether the app streams.
+    """
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": urlencode(params).encode(), "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+    size = 0
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    finished = asyncio.Event()
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Starlette listens for a disconnect while streaming; the client never leaves
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    finished.set()
+    return size
+
+
+async def bench_size(rows: int, batch_size: int):
+    from app import fast_json
+    from app.database import AsyncSessionLocal, engine, settings
+    from app.db_models import Base
+    from app.exports import export_query
+    from app.main import app
+    from app.passwords import password_hasher
+    from app.synthetic_data import SYNTHETIC_PASSWORD, SyntheticDataset, bulk_load
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    bulk_load(engine, SyntheticDataset(rows), password_hasher.hash_sync(SYNTHETIC_PASSWORD))
+    settings.EXPORT_BATCH_SIZE = batch_size
+    print(f"\n{rows} rows")
+
+    async def materialized():
+        async with AsyncSessionLocal() as db:
+            result = (await db.execute(export_query())).all()
+            return len(b"".join(fast_json.dumps(row._asdict()) + b"\n" for row in result))
+
+    async with app.router.lifespan_context(app):
+        runs = [
+            ("all() + dumps", materialized),
+            ("ndjson", lambda: asgi_get(app, "/api/leaderboard/export", {}, {"Accept-Encoding": "identity"})),
+            ("ndjson gzip", lambda: asgi_get(app, "/api/leaderboard/export", {}, {"Accept-Encoding": "gzip"})),
+            ("csv", lambda: asgi_get(app, "/api/leaderboard/export", {"format": "csv"}, {"Accept-Encoding": "identity"})),
+            ("csv gzip", lambda: asgi_get(app, "/api/leaderboard/export", {"format": "csv"}, {"Accept-Encoding": "gzip"})),
+        ]
+        for name, run in runs:
+            size, elapsed, peak = await measure(run)
+            print(f"  {name:<14} {rows / elapsed:>10,.0f} rows/s  {size / 2**20:8.1f} MiB out  "
+                  f"peak {peak / 2**20:8.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming leaderboard export.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench_export.db"
+        for rows in args.rows:
+            asyncio.run(bench_size(rows, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
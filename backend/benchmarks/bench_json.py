@@ -0,0 +1,55 @@
+"""
+Compare response_model-style leaderboard serialization with the FAST_JSON path.
+
+Run from the backend directory:
+    uv run python -m benchmarks.bench_json --rows 100
+"""
+import argparse
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app import fast_json
+from app.db_models import DBLeaderboard
+from app.models import LeaderboardEntry
+
+
+def bench(label: str, fn, number: int) -> float:
+    seconds = min(timeit.repeat(fn, number=number, repeat=5))
+    per_call_us = seconds / number * 1e6
+    print(f"  {label:<40} {per_call_us:10.2f} us/op")
+    return per_call_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark leaderboard JSON serialization.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 100, 1000])
+    parser.add_argument("--number", type=int, default=500)
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(List[LeaderboardEntry])
+    start = datetime.now()
+    print(f"encoder: {'orjson' if fast_json.orjson else 'json'}")
+    for count in args.rows:
+        values = [
+            (f"id-{i}", f"player{i}", 10_000 - i, "walls", start + timedelta(seconds=i))
+            for i in range(count)
+        ]
+        orm_rows = [DBLeaderboard(id=i, username=u, score=s, mode=m, date=d) for i, u, s, m, d in values]
+        tuples = [dict(zip(("id", "username", "score", "mode", "date"), v)) for v in values]
+        print(f"\n{count} rows")
+        assert fast_json.dumps(tuples) == adapter.dump_json(adapter.validate_python(orm_rows, from_attributes=True))
+
+        bench("response_model (validate + encode)", lambda: JSONResponse(jsonable_encoder(
+            [LeaderboardEntry.model_validate(r) for r in orm_rows])).body, args.number)
+        bench("TypeAdapter validate + dump_json", lambda: adapter.dump_json(
+            adapter.validate_python(orm_rows, from_attributes=True)), args.number)
+        bench("FAST_JSON (tuples -> bytes)", lambda: fast_json.dumps(tuples), args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Login latency under concurrency with scrypt hashing inline on the event loop
+versus on the password thread pool. Also probes GET /api while logins run to
+show how long other requests are stalled.
+
+Run from the backend directory:
+    uv run python -m benchmarks.bench_login --concurrency 16 --logins 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+# Throwaway database, set before the app reads its settings
+_tmpdir = tempfile.mkdtemp(prefix="bench-login-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+
+import httpx
+
+from app.main import app
+from app.passwords import PasswordHasher
+import app.routers.auth as auth
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run_case(client: httpx.AsyncClient, users: int, concurrency: int, logins: int):
+    latencies, probes = [], []
+    done = asyncio.Event()
+
+    async def login_worker(worker: int):
+        for i in range(worker, logins, concurrency):
+            n = i % users
+            started = time.perf_counter()
+            res = await client.post("/api/auth/login", json={"email": f"bench{n}@example.com", "password": f"pw-{n}"})
+            latencies.append(time.perf_counter() - started)
+            assert res.status_code == 200, res.text
+
+    async def probe():
+        # Time a 10ms sleep plus a trivial request; anything beyond 10ms is the loop being stalled
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            await client.get("/api")
+            probes.append(time.perf_counter() - started - 0.01)
+
+    prober = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(login_worker(w) for w in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await prober
+    return latencies, probes, elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark login latency with password hashing.")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--log-n", type=int, default=14)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    args = parser.parse_args()
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            auth.password_hasher = PasswordHasher(log_n=args.log_n, workers=4)
+            for n in range(args.users):
+                await client.post("/api/auth/signup", json={
+                    "username": f"bench{n}", "email": f"bench{n}@example.com", "password": f"pw-{n}",
+                })
+
+            print(f"scrypt n=2**{args.log_n}, {args.concurrency} concurrent clients, {args.logins} logins")
+            for workers in args.workers:
+                auth.password_hasher = PasswordHasher(log_n=args.log_n, workers=workers)
+                latencies, probes, elapsed = await run_case(client, args.users, args.concurrency, args.logins)
+                label = "inline on loop" if workers == 0 else f"pool, {workers} threads"
+                print(f"\n{label}")
+                print(f"  login  p50={percentile(latencies, 50) * 1000:7.1f}ms  p95={percentile(latencies, 95) * 1000:7.1f}ms  "
+                      f"p99={percentile(latencies, 99) * 1000:7.1f}ms  {args.logins / elapsed:6.1f} logins/s")
+                print(f"  GET /api delay while logging in: p50={statistics.median(probes) * 1000:6.1f}ms  "
+                      f"p99={percentile(probes, 99) * 1000:6.1f}ms  max={max(probes) * 1000:6.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
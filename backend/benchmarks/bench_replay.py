@@ -0,0 +1,80 @@
+"""
+Replays verified per second: inline on one core, then through the process pool
+the API uses. Replays come from a greedy bot that chases food, so they have
+realistic lengths and scores.
+
+Run from the backend directory:
+    uv run python -m benchmarks.bench_replay --replays 200 --workers 1 2 4
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.engine import ReplayRecorder, encode_replay, verify_replay
+from app.engine.rules import DIRECTIONS, WALL
+from app.models import GameMode
+from app.replays import ReplayVerifier
+
+_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+
+
+def bot_replay(mode: GameMode, seed: int, max_ticks: int) -> bytes:
+    """Greedy: take the safe move that gets closest to the food, until stuck."""
+    recorder = ReplayRecorder(mode, seed)
+    game = recorder.game
+    size = game.grid_size
+    while game.ticks < max_ticks and not game.over:
+        head, food = game.body[0], game.food
+        best = None
+        for direction in DIRECTIONS:
+            target = game._moves[head * 4 + _INDEX[direction]]
+            if target == WALL or (game.cells[target] and target != game.body[-1]):
+                continue
+            distance = abs(target % size - food % size) + abs(target // size - food // size)
+            if best is None or distance < best[0]:
+                best = (distance, direction)
+        if best is not None and best[1] != game.direction:
+            recorder.turn(best[1])
+        recorder.tick()
+    return encode_replay(recorder.replay())
+
+
+async def run_pool(replays, workers: int) -> float:
+    verifier = ReplayVerifier(workers=workers)
+    # Warm the pool so process start-up is not counted
+    await asyncio.gather(*(verifier.verify(replays[0]) for _ in range(workers)))
+    started = time.perf_counter()
+    await asyncio.gather(*(verifier.verify(data) for data in replays))
+    elapsed = time.perf_counter() - started
+    verifier.shutdown()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark replay verification.")
+    parser.add_argument("--replays", type=int, default=200)
+    parser.add_argument("--max-ticks", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    modes = list(GameMode)
+    replays = [bot_replay(modes[i % len(modes)], seed=i, max_ticks=args.max_ticks) for i in range(args.replays)]
+    decoded = [verify_replay(data) for data in replays]
+    ticks = sum(r.ticks for r in decoded)
+    print(f"{len(replays)} replays: {ticks / len(replays):.0f} ticks and {sum(map(len, replays)) / len(replays):.0f} bytes "
+          f"on average, mean score {sum(r.score for r in decoded) / len(decoded):.0f}")
+
+    started = time.perf_counter()
+    for data in replays:
+        verify_replay(data)
+    elapsed = time.perf_counter() - started
+    print(f"  inline, 1 core   {len(replays) / elapsed:8.1f} replays/s  {ticks / elapsed:12,.0f} ticks/s")
+
+    for workers in sorted(set(args.workers)):
+        elapsed = asyncio.run(run_pool(replays, workers))
+        print(f"  pool, {workers} workers {len(replays) / elapsed:8.1f} replays/s  {ticks / elapsed:12,.0f} ticks/s")
+
+
+if __name__ == "__main__":
+    main()
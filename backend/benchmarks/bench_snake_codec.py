@@ -0,0 +1,59 @@
+"""
+Compare the default JSON LiveGame encoding with the packed snake formats.
+
+Run from the backend directory:
+    uv run python -m benchmarks.bench_snake_codec --segments 400
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime
+
+from app.models import LiveGame
+from app.snake_codec import SnakeBuffer, decode_game, decode_snake, encode_game, game_to_base64_json
+
+
+def make_game(segments: int) -> LiveGame:
+    # Serpentine body on a 20-wide board so coordinates look like real play
+    snake = [{"x": i % 20 if (i // 20) % 2 == 0 else 19 - i % 20, "y": i // 20} for i in range(segments)]
+    return LiveGame(
+        id="bench", playerId="p1", playerName="Bencher", score=segments * 10, mode="walls",
+        startedAt=datetime.now(), snake=snake, food={"x": 3, "y": 4}, direction="RIGHT",
+    )
+
+
+def bench(label: str, fn, number: int) -> float:
+    seconds = min(timeit.repeat(fn, number=number, repeat=5))
+    per_call_us = seconds / number * 1e6
+    print(f"  {label:<32} {per_call_us:10.2f} us/op")
+    return per_call_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LiveGame snake encodings.")
+    parser.add_argument("--segments", type=int, nargs="+", default=[10, 100, 400, 2000])
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    for segments in args.segments:
+        game = make_game(segments)
+        json_bytes = game.model_dump_json().encode()
+        binary = encode_game(game)
+        b64_bytes = json.dumps(game_to_base64_json(game)).encode()
+        print(f"\n{segments} segments")
+        print(f"  size: json={len(json_bytes)}B base64-json={len(b64_bytes)}B binary={len(binary)}B "
+              f"({len(json_bytes) / len(binary):.1f}x smaller)")
+
+        bench("encode json (model_dump_json)", game.model_dump_json, args.number)
+        bench("encode base64 json", lambda: json.dumps(game_to_base64_json(game)), args.number)
+        bench("encode binary", lambda: encode_game(game), args.number)
+        bench("decode json (model_validate_json)", lambda: LiveGame.model_validate_json(json_bytes), args.number)
+        bench("decode binary to LiveGame", lambda: decode_game(binary), args.number)
+        bench("decode binary snake only", lambda: decode_snake(binary), args.number)
+        buffer = SnakeBuffer.from_points(game.snake)
+        raw = buffer.to_bytes()
+        bench("snake buffer round trip", lambda: SnakeBuffer.from_bytes(raw).to_bytes(), args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Requests per second and bytes sent for the SPA routes: the old path (StaticFiles
+mount plus a catch-all that checks and opens index.html on every request)
+against StaticSite, which serves index.html and the precompressed assets from
+memory. The build is a synthetic Vite-like dist; its .br/.gz variants come from
+frontend/scripts/compress-dist.mjs when node is installed, else gzip only.
+
+Run from the backend directory:
+    uv run python -m benchmarks.bench_static --requests 2000
+"""
+import argparse
+import asyncio
+import glob
+import gzip
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse
+from fastapi.staticfiles import StaticFiles
+
+from app.static_files import StaticSite
+
+COMPRESS_SCRIPT = os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "scripts", "compress-dist.mjs")
+BROWSER_ENCODING = "gzip, deflate, br, zstd"
+ASSET = "assets/index-B1x9kQ2a.js"
+
+
+def build_dist(root: str):
+    os.makedirs(os.path.join(root, "assets"))
+    sources = b"".join(open(path, "rb").read() for path in sorted(glob.glob("app/**/*.py", recursive=True)))
+    with open(os.path.join(root, "index.html"), "wb") as f:
+        f.write(b'<!doctype html><html lang="en"><head><meta charset="UTF-8"><title>Snake Spectacle</title>'
+                + b'<script type="module" crossorigin src="/' + ASSET.encode() + b'"></script>'
+                + b"<!-- " + sources[:1000] + b" --></head><body><div id=\"root\"></div></body></html>")
+    # About the size of the app's main bundle
+    with open(os.path.join(root, ASSET), "wb") as f:
+        f.write((sources * (500_000 // len(sources) + 1))[:500_000])
+    if shutil.which("node"):
+        subprocess.run(["node", COMPRESS_SCRIPT, root], check=True)
+    else:
+        for path in (os.path.join(root, "index.html"), os.path.join(root, ASSET)):
+            with open(path, "rb") as f, open(path + ".gz", "wb") as out:
+                out.write(gzip.compress(f.read(), 9))
+
+
+def old_app(root: str) -> FastAPI:
+    """main.py before StaticSite."""
+    app = FastAPI()
+    app.mount("/assets", StaticFiles(directory=os.path.join(root, "assets")), name="assets")
+
+    @app.get("/{full_path:path}")
+    async def serve_spa(full_path: str):
+        if full_path.startswith("api"):
+            return {"detail": "Not Found"}
+        index_path = os.path.join(root, "index.html")
+        if os.path.exists(index_path):
+            return FileResponse(index_path)
+        return {"detail": "Frontend assets not found"}
+
+    return app
+
+
+def new_app(root: str) -> FastAPI:
+    app = FastAPI()
+    site = StaticSite(root)
+    site.load()
+
+    @app.api_route("/{full_path:path}", methods=["GET", "HEAD"])
+    async def serve_spa(request: Request, full_path: str):
+        return site.response(full_path, request.headers.get("accept-encoding"), request.headers.get("if-none-match"))
+
+    return app
+
+
+async def run(app: FastAPI, path: str, requests: int, headers: dict) -> tuple:
+    import httpx
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await client.get(path, headers=headers)
+        sent = 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            res = await client.get(path, headers=headers)
+            sent += len(res.content) if "content-encoding" not in res.headers else int(res.headers["content-length"])
+        return requests / (time.perf_counter() - started), sent / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark static SPA serving.")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        build_dist(root)
+        apps = {"old": old_app(root), "StaticSite": new_app(root)}
+        cases = [
+            ("index.html", "/", {"Accept-Encoding": BROWSER_ENCODING}),
+            ("client route", "/leaderboard", {"Accept-Encoding": BROWSER_ENCODING}),
+            ("hashed asset", "/" + ASSET, {"Accept-Encoding": BROWSER_ENCODING}),
+        ]
+        for name, path, headers in cases:
+            for label, app in apps.items():
+                rps, size = asyncio.run(run(app, path, args.requests, headers))
+                print(f"  {name:<13} {label:<11} {rps:10,.0f} req/s  {size / 1024:8.1f} KiB/response")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,66 @@
+import argparse
+import os
 import uvicorn
-from app.main import app
 
-def main():
-    print("Starting Snake Spectacle Game API...")
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+# Proxies on private networks (Render's load balancer, a compose/nginx sidecar) may set
+# X-Forwarded-For, so rate limits key on the real client instead of the proxy. uvicorn
+# takes the right-most address outside these ranges, so a client cannot spoof its own.
+PRIVATE_NETWORKS = "127.0.0.1,::1,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16,fc00::/7"
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the Snake Spectacle Game API.")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")),
+                        help="Worker processes (defaults to $WEB_CONCURRENCY or 1)")
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+                        help="Seconds to let in-flight requests finish on shutdown")
+    parser.add_argument("--reload", action="store_true", help="Auto-reload on code changes (development, single worker)")
+    args = parser.parse_args(argv)
+    if args.reload and args.workers > 1:
+        parser.error("--reload only works with a single worker")
+    return args
+
+def configure_workers(workers: int):
+    """Defaults that keep state consistent when several processes serve requests."""
+    if workers <= 1:
+        return
+    # Every worker must see the same live games
+    os.environ.setdefault("LIVE_GAME_BACKEND", "sqlite")
+    # A per-process response cache only sees its own worker's invalidations
+    if os.environ.setdefault("RESPONSE_CACHE_BACKEND", "none") == "memory":
+        print("Warning: RESPONSE_CACHE_BACKEND=memory with several workers can serve stale reads; use redis.")
+    # Each worker's rank index only counts its own writes; rank with COUNT queries instead
+    os.environ.setdefault("RANK_INDEX_ENABLED", "false")
+    # A cached principal would outlive a token revocation handled by another worker
+    os.environ.setdefault("AUTH_CACHE_SIZE", "0")
+    # A worker's name filter never sees signups taken by the others
+    os.environ.setdefault("NAME_FILTER_ENABLED", "false")
+    # Per-process rate limit budgets add up: each worker lets a client through at the full rate
+    if os.environ.get("RATE_LIMIT_BACKEND", "memory") == "memory":
+        print(f"Warning: RATE_LIMIT_BACKEND=memory with {workers} workers allows up to {workers}x the configured rates; use redis.")
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_workers(args.workers)
+    if args.workers > 1:
+        # Migrate and seed once, so workers don't race each other at boot
+        from app.database import ensure_schema, seed_db, settings
+        ensure_schema()
+        if settings.seed_on_startup:
+            seed_db()
+    print(f"Starting Snake Spectacle Game API with {args.workers} worker(s)...")
+    # SIGTERM/SIGINT: stop accepting, finish in-flight requests, then run the
+    # app's shutdown (drains the score queue, stops live game sync)
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=args.reload,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", PRIVATE_NETWORKS),
+    )
 
 
 if __name__ == "__main__":
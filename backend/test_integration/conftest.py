@@ -1,22 +1,30 @@
 import os
+
+# Use a separate database for integration tests (Postgres in CI, local SQLite).
+# Exported before the app is imported so startup work (seeding, rank index warm-up)
+# runs against the same database the tests talk to.
+TEST_DATABASE_URL = os.environ.setdefault("DATABASE_URL", "sqlite:///./test_integration.db")
+# Cheap scrypt cost; the tests check behaviour, not hash strength
+os.environ.setdefault("PASSWORD_SCRYPT_LOG_N", "10")
+# Every test signs up from the same client address; test_admission turns limits back on
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from typing import NamedTuple
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.main import app
-from app.database import get_db, Base
+from app.database import get_db, Base, async_engine
 # Explicitly import models to ensure valid registry in Base.metadata
 from app.db_models import DBUser, DBLeaderboard
 
-# Use a separate database for integration tests (Postgres in CI, local SQLite)
-TEST_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test_integration.db")
-
-# SQLAlchemy Setup
+# SQLAlchemy Setup (sync engine only creates and drops the schema)
 connect_args = {"check_same_thread": False} if TEST_DATABASE_URL.startswith("sqlite") else {}
 engine = create_engine(
     TEST_DATABASE_URL, connect_args=connect_args
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_database():
@@ -30,31 +38,50 @@ def setup_database():
     yield
     # Drop the tables after all tests in the session are done
     Base.metadata.drop_all(bind=engine)
-    # Remove the test database file
-    if os.path.exists("./test_integration.db"):
-        os.remove("./test_integration.db")
+    engine.dispose()
+    # Remove the test database file (and its WAL sidecars)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(f"./test_integration.db{suffix}"):
+            os.remove(f"./test_integration.db{suffix}")
 
-@pytest.fixture
-def db_session():
-    connection = engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
-    
-    yield session
-    
-    session.close()
-    transaction.rollback()
-    connection.close()
+async def _begin_session():
+    connection = await async_engine.connect()
+    transaction = await connection.begin()
+    session = AsyncSession(bind=connection, autoflush=False, expire_on_commit=False)
+    return connection, transaction, session
+
+async def _rollback_session(connection, transaction, session):
+    await session.close()
+    await transaction.rollback()
+    await connection.close()
 
 @pytest.fixture
-def client(db_session):
-    def override_get_db():
-        try:
+def client():
+    # Loopback, like an operator on the host: /api/_internal is only open to local clients
+    with TestClient(app, client=("127.0.0.1", 50000)) as c:
+        # Async connections belong to the app's event loop, so open the
+        # per-test transaction through the client's portal.
+        connection, transaction, db_session = c.portal.call(_begin_session)
+
+        async def override_get_db():
             yield db_session
+
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            yield c
         finally:
-            pass
-            
-    app.dependency_overrides[get_db] = override_get_db
-    with TestClient(app) as c:
-        yield c
-    app.dependency_overrides.clear()
+            app.dependency_overrides.clear()
+            c.portal.call(_rollback_session, connection, transaction, db_session)
+
+class Account(NamedTuple):
+    id: str
+    headers: dict
+
+@pytest.fixture
+def signup(client):
+    """Sign a user up through the API: signup("Name") -> (user id, auth headers)."""
+    def create(name: str) -> Account:
+        res = client.post("/api/auth/signup", json={"username": name, "email": f"{name.lower()}@example.com", "password": "pass"})
+        body = res.json()
+        return Account(body["user"]["id"], {"Authorization": f"Bearer {body['token']}"})
+    return create
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from app.admission import MemoryRateLimitBackend, admission
+from app.database import settings
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def limits_on(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+
+def test_gcra_allows_a_burst_then_the_steady_rate():
+    clock = FakeClock()
+    backend = MemoryRateLimitBackend(maxsize=2, clock=clock)
+    acquire = lambda key: asyncio.run(backend.acquire(key, 1.0, 3))
+    assert [acquire("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert acquire("a") == pytest.approx(1.0)
+    clock.now += 1.0
+    assert acquire("a") == 0.0
+    assert acquire("a") > 0
+
+    # The table never grows past maxsize; the oldest key is dropped
+    acquire("b")
+    acquire("c")
+    assert len(backend) == 2
+    assert acquire("a") == 0.0
+
+def test_login_is_limited_per_client_ip(client, limits_on, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_AUTH_BURST", 2)
+    credentials = {"email": "nobody@admission.com", "password": "wrong"}
+    assert [client.post("/api/auth/login", json=credentials).status_code for _ in range(2)] == [401, 401]
+    res = client.post("/api/auth/login", json=credentials)
+    assert res.status_code == 429 and int(res.headers["retry-after"]) >= 1
+
+def test_score_submits_are_limited_per_user(client, limits_on, monkeypatch, signup):
+    alice, bob = signup("AdmitAlice").headers, signup("AdmitBob").headers
+    monkeypatch.setattr(settings, "RATE_LIMIT_SCORE_BURST", 2)
+    submit = lambda headers: client.post("/api/leaderboard", json={"score": 10, "mode": "walls"}, headers=headers).status_code
+    assert [submit(alice) for _ in range(3)] == [200, 200, 429]
+    # Another player has their own budget
+    assert submit(bob) == 200
+    assert admission.stats()["limited"] >= 1
+
+def test_concurrency_cap_sheds_with_503(client, monkeypatch, signup):
+    headers = signup("AdmitCarol").headers
+    monkeypatch.setattr(admission, "max_concurrent", 1)
+    monkeypatch.setattr(admission, "in_flight", 1)
+    res = client.post("/api/leaderboard", json={"score": 10, "mode": "walls"}, headers=headers)
+    assert res.status_code == 503 and res.headers["retry-after"] == "1"
+
+def test_forwarded_client_is_used_behind_a_private_proxy():
+    from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+    from main import PRIVATE_NETWORKS
+
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(scope["client"][0])
+
+    proxied = ProxyHeadersMiddleware(app, trusted_hosts=PRIVATE_NETWORKS)
+
+    def request(peer, forwarded_for):
+        scope = {"type": "http", "client": (peer, 1234), "headers": [(b"x-forwarded-for", forwarded_for.encode())]}
+        asyncio.run(proxied(scope, None, None))
+        return seen[-1]
+
+    # The load balancer's address is replaced by the client it appended
+    assert request("10.0.3.7", "198.51.100.4") == "198.51.100.4"
+    # Addresses the client wrote itself are ignored
+    assert request("10.0.3.7", "127.0.0.1, 198.51.100.4") == "198.51.100.4"
+    # A client connecting directly cannot pick its address
+    assert request("198.51.100.4", "203.0.113.9") == "198.51.100.4"
@@ -0,0 +1,46 @@
+import jwt
+from app.cache import TTLCache
+from app.routers.auth import principal_cache, SECRET_KEY, ALGORITHM
+
+def test_token_carries_id_and_version(client, signup):
+    user_id, headers = signup("ClaimsUser")
+    token = headers["Authorization"].split()[1]
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    assert payload["sub"] == user_id
+    assert payload["ver"] == 0
+
+def test_principal_is_cached_and_invalidated_on_submit(client, signup):
+    user_id, headers = signup("CachedUser")
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+    assert principal_cache.get(user_id) is not None
+
+    client.post("/api/leaderboard", json={"score": 320, "mode": "walls"}, headers=headers)
+    assert principal_cache.get(user_id) is None
+
+    me = client.get("/api/auth/me", headers=headers).json()
+    assert me["highScore"] == 320
+    assert me["gamesPlayed"] == 1
+
+def test_stale_token_version_rejected(client, signup):
+    user_id, headers = signup("RevokedUser")
+    token = jwt.encode({"sub": user_id, "ver": 7}, SECRET_KEY, algorithm=ALGORITHM)
+    res = client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 401
+
+def test_legacy_email_token_rejected(client, signup):
+    signup("LegacyUser")
+    token = jwt.encode({"sub": "legacyuser@example.com"}, SECRET_KEY, algorithm=ALGORITHM)
+    res = client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 401
+
+def test_ttl_cache_expiry_and_lru():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    now[0] = 11
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,68 @@
+import re
+import time
+from app.name_filter import BloomFilter, NameFilter, name_filter
+
+def _queries(client, labels):
+    text = client.get("/api/_internal/metrics").text
+    match = re.search(rf"^db_queries_per_request_sum{{{re.escape(labels)}}} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for n in range(1000):
+        bloom.add(f"player{n}")
+    assert all(f"player{n}" in bloom for n in range(1000))
+    false_positives = sum(f"stranger{n}" in bloom for n in range(10_000))
+    assert false_positives < 300
+    assert 0.005 < bloom.expected_error_rate() < 0.02
+
+def test_signups_on_another_worker_are_never_reported_free():
+    # Two workers' filters, both warmed before the signup reached worker A
+    worker_a, worker_b = NameFilter(min_capacity=1000), NameFilter(min_capacity=1000)
+    worker_a.ready = worker_b.ready = True
+    worker_a.add("Elsewhere", "elsewhere@names.com")
+    assert worker_a.maybe_taken("username", "Elsewhere")
+    # Worker B never saw it, so its filter alone would call the name free
+    assert not worker_b.maybe_taken("username", "Elsewhere")
+
+    # What the launcher runs with several workers: every check goes to the database
+    worker_a, worker_b = NameFilter(min_capacity=1000, enabled=False), NameFilter(min_capacity=1000, enabled=False)
+    worker_a.ready = worker_b.ready = True
+    worker_a.add("Elsewhere", "elsewhere@names.com")
+    assert worker_b.maybe_taken("username", "Elsewhere")
+    assert worker_b.maybe_taken("email", "elsewhere@names.com")
+    assert worker_b.filtered == 0
+
+def test_availability_checks_usernames_and_emails(client):
+    client.post("/api/auth/signup", json={"username": "Avail", "email": "avail@names.com", "password": "pass"})
+
+    res = client.get("/api/auth/availability", params={"username": "Avail", "email": "avail@names.com"})
+    assert res.json() == {"usernameAvailable": False, "emailAvailable": False}
+
+    # The filter is built in the background after startup
+    for _ in range(200):
+        if name_filter.ready:
+            break
+        time.sleep(0.01)
+    filtered = name_filter.filtered
+    res = client.get("/api/auth/availability", params={"username": "NeverSeenBefore"})
+    assert res.json() == {"usernameAvailable": True, "emailAvailable": None}
+    # Answered by the filter alone
+    assert name_filter.filtered == filtered + 1
+
+    assert client.get("/api/auth/availability").status_code == 400
+    assert client.get("/api/auth/availability", params={"email": "not-an-email"}).status_code == 422
+
+def test_signup_is_a_single_insert(client):
+    labels = 'method="POST",route="/api/auth/signup",status="201"'
+    before = _queries(client, labels)
+    res = client.post("/api/auth/signup", json={"username": "OneShot", "email": "oneshot@names.com", "password": "pass"})
+    assert res.status_code == 201 and res.json()["user"]["username"] == "OneShot"
+    assert _queries(client, labels) - before == 1
+
+    taken = client.post("/api/auth/signup", json={"username": "OneShot", "email": "other@names.com", "password": "pass"})
+    assert taken.status_code == 409 and taken.json()["detail"] == "Username already taken"
+    taken = client.post("/api/auth/signup", json={"username": "Other", "email": "oneshot@names.com", "password": "pass"})
+    assert taken.status_code == 409 and taken.json()["detail"] == "Email already registered"
+    # The conflicts left the new user in place
+    assert client.post("/api/auth/login", json={"email": "oneshot@names.com", "password": "pass"}).status_code == 200
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, select
+from app.best_scores import rebuild_best_scores
+from app.database import Base
+from app.db_models import DBLeaderboard, DBUser, DBUserBestScore
+
+def _entries(client, **params):
+    return [e for e in client.get("/api/leaderboard", params={"limit": 100, **params}).json() if e["username"] == "Repeat"]
+
+def test_distinct_keeps_one_best_row_per_mode(client, signup):
+    headers = signup("Repeat").headers
+    for score, mode in [(400, "walls"), (900, "walls"), (650, "walls"), (300, "pass-through")]:
+        assert client.post("/api/leaderboard", json={"score": score, "mode": mode}, headers=headers).status_code == 200
+    client.post("/api/leaderboard/batch", json={"scores": [{"score": 800, "mode": "walls"}, {"score": 350, "mode": "pass-through"}]}, headers=headers)
+
+    assert len(_entries(client)) == 6
+    best = _entries(client, distinct="true")
+    assert sorted((e["mode"], e["score"]) for e in best) == [("pass-through", 350), ("walls", 900)]
+
+    # The id points at the leaderboard row the best came from
+    walls = next(e for e in best if e["mode"] == "walls")
+    assert walls["id"] in {e["id"] for e in _entries(client, mode="walls")}
+
+    top = client.get("/api/leaderboard/top", params={"n": 100, "distinct": "true"}).json()
+    assert [e["score"] for e in top["walls"] if e["username"] == "Repeat"] == [900]
+
+def test_tied_best_keeps_earliest_submission(client, signup):
+    headers = signup("Repeat").headers
+    first = client.post("/api/leaderboard", json={"score": 500, "mode": "walls"}, headers=headers)
+    client.post("/api/leaderboard", json={"score": 500, "mode": "walls"}, headers=headers)
+    assert first.status_code == 200
+
+    rows = _entries(client, mode="walls")
+    best = _entries(client, mode="walls", distinct="true")
+    assert len(rows) == 2 and len(best) == 1
+    assert best[0]["date"] == min(r["date"] for r in rows)
+
+def test_distinct_pages_do_not_repeat_players(client, signup):
+    for i in range(5):
+        headers = signup(f"Pager{i}").headers
+        for score in (100 + 10 * i, 200 + 10 * i):
+            client.post("/api/leaderboard", json={"score": score, "mode": "walls"}, headers=headers)
+
+    seen, cursor = [], None
+    while True:
+        params = {"mode": "walls", "limit": 2, "distinct": "true"}
+        if cursor:
+            params["cursor"] = cursor
+        res = client.get("/api/leaderboard", params=params)
+        seen.extend(e["username"] for e in res.json())
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen))
+    assert {f"Pager{i}" for i in range(5)} <= set(seen)
+
+def test_rebuild_from_history():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(DBUser.__table__.insert(), [
+            {"id": "a", "username": "A", "email": "a@x.com", "password": "x"},
+            {"id": "b", "username": "B", "email": "b@x.com", "password": "x"},
+        ])
+        conn.execute(DBLeaderboard.__table__.insert(), [
+            {"id": "1", "userId": "a", "username": "A", "score": 10, "mode": "walls", "date": start},
+            {"id": "2", "userId": "a", "username": "A", "score": 30, "mode": "walls", "date": start + timedelta(1)},
+            {"id": "3", "userId": "a", "username": "A", "score": 30, "mode": "walls", "date": start + timedelta(2)},
+            {"id": "4", "userId": "a", "username": "A", "score": 5, "mode": "pass-through", "date": start},
+            {"id": "5", "userId": "b", "username": "B", "score": 20, "mode": "walls", "date": start},
+        ])
+        # Stale projection rows are replaced
+        conn.execute(DBUserBestScore.__table__.insert(), [
+            {"userId": "b", "mode": "walls", "username": "B", "score": 999, "date": start, "entryId": "gone"},
+        ])
+        assert rebuild_best_scores(conn) == 3
+        rows = conn.execute(select(DBUserBestScore.__table__).order_by("userId", "mode")).all()
+    assert [(r.userId, r.mode, r.score, r.entryId) for r in rows] == [
+        ("a", "pass-through", 5, "4"),
+        ("a", "walls", 30, "2"),
+        ("b", "walls", 20, "5"),
+    ]
@@ -0,0 +1,97 @@
+import random
+from datetime import datetime
+import pytest
+from pydantic import ValidationError
+from app.engine import SnakeGame, max_score
+from app.models import MAX_SCORE, Direction, GameMode, LiveGame, Point, SubmitScoreRequest
+
+def _game(mode, snake, food, direction=Direction.RIGHT, size=20):
+    cells = [y * size + x for x, y in snake]
+    return SnakeGame(mode, cells, food[1] * size + food[0], direction, grid_size=size, rng=random.Random(0))
+
+def _xy(game):
+    return [(int(p.x), int(p.y)) for p in game.snake]
+
+def test_new_game_matches_initial_state():
+    game = SnakeGame.new(GameMode.walls)
+    assert _xy(game) == [(10, 10), (9, 10), (8, 10)]
+    assert game.direction == Direction.RIGHT and game.score == 0 and game.speed == 150
+    assert game.food not in game.body
+
+def test_walls_end_the_game_and_pass_through_wraps():
+    walls = _game(GameMode.walls, [(19, 5), (18, 5), (17, 5)], (0, 0))
+    assert walls.tick() is False and walls.over
+    # The state is left as it was, like moveSnake returning the old state
+    assert _xy(walls) == [(19, 5), (18, 5), (17, 5)]
+
+    wrap = _game(GameMode.pass_through, [(19, 5), (18, 5), (17, 5)], (0, 0))
+    assert wrap.tick() is True
+    assert _xy(wrap) == [(0, 5), (19, 5), (18, 5)]
+
+    up = _game(GameMode.pass_through, [(3, 0), (3, 1), (3, 2)], (9, 9), Direction.UP)
+    up.tick()
+    assert _xy(up)[0] == (3, 19)
+
+def test_eating_grows_scores_and_speeds_up():
+    game = _game(GameMode.walls, [(5, 5), (4, 5), (3, 5)], (6, 5))
+    assert game.tick()
+    assert _xy(game) == [(6, 5), (5, 5), (4, 5), (3, 5)]
+    assert game.score == 10 and game.speed == 145
+    assert game.food not in game.body
+
+def test_self_collision_but_not_with_the_moving_tail():
+    # A 2x2 loop: the head may follow the tail into the cell it is leaving
+    loop = _game(GameMode.walls, [(5, 5), (5, 6), (4, 6), (4, 5)], (10, 10), Direction.UP)
+    assert loop.turn(Direction.LEFT)
+    assert loop.tick()
+
+    hook = _game(GameMode.walls, [(5, 5), (5, 6), (4, 6), (4, 5), (4, 4)], (10, 10), Direction.UP)
+    hook.turn(Direction.LEFT)
+    assert hook.tick() is False
+
+def test_reversing_is_ignored():
+    game = _game(GameMode.walls, [(5, 5), (4, 5), (3, 5)], (10, 10))
+    assert game.turn(Direction.LEFT) is False
+    game.tick()
+    assert _xy(game)[0] == (6, 5)
+
+def test_same_seed_replays_the_same_game():
+    def play(seed):
+        game = SnakeGame.new(GameMode.pass_through, rng=random.Random(seed))
+        foods, turns = [], random.Random(99)
+        for _ in range(500):
+            game.turn(turns.choice(list(Direction)))
+            if not game.tick():
+                break
+            foods.append(game.food)
+        return foods, game.score
+
+    assert play(7) == play(7)
+
+def test_food_fills_the_last_free_cells():
+    # 2x2 board with three cells taken: only one place is left for food
+    game = SnakeGame(GameMode.pass_through, [0, 1, 3], None, grid_size=2)
+    assert game.food == 2
+    game.turn(Direction.DOWN)
+    assert game.tick() is False and game.score == 10 and game.food is None
+
+def test_round_trip_with_live_game():
+    live = LiveGame(
+        id="g1", playerId="p1", playerName="P", score=30, mode=GameMode.walls, startedAt=datetime.now(),
+        snake=[Point(x=2, y=2), Point(x=1, y=2)], food=Point(x=3, y=2), direction=Direction.RIGHT,
+    )
+    game = SnakeGame.from_live_game(live)
+    game.tick()
+    updated = game.apply_to(live)
+    assert updated.id == "g1" and updated.score == 40
+    assert [(p.x, p.y) for p in updated.snake] == [(3, 2), (2, 2), (1, 2)]
+
+    with pytest.raises(ValueError):
+        SnakeGame.from_live_game(live.model_copy(update={"food": Point.model_construct(x=25, y=0)}))
+
+def test_possible_scores():
+    assert max_score() == 3970 == MAX_SCORE
+    assert SubmitScoreRequest(score=2450, mode="walls").score == 2450
+    for impossible in (105, max_score() + 10, -10):
+        with pytest.raises(ValidationError):
+            SubmitScoreRequest(score=impossible, mode="walls")
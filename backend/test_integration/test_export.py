@@ -0,0 +1,59 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+from app.database import settings
+from app.exports import accepts_gzip
+
+def _ours(rows):
+    return [row for row in rows if row["username"] == "Exporter"]
+
+def _ndjson(res):
+    return [json.loads(line) for line in res.text.splitlines()]
+
+def test_export_streams_history_oldest_first(client, monkeypatch, signup):
+    headers = signup("Exporter").headers
+    for score in (30, 10, 20):
+        client.post("/api/leaderboard", json={"score": score, "mode": "walls"}, headers=headers)
+    client.post("/api/leaderboard", json={"score": 40, "mode": "pass-through"}, headers=headers)
+    # Several cursor partitions per export
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+
+    res = client.get("/api/leaderboard/export", headers={"Accept-Encoding": "identity"})
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/x-ndjson"
+    rows = _ndjson(res)
+    assert [row["score"] for row in _ours(rows)] == [30, 10, 20, 40]
+    assert [(row["date"], row["id"]) for row in rows] == sorted((row["date"], row["id"]) for row in rows)
+
+    walls = _ndjson(client.get("/api/leaderboard/export", params={"mode": "walls"}))
+    assert [row["score"] for row in _ours(walls)] == [30, 10, 20]
+
+def test_export_resumes_after_an_entry_and_filters_dates(client, signup):
+    headers = signup("Exporter").headers
+    for score in (10, 20, 30):
+        client.post("/api/leaderboard", json={"score": score, "mode": "walls"}, headers=headers)
+    rows = _ours(_ndjson(client.get("/api/leaderboard/export")))
+
+    resumed = _ours(_ndjson(client.get("/api/leaderboard/export", params={"after": rows[0]["id"]})))
+    assert [row["id"] for row in resumed] == [row["id"] for row in rows[1:]]
+    assert client.get("/api/leaderboard/export", params={"after": "missing"}).status_code == 400
+
+    tomorrow = (datetime.now() + timedelta(days=1)).isoformat()
+    assert _ndjson(client.get("/api/leaderboard/export", params={"since": tomorrow})) == []
+    assert len(_ours(_ndjson(client.get("/api/leaderboard/export", params={"until": tomorrow})))) == 3
+
+def test_export_csv_and_gzip(client, signup):
+    headers = signup("Exporter").headers
+    client.post("/api/leaderboard", json={"score": 50, "mode": "walls"}, headers=headers)
+
+    with client.stream("GET", "/api/leaderboard/export", params={"format": "csv"}, headers={"Accept-Encoding": "gzip"}) as res:
+        assert res.headers["content-encoding"] == "gzip"
+        assert res.headers["content-type"].startswith("text/csv")
+        text = gzip.decompress(b"".join(res.iter_raw())).decode()
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert list(rows[0]) == ["id", "username", "score", "mode", "date"]
+    assert [row["score"] for row in rows if row["username"] == "Exporter"] == ["50"]
+
+    assert accepts_gzip("br, gzip;q=0.8") and not accepts_gzip("gzip;q=0") and not accepts_gzip(None)
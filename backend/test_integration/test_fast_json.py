@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from pydantic import TypeAdapter
+from typing import List
+from app import fast_json
+from app.database import settings
+from app.main import app
+from app.models import LeaderboardEntry
+from app.response_cache import response_cache
+
+# Usernames that exercise escaping: quotes, backslashes, HTML, non-ASCII, control and separator chars
+NAMES = ['Zoë "Z" \\o/', "</script>", "蛇使い", "tab\there\x01", "line\u2028sep"]
+
+def _get(client, fast: bool, monkeypatch, url, **params):
+    monkeypatch.setattr(settings, "FAST_JSON", fast)
+    # Both paths must be exercised, not served from the response cache
+    client.portal.call(response_cache.clear)
+    return client.get(url, params=params)
+
+@pytest.fixture
+def seeded(client):
+    tokens = []
+    for i, name in enumerate(NAMES):
+        res = client.post("/api/auth/signup", json={"username": name, "email": f"fast{i}@json.com", "password": "pass"})
+        headers = {"Authorization": f"Bearer {res.json()['token']}"}
+        tokens.append(headers)
+        for score in (100 * i + 7, 100 * i + 7, 50 * i):
+            client.post("/api/leaderboard", json={"score": score, "mode": ("walls", "pass-through")[i % 2]}, headers=headers)
+    client.post("/api/games", json={
+        "mode": "walls", "snake": [{"x": 3, "y": 4}, {"x": 2, "y": 4}], "food": {"x": 9, "y": 9}, "direction": "RIGHT", "score": 12,
+    }, headers=tokens[0])
+    return client
+
+@pytest.mark.parametrize("url,params", [
+    ("/api/leaderboard", {}),
+    ("/api/leaderboard", {"mode": "walls", "limit": 3}),
+    ("/api/leaderboard", {"distinct": "true"}),
+    ("/api/leaderboard/top", {"n": 5}),
+    ("/api/leaderboard/top", {"n": 5, "distinct": "true"}),
+    ("/api/games", {}),
+    ("/api/games", {"mode": "walls"}),
+])
+def test_fast_path_is_byte_identical(seeded, monkeypatch, url, params):
+    slow = _get(seeded, False, monkeypatch, url, **params)
+    fast = _get(seeded, True, monkeypatch, url, **params)
+    assert slow.status_code == fast.status_code == 200
+    assert fast.content == slow.content
+    assert fast.headers["content-type"] == slow.headers["content-type"]
+    assert fast.headers.get("x-next-cursor") == slow.headers.get("x-next-cursor")
+
+def _pages(client, fast, monkeypatch):
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        res = _get(client, fast, monkeypatch, "/api/leaderboard", **params)
+        pages.append(res.content)
+        cursor = res.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+
+def test_fast_path_pages_match(seeded, monkeypatch):
+    slow_pages = _pages(seeded, False, monkeypatch)
+    assert len(slow_pages) > 1
+    assert _pages(seeded, True, monkeypatch) == slow_pages
+
+def test_single_game_is_byte_identical(seeded, monkeypatch):
+    game_id = seeded.get("/api/games").json()[-1]["id"]
+    slow = _get(seeded, False, monkeypatch, f"/api/games/{game_id}")
+    fast = _get(seeded, True, monkeypatch, f"/api/games/{game_id}")
+    assert fast.content == slow.content
+
+def test_encoder_matches_pydantic_for_edge_values():
+    dates = [
+        datetime(2025, 1, 1),
+        datetime(2025, 1, 1, 12, 30, 5, 120),
+        datetime(2025, 1, 1, tzinfo=timezone.utc),
+        datetime(2025, 1, 1, 8, tzinfo=timezone(timedelta(hours=2))),
+    ]
+    rows = [
+        {"id": str(i), "username": NAMES[i % len(NAMES)], "score": 2 ** 40 + i, "mode": "walls", "date": d}
+        for i, d in enumerate(dates)
+    ]
+    adapter = TypeAdapter(List[LeaderboardEntry])
+    assert fast_json.dumps(rows) == adapter.dump_json(adapter.validate_python(rows))
+
+def test_openapi_still_describes_models():
+    paths = app.openapi()["paths"]
+    leaderboard = paths["/api/leaderboard"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert leaderboard["items"]["$ref"].endswith("/LeaderboardEntry")
+    games = paths["/api/games"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert games["items"]["$ref"].endswith("/LiveGame")
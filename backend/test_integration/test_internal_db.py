@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.database import engine, settings
+from app.main import app
+
+def test_db_status_endpoint(client):
+    response = client.get("/api/_internal/db")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["dialect"] in ("sqlite", "postgresql")
+    pool = data["pools"]["async"]
+    assert "class" in pool
+    if "size" in pool:
+        assert 0 <= pool["utilization"] <= 1
+
+def test_internal_routes_hidden_from_schema(client):
+    paths = client.get("/openapi.json").json()["paths"]
+    assert not any(path.startswith("/api/_internal") for path in paths)
+
+def test_internal_routes_need_loopback_or_token(client, monkeypatch):
+    remote = TestClient(app, client=("203.0.113.7", 50000))
+    assert remote.get("/api/_internal/metrics").status_code == 403
+    # Proxied requests are never local, even if the proxy connects from loopback
+    assert client.get("/api/_internal/metrics", headers={"X-Forwarded-For": "127.0.0.1"}).status_code == 403
+
+    monkeypatch.setattr(settings, "INTERNAL_TOKEN", "s3cret")
+    assert client.get("/api/_internal/cache").status_code == 403
+    assert remote.get("/api/_internal/cache", headers={"X-Internal-Token": "wrong"}).status_code == 403
+    assert remote.get("/api/_internal/cache", headers={"X-Internal-Token": "s3cret"}).status_code == 200
+
+def test_sqlite_pragmas_applied():
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() > 0
@@ -0,0 +1,68 @@
+def test_keyset_pagination_walks_all_rows(client, signup):
+    """
+    Pages fetched with X-Next-Cursor should cover every row exactly once, in order.
+    """
+    headers = signup("PageWalker").headers
+    for score in [50, 70, 70, 30, 90, 70, 10]:
+        client.post("/api/leaderboard", json={"score": score, "mode": "walls"}, headers=headers)
+
+    seen = []
+    cursor = None
+    while True:
+        url = "/api/leaderboard?mode=walls&limit=2"
+        if cursor:
+            url += f"&cursor={cursor}"
+        res = client.get(url)
+        assert res.status_code == 200
+        page = res.json()
+        assert len(page) <= 2
+        seen.extend(page)
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    ids = [e["id"] for e in seen]
+    assert len(ids) == len(set(ids))
+    scores = [e["score"] for e in seen]
+    assert scores == sorted(scores, reverse=True)
+    assert scores.count(70) == 3
+
+def test_limit_is_bounded(client):
+    assert client.get("/api/leaderboard?limit=0").status_code == 422
+    assert client.get("/api/leaderboard?limit=100000").status_code == 422
+
+def test_invalid_cursor(client):
+    res = client.get("/api/leaderboard?cursor=not-a-cursor")
+    assert res.status_code == 400
+
+def test_top_per_mode(client, signup):
+    headers = signup("TopTester").headers
+    client.post("/api/leaderboard", json={"score": 3970, "mode": "pass-through"}, headers=headers)
+
+    res = client.get("/api/leaderboard/top?n=3")
+    assert res.status_code == 200
+    top = res.json()
+    assert set(top.keys()) == {"walls", "pass-through"}
+    assert all(len(entries) <= 3 for entries in top.values())
+    assert all(e["mode"] == "walls" for e in top["walls"])
+    assert top["pass-through"][0]["score"] == 3970
+
+def test_backfill_gives_undated_rows_a_date(tmp_path):
+    from sqlalchemy import create_engine, text
+    from app.database import backfill_entry_dates
+
+    # Layout of a database from before leaderboard.date was required
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with legacy.begin() as conn:
+        conn.execute(text('CREATE TABLE users (id VARCHAR PRIMARY KEY, "createdAt" DATETIME)'))
+        conn.execute(text('CREATE TABLE leaderboard (id VARCHAR PRIMARY KEY, "userId" VARCHAR, score INTEGER, date DATETIME)'))
+        conn.execute(text("INSERT INTO users VALUES ('u1', '2024-01-02 03:04:05.000000')"))
+        conn.execute(text("INSERT INTO leaderboard VALUES ('a', 'u1', 10, NULL), ('b', 'gone', 20, NULL), "
+                          "('c', 'u1', 30, '2024-02-01 00:00:00.000000')"))
+        assert backfill_entry_dates(conn) == 2
+        dates = dict(conn.execute(text("SELECT id, date FROM leaderboard")).all())
+    assert dates["a"] == "2024-01-02 03:04:05.000000"
+    assert dates["b"] is not None and dates["c"] == "2024-02-01 00:00:00.000000"
+    with legacy.begin() as conn:
+        assert backfill_entry_dates(conn) == 0
+    legacy.dispose()
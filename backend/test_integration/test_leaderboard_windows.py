@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, select
+from app.database import Base
+from app.db_models import DBLeaderboard, DBUser, DBWindowBestScore
+from app.models import LeaderboardWindow
+from app.windowed_scores import compact_window_scores, rebuild_window_scores, window_start
+
+def test_window_starts():
+    sunday = datetime(2026, 10, 18, 21, 30)
+    assert window_start(LeaderboardWindow.day, sunday) == datetime(2026, 10, 18)
+    assert window_start(LeaderboardWindow.week, sunday) == datetime(2026, 10, 12)
+    assert window_start(LeaderboardWindow.month, sunday) == datetime(2026, 10, 1)
+
+def test_windowed_board_lists_each_players_best(client, signup):
+    alice, bob = signup("WinAlice").headers, signup("WinBob").headers
+    for score, headers in [(300, alice), (700, alice), (500, bob)]:
+        client.post("/api/leaderboard", json={"score": score, "mode": "walls"}, headers=headers)
+    client.post("/api/leaderboard", json={"score": 900, "mode": "pass-through"}, headers=bob)
+
+    for window in ("day", "week", "month"):
+        entries = client.get("/api/leaderboard", params={"mode": "walls", "window": window, "limit": 100}).json()
+        ours = [(e["username"], e["score"]) for e in entries if e["username"].startswith("Win")]
+        assert ours == [("WinAlice", 700), ("WinBob", 500)]
+
+    top = client.get("/api/leaderboard/top", params={"window": "week", "n": 100}).json()
+    assert [e["score"] for e in top["pass-through"] if e["username"] == "WinBob"] == [900]
+    assert client.get("/api/leaderboard", params={"window": "year"}).status_code == 422
+
+def test_rebuild_and_compact():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    now = datetime(2026, 10, 15, 12, 0)
+    with engine.begin() as conn:
+        conn.execute(DBUser.__table__.insert(), [{"id": "a", "username": "A", "email": "a@x.com", "password": "x"}])
+        conn.execute(DBLeaderboard.__table__.insert(), [
+            {"id": "today", "userId": "a", "username": "A", "score": 10, "mode": "walls", "date": now},
+            {"id": "monday", "userId": "a", "username": "A", "score": 40, "mode": "walls", "date": datetime(2026, 10, 12, 9)},
+            {"id": "lastmonth", "userId": "a", "username": "A", "score": 99, "mode": "walls", "date": datetime(2026, 9, 30)},
+        ])
+        assert rebuild_window_scores(conn, now) == 3
+        best = {r.window: r.entryId for r in conn.execute(select(DBWindowBestScore.__table__))}
+        assert best == {"day": "today", "week": "monday", "month": "monday"}
+
+        # A day later the day bucket is stale; the week and month buckets still hold
+        assert compact_window_scores(conn, now + timedelta(days=1)) == 1
+        # After the month ends nothing is current
+        assert compact_window_scores(conn, datetime(2026, 11, 2)) == 2
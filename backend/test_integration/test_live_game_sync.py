@@ -0,0 +1,120 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+import main as launcher
+from app.live_game_sync import SqliteLiveGameSync
+from app.live_games import LiveGameRegistry
+from app.models import LiveGame
+
+def _game(game_id, score=0):
+    return LiveGame(
+        id=game_id, playerId="p1", playerName="Shared", score=score, mode="walls", startedAt=datetime.now(),
+        snake=[{"x": 5, "y": 5}, {"x": 4, "y": 5}], food={"x": 1, "y": 1}, direction="RIGHT",
+    )
+
+def _worker(path):
+    registry = LiveGameRegistry()
+    return registry, SqliteLiveGameSync(registry, str(path))
+
+def test_workers_see_each_others_games(tmp_path):
+    path = tmp_path / "live.db"
+    registry_a, sync_a = _worker(path)
+    registry_b, sync_b = _worker(path)
+    changes_b = []
+    registry_b.add_listener(lambda game_id, before, after: changes_b.append((game_id, before, after)))
+
+    async def run():
+        sync_a.open()
+        sync_b.open()
+        try:
+            registry_a.add(_game("g1"))
+            await sync_a.flush()
+            assert await sync_b.poll() == 1
+            assert registry_b.get("g1").playerName == "Shared"
+
+            registry_a.update("g1", score=50)
+            await sync_a.flush()
+            await sync_b.poll()
+            assert registry_b.get("g1").score == 50
+            # Listeners on B (spectator sockets) see the same transition
+            assert changes_b[-1][1].score == 0 and changes_b[-1][2].score == 50
+
+            registry_b.remove("g1")
+            await sync_b.flush()
+            await sync_a.poll()
+            assert registry_a.get("g1") is None
+
+            # Replayed changes are not echoed back into the log
+            assert await sync_a.poll() == 0
+            assert await sync_b.poll() == 0
+        finally:
+            sync_a.close()
+            sync_b.close()
+
+    asyncio.run(run())
+
+def test_late_worker_loads_current_games(tmp_path):
+    path = tmp_path / "live.db"
+    registry_a, sync_a = _worker(path)
+
+    async def run():
+        sync_a.open()
+        registry_a.add(_game("g1", score=10))
+        registry_a.add(_game("g2"))
+        registry_a.remove("g2")
+        await sync_a.flush()
+
+        registry_c, sync_c = _worker(path)
+        sync_c.open()
+        try:
+            assert [g.id for g in registry_c.list()] == ["g1"]
+            assert registry_c.get("g1").score == 10
+            # Events before the snapshot are not replayed again
+            assert await sync_c.poll() == 0
+        finally:
+            sync_a.close()
+            sync_c.close()
+
+    asyncio.run(run())
+
+def test_publish_does_not_block_the_event_loop(tmp_path):
+    path = tmp_path / "live.db"
+    registry_a, sync_a = _worker(path)
+    registry_b, sync_b = _worker(path)
+
+    async def run():
+        sync_a.open()
+        sync_b.open()
+        # Another worker holding the write lock
+        sync_b._writer.execute("BEGIN IMMEDIATE")
+        try:
+            started = time.perf_counter()
+            for i in range(3):
+                registry_a.add(_game(f"g{i}"))
+            assert time.perf_counter() - started < 0.5
+            await asyncio.sleep(0.1)
+        finally:
+            sync_b._writer.execute("COMMIT")
+        await sync_a.flush()
+        assert await sync_b.poll() == 3
+        sync_a.close()
+        sync_b.close()
+
+    asyncio.run(run())
+
+def test_launcher_shares_state_across_workers(monkeypatch, capsys):
+    # A private copy: configure_workers sets defaults in os.environ, which must not leak
+    defaults = ("LIVE_GAME_BACKEND", "RESPONSE_CACHE_BACKEND", "NAME_FILTER_ENABLED", "RANK_INDEX_ENABLED", "AUTH_CACHE_SIZE")
+    environ = {k: v for k, v in os.environ.items() if k not in defaults}
+    monkeypatch.setattr(os, "environ", environ)
+    args = launcher.parse_args(["--workers", "4", "--port", "9000"])
+    assert (args.workers, args.port, args.reload) == (4, 9000, False)
+    launcher.configure_workers(args.workers)
+    assert os.environ["LIVE_GAME_BACKEND"] == "sqlite"
+    assert os.environ["RESPONSE_CACHE_BACKEND"] == "none"
+    assert os.environ["NAME_FILTER_ENABLED"] == "false"
+    assert os.environ["RANK_INDEX_ENABLED"] == "false"
+    assert os.environ["AUTH_CACHE_SIZE"] == "0"
+    # Per-worker rate limit budgets are called out
+    assert "RATE_LIMIT_BACKEND=memory with 4 workers" in capsys.readouterr().out
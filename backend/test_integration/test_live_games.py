@@ -41,3 +41,108 @@ def test_get_nonexistent_game(client):
     response = client.get("/api/games/non-existent-id-999")
     assert response.status_code == 404
     assert "not found" in response.json()["detail"].lower()
+
+def test_publish_update_and_end_game(client, signup):
+    """
+    A player can create a game, push state updates, and end it.
+    """
+    headers = signup("Streamer").headers
+    body = {"mode": "walls", "snake": [{"x": 3, "y": 3}, {"x": 2, "y": 3}], "food": {"x": 9, "y": 9}, "direction": "RIGHT"}
+    res = client.post("/api/games", json=body, headers=headers)
+    assert res.status_code == 201
+    game = res.json()
+    assert game["playerName"] == "Streamer"
+    assert game["score"] == 0
+
+    res = client.put(f"/api/games/{game['id']}", json={"score": 10, "direction": "DOWN"}, headers=headers)
+    assert res.status_code == 200
+    assert res.json()["score"] == 10
+    assert res.json()["direction"] == "DOWN"
+    assert res.json()["snake"] == body["snake"]
+
+    # Secondary indexes
+    by_player = client.get(f"/api/games?playerId={game['playerId']}").json()
+    assert [g["id"] for g in by_player] == [game["id"]]
+    assert all(g["mode"] == "walls" for g in client.get("/api/games?mode=walls").json())
+
+    # Only the owner may modify it
+    other = signup("Intruder").headers
+    assert client.put(f"/api/games/{game['id']}", json={"score": 99}, headers=other).status_code == 403
+    assert client.delete(f"/api/games/{game['id']}", headers=other).status_code == 403
+
+    assert client.delete(f"/api/games/{game['id']}", headers=headers).status_code == 204
+    assert client.get(f"/api/games/{game['id']}").status_code == 404
+
+def test_update_keeps_typed_points(client, signup):
+    """
+    Updated snake/food are stored as Point models, not the dicts they arrive as.
+    """
+    from app.database import live_games_db
+    from app.models import Point
+
+    headers = signup("Reshaper").headers
+    body = {"mode": "walls", "snake": [{"x": 3, "y": 3}], "food": {"x": 9, "y": 9}, "direction": "RIGHT"}
+    game_id = client.post("/api/games", json=body, headers=headers).json()["id"]
+    update = {"snake": [{"x": 4, "y": 3}, {"x": 3, "y": 3}], "food": {"x": 1, "y": 2}}
+    res = client.put(f"/api/games/{game_id}", json=update, headers=headers)
+    assert res.status_code == 200 and res.json()["food"] == update["food"]
+
+    stored = live_games_db.get(game_id)
+    assert isinstance(stored.food, Point) and (stored.food.x, stored.food.y) == (1, 2)
+    assert all(isinstance(p, Point) for p in stored.snake) and stored.snake[0].x == 4
+    assert client.get(f"/api/games/{game_id}?encoding=base64").status_code == 200
+    client.delete(f"/api/games/{game_id}", headers=headers)
+
+def test_publish_requires_auth(client):
+    body = {"mode": "walls", "snake": [{"x": 1, "y": 1}], "food": {"x": 2, "y": 2}, "direction": "UP"}
+    assert client.post("/api/games", json=body).status_code == 401
+
+def test_registry_ttl_eviction():
+    from datetime import datetime
+    from app.live_games import LiveGameRegistry
+    from app.models import LiveGame
+
+    now = [0.0]
+    registry = LiveGameRegistry(ttl_seconds=10, clock=lambda: now[0])
+
+    def make(game_id, player):
+        return LiveGame(id=game_id, playerId=player, playerName=player, score=0, mode="walls",
+                        startedAt=datetime.now(), snake=[{"x": 0, "y": 0}], food={"x": 1, "y": 1}, direction="UP")
+
+    registry.add(make("a", "p1"))
+    registry.add(make("b", "p2"))
+    registry.add(make("pinned", "p3"), expires=False)
+    now[0] = 6
+    registry.update("a", score=5)
+    now[0] = 12
+    assert registry.expire() == ["b"]
+    assert registry.get("a").score == 5
+    assert registry.list(player_id="p2") == []
+    now[0] = 100
+    assert registry.get("a") is None
+    assert [g.id for g in registry.list()] == ["pinned"]
+
+def test_listeners_run_outside_the_registry_lock():
+    import threading
+    from datetime import datetime
+    from app.live_games import LiveGameRegistry
+    from app.models import LiveGame
+
+    now = [0.0]
+    registry = LiveGameRegistry(ttl_seconds=10, clock=lambda: now[0])
+    registry.add(LiveGame(id="a", playerId="p1", playerName="p1", score=0, mode="walls", startedAt=datetime.now(),
+                          snake=[{"x": 0, "y": 0}], food={"x": 1, "y": 1}, direction="UP"))
+    blocked = []
+
+    def listener(game_id, before, after):
+        # Another thread can only read the registry if the lock was released first
+        reader = threading.Thread(target=registry.list)
+        reader.start()
+        reader.join(timeout=1)
+        blocked.append(reader.is_alive())
+
+    registry.add_listener(listener)
+    registry.update("a", score=10)
+    now[0] = 100
+    assert registry.list() == []
+    assert blocked == [False, False]
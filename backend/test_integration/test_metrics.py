@@ -0,0 +1,58 @@
+import re
+from app.metrics import Histogram
+
+def _value(text, series):
+    match = re.search(rf"^{re.escape(series)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo", (0.1, 1.0), ("route",))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(('/a"b',), value)
+    assert histogram.render() == [
+        "# HELP demo_seconds Demo",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{route="/a\\"b",le="0.1"} 2',
+        'demo_seconds_bucket{route="/a\\"b",le="1.0"} 3',
+        'demo_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+        'demo_seconds_sum{route="/a\\"b"} 3.65',
+        'demo_seconds_count{route="/a\\"b"} 4',
+    ]
+
+def test_requests_are_recorded_per_route(client):
+    labels = 'method="GET",route="/api/leaderboard",status="200"'
+    before = client.get("/api/_internal/metrics").text
+    client.get("/api/leaderboard", params={"mode": "walls", "limit": 7})
+    client.get("/api/does-not-exist")
+    res = client.get("/api/_internal/metrics")
+    assert res.headers["content-type"].startswith("text/plain")
+    after = res.text
+
+    assert _value(after, f"http_request_duration_seconds_count{{{labels}}}") == _value(before, f"http_request_duration_seconds_count{{{labels}}}") + 1
+    # The cache miss queried the database, and the query was attributed to this route
+    assert _value(after, f"db_queries_per_request_sum{{{labels}}}") >= _value(before, f"db_queries_per_request_sum{{{labels}}}") + 1
+    assert _value(after, f"http_response_size_bytes_sum{{{labels}}}") > _value(before, f"http_response_size_bytes_sum{{{labels}}}")
+    # Unknown paths share one label instead of creating a series per URL
+    assert 'route="unmatched",status="404"' in after
+    assert "/api/does-not-exist" not in after
+    # The metrics request itself is in flight while rendering
+    assert _value(after, "http_requests_in_flight") == 1
+
+def test_submit_score_query_count(client):
+    res = client.post("/api/auth/signup", json={"username": "Measured", "email": "measured@metrics.com", "password": "pass"})
+    headers = {"Authorization": f"Bearer {res.json()['token']}"}
+    labels = 'method="POST",route="/api/leaderboard",status="200"'
+    before = client.get("/api/_internal/metrics").text
+    client.post("/api/leaderboard", json={"score": 10, "mode": "walls"}, headers=headers)
+    after = client.get("/api/_internal/metrics").text
+    queries = _value(after, f"db_queries_per_request_sum{{{labels}}}") - _value(before, f"db_queries_per_request_sum{{{labels}}}")
+    # Principal load, previous high score, leaderboard insert, best-score and
+    # windowed best-score upserts, and the folded user stats update
+    assert queries == 6
+    assert "app_startup_seconds{phase=\"total\"}" in after
+
+def test_route_labels_use_templates(client):
+    client.get("/api/users/someone/stats")
+    text = client.get("/api/_internal/metrics").text
+    assert 'route="/api/users/{userId}/stats",status="404"' in text
+    assert "someone" not in text
@@ -0,0 +1,73 @@
+import asyncio
+from sqlalchemy import select
+from app.database import get_db
+from app.db_models import DBUser
+from app.main import app
+from app.passwords import PasswordHasher
+
+def test_hash_round_trip_and_rehash_detection():
+    hasher = PasswordHasher(log_n=10)
+    stored = hasher.hash_sync("hunter2")
+    assert stored.startswith("scrypt$10$8$1$")
+    assert hasher.hash_sync("hunter2") != stored  # salted
+    assert hasher.verify_sync("hunter2", stored) == (True, False)
+    assert hasher.verify_sync("hunter3", stored) == (False, False)
+
+    # A raised cost flags existing hashes for upgrade but still verifies them
+    stronger = PasswordHasher(log_n=11)
+    assert stronger.verify_sync("hunter2", stored) == (True, True)
+
+    # Legacy plaintext rows verify once and always need an upgrade
+    assert hasher.verify_sync("test123", "test123") == (True, True)
+    assert hasher.verify_sync("wrong", "test123") == (False, True)
+    assert hasher.verify_sync("x", "scrypt$10$8$1$!!$??") == (False, False)
+
+def test_hashing_does_not_block_the_loop():
+    hasher = PasswordHasher(log_n=14, workers=2)
+
+    async def run():
+        ticks = 0
+        task = asyncio.ensure_future(hasher.hash("hunter2"))
+        while not task.done():
+            await asyncio.sleep(0.001)
+            ticks += 1
+        return ticks, await task
+
+    ticks, stored = asyncio.run(run())
+    assert ticks >= 3
+    assert hasher.verify_sync("hunter2", stored)[0]
+
+async def _in_test_session(fn):
+    # Runs against the same rolled-back transaction the app uses in this test
+    async for db in app.dependency_overrides[get_db]():
+        return await fn(db)
+
+def _stored_password(client, email):
+    async def read(db):
+        return await db.scalar(select(DBUser.password).where(DBUser.email == email))
+    return client.portal.call(_in_test_session, read)
+
+def test_signup_stores_hash_and_login_verifies(client):
+    res = client.post("/api/auth/signup", json={"username": "Hashed", "email": "hashed@pw.com", "password": "s3cret"})
+    assert res.status_code == 201
+    assert _stored_password(client, "hashed@pw.com").startswith("scrypt$")
+    assert "password" not in res.json()["user"]
+
+    assert client.post("/api/auth/login", json={"email": "hashed@pw.com", "password": "s3cret"}).status_code == 200
+    assert client.post("/api/auth/login", json={"email": "hashed@pw.com", "password": "nope"}).status_code == 401
+    assert client.post("/api/auth/login", json={"email": "nobody@pw.com", "password": "s3cret"}).status_code == 401
+
+def test_plaintext_password_upgraded_at_login(client):
+    async def add_legacy_user(db):
+        db.add(DBUser(username="Legacy", email="legacy@pw.com", password="plain-old", highScore=0, gamesPlayed=0))
+        await db.commit()
+    client.portal.call(_in_test_session, add_legacy_user)
+
+    assert client.post("/api/auth/login", json={"email": "legacy@pw.com", "password": "wrong"}).status_code == 401
+    assert _stored_password(client, "legacy@pw.com") == "plain-old"
+
+    assert client.post("/api/auth/login", json={"email": "legacy@pw.com", "password": "plain-old"}).status_code == 200
+    upgraded = _stored_password(client, "legacy@pw.com")
+    assert upgraded.startswith("scrypt$")
+    assert client.post("/api/auth/login", json={"email": "legacy@pw.com", "password": "plain-old"}).status_code == 200
+    assert _stored_password(client, "legacy@pw.com") == upgraded
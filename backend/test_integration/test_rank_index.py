@@ -0,0 +1,76 @@
+from app.database import settings
+from app.models import MAX_SCORE
+from app.rank_index import FenwickTree, RankIndex, ScoreRankIndex
+
+def test_fenwick_grows_and_counts():
+    tree = FenwickTree(2)
+    for score in [0, 1, 5, 5, 300, 4096]:
+        tree.add(score)
+    assert tree.total == 6
+    assert tree.prefix(0) == 1
+    assert tree.prefix(4) == 2
+    assert tree.prefix(5) == 4
+    assert tree.prefix(4095) == 5
+    assert tree.prefix(10**6) == 6
+
+def test_rank_index_matches_naive_count():
+    scores = [10, 40, 40, 0, 250, 90, 40, 1000]
+    index = ScoreRankIndex((s, scores.count(s)) for s in set(scores))
+    index.add(75)
+    index.remove(1000)
+    scores = scores[:-1] + [75]
+    for probe in [0, 10, 39, 40, 41, 75, 250, 5000]:
+        assert index.rank(probe) == sum(1 for s in scores if s > probe) + 1
+
+def test_submit_rank_matches_database(client, monkeypatch, signup):
+    """
+    With the consistency check enabled, every returned rank is the DB rank,
+    and the index must already agree with it.
+    """
+    monkeypatch.setattr(settings, "RANK_INDEX_VERIFY", True)
+    user_id, headers = signup("RankChecker")
+
+    ranks = []
+    for score in [3970, 10, 3970]:
+        res = client.post("/api/leaderboard", json={"score": score, "mode": "pass-through"}, headers=headers)
+        ranks.append(res.json()["rank"])
+    assert ranks[0] == 1
+    assert ranks[2] == 1
+    assert ranks[1] > 2
+
+    stats = client.get(f"/api/users/{user_id}/stats").json()
+    assert stats["rank"] == 1
+
+def test_ranks_come_from_the_database_without_the_index(client, monkeypatch, signup):
+    """What several workers run with: another worker's writes never reach this index."""
+    client.post("/api/leaderboard", json={"score": 3970, "mode": "walls"}, headers=signup("CountedTop").headers)
+
+    stale = RankIndex()
+    monkeypatch.setattr("app.scores.rank_index", stale)
+    monkeypatch.setattr("app.routers.users.rank_index", stale)
+    monkeypatch.setattr(settings, "RANK_INDEX_ENABLED", False)
+    user_id, headers = signup("Counted")
+
+    # An empty index would rank both first
+    assert client.post("/api/leaderboard", json={"score": 10, "mode": "walls"}, headers=headers).json()["rank"] > 1
+    assert client.get(f"/api/users/{user_id}/stats").json()["rank"] > 1
+    assert len(stale.modes["walls"]) == 0
+
+def test_negative_score_rejected(client, signup):
+    headers = signup("Negative").headers
+    res = client.post("/api/leaderboard", json={"score": -5, "mode": "walls"}, headers=headers)
+    assert res.status_code == 422
+    res = client.post("/api/leaderboard", json={"score": MAX_SCORE + 1, "mode": "walls"}, headers=headers)
+    assert res.status_code == 422
+    # Not a whole number of foods
+    res = client.post("/api/leaderboard", json={"score": 105, "mode": "walls"}, headers=headers)
+    assert res.status_code == 422
+
+def test_out_of_range_scores_are_clamped():
+    # Legacy rows above the bound must not grow the dense tree to their size
+    index = ScoreRankIndex([(2**40, 1), (-3, 1)])
+    index.add(50_000_000)
+    assert len(index._tree.tree) <= 2 * MAX_SCORE + 2
+    assert index.rank(MAX_SCORE) == 1 and index.rank(0) == 3
+    index.remove(2**40)
+    assert len(index) == 2
@@ -0,0 +1,136 @@
+import asyncio
+import json
+from dataclasses import replace
+from pathlib import Path
+import pytest
+from app.database import settings
+from app.engine import Mulberry32, ReplayError, ReplayRecorder, SnakeGame, decode_replay, encode_replay, verify_replay
+from app.engine.rules import DIRECTIONS
+from app.models import Direction, GameMode
+from app.replays import ReplayVerifier, replay_verifier
+
+def _chase_food(mode=GameMode.walls, seed=3, ticks=400):
+    """Greedy bot: step toward the food on any move that does not die."""
+    recorder = ReplayRecorder(mode, seed)
+    game = recorder.game
+    while game.ticks < ticks and not game.over:
+        food = divmod(game.food, 20)
+        options = []
+        for i, direction in enumerate(DIRECTIONS):
+            target = game._moves[game.body[0] * 4 + i]
+            if target >= 0 and (not game.cells[target] or target == game.body[-1]):
+                y, x = divmod(target, 20)
+                options.append((abs(y - food[0]) + abs(x - food[1]), i, direction))
+        if options and min(options)[2] != game.direction:
+            recorder.turn(min(options)[2])
+        recorder.tick()
+    return recorder.replay()
+
+@pytest.fixture
+def inline_verifier(monkeypatch):
+    monkeypatch.setattr(replay_verifier, "workers", 0)
+
+def test_recorded_game_round_trips_and_verifies():
+    replay = _chase_food()
+    assert replay.score > 0 and replay.turns
+    data = encode_replay(replay)
+    assert decode_replay(data) == replay
+    # A few bytes per turn
+    assert len(data) < 10 + 2 * len(replay.turns)
+
+    verified = verify_replay(data)
+    assert (verified.mode, verified.score, verified.ticks) == (replay.mode, replay.score, replay.ticks)
+
+# Shared with frontend/src/game/gameLogic.test.ts
+FOOD_VECTORS = json.loads((Path(__file__).resolve().parents[2] / "frontend/src/game/foodPlacement.vectors.json").read_text())
+
+@pytest.mark.parametrize("vector", FOOD_VECTORS["cases"], ids=lambda v: f"seed-{v['seed']}")
+def test_food_placement_matches_the_browser(vector):
+    size = FOOD_VECTORS["gridSize"]
+    if "free" in vector:
+        free = {y * size + x for x, y in vector["free"]}
+        body = [cell for cell in range(size * size) if cell not in free]
+    else:
+        body = [y * size + x for x, y in vector["snake"]]
+
+    rng = Mulberry32(vector["seed"])
+    assert [rng.next() for _ in vector["draws"]] == vector["draws"]
+
+    game = SnakeGame(GameMode.walls, body, None, grid_size=size, rng=Mulberry32(vector["seed"]))
+    cells = [game.food] + [game.place_food() for _ in vector["foods"][1:]]
+    assert [[cell % size, cell // size] for cell in cells] == vector["foods"]
+
+def test_tampered_replays_are_rejected():
+    replay = _chase_food()
+    replay.score += 10
+    with pytest.raises(ReplayError, match="scores"):
+        verify_replay(encode_replay(replay))
+
+    replay = _chase_food(ticks=50)
+    replay.ticks += 1000
+    with pytest.raises(ReplayError):
+        verify_replay(encode_replay(replay))
+
+    with pytest.raises(ReplayError, match="Truncated"):
+        verify_replay(encode_replay(_chase_food())[:3])
+    with pytest.raises(ReplayError, match="longer than"):
+        verify_replay(encode_replay(_chase_food()), max_ticks=10)
+
+def test_process_pool_verifies():
+    verifier = ReplayVerifier(workers=1)
+    data = encode_replay(_chase_food())
+    try:
+        assert asyncio.run(verifier.verify(data)).score == _chase_food().score
+        with pytest.raises(ReplayError):
+            asyncio.run(verifier.verify(b"\x02"))
+    finally:
+        verifier.shutdown()
+
+def test_submit_replay_saves_score_and_replay(client, inline_verifier, signup):
+    headers = signup("Replayer").headers
+    replay = _chase_food(mode=GameMode.pass_through)
+    data = encode_replay(replay)
+
+    res = client.post("/api/leaderboard/replay", content=data, headers={**headers, "Content-Type": "application/octet-stream"})
+    assert res.status_code == 200, res.text
+    body = res.json()
+    assert body["score"] == replay.score and body["rank"] >= 1
+
+    entries = client.get("/api/leaderboard", params={"mode": "pass-through", "limit": 100}).json()
+    assert any(e["id"] == body["entryId"] and e["score"] == replay.score for e in entries)
+    stored = client.get(f"/api/leaderboard/{body['entryId']}/replay")
+    assert stored.status_code == 200 and stored.content == data
+    assert client.get("/api/leaderboard/missing/replay").status_code == 404
+
+def test_submit_replay_rejects_bad_uploads(client, inline_verifier, monkeypatch, signup):
+    headers = signup("Replayer").headers
+    replay = _chase_food()
+    replay.score += 100
+    assert client.post("/api/leaderboard/replay", content=encode_replay(replay), headers=headers).status_code == 422
+
+    monkeypatch.setattr(settings, "REPLAY_MAX_BYTES", 8)
+    assert client.post("/api/leaderboard/replay", content=encode_replay(_chase_food()), headers=headers).status_code == 413
+
+def test_verified_only_mode_blocks_plain_submits(client, monkeypatch, signup):
+    headers = signup("Replayer").headers
+    monkeypatch.setattr(settings, "REQUIRE_VERIFIED_SCORES", True)
+    assert client.post("/api/leaderboard", json={"score": 100, "mode": "walls"}, headers=headers).status_code == 403
+    res = client.post("/api/leaderboard/batch", json={"scores": [{"score": 100, "mode": "walls"}]}, headers=headers)
+    assert res.status_code == 403
+
+def test_a_game_is_accepted_once(client, inline_verifier, signup):
+    replay = _chase_food(mode=GameMode.walls, seed=11)
+    data = encode_replay(replay)
+    first = client.post("/api/leaderboard/replay", content=data, headers=signup("Original").headers)
+    assert first.status_code == 200
+
+    # Re-uploads by anyone, even re-encoded with a turn the game ignores, are refused
+    copier = signup("Copier").headers
+    assert client.post("/api/leaderboard/replay", content=data, headers=copier).status_code == 409
+    padded = replace(replay, turns=[(0, Direction.LEFT)] + replay.turns)
+    assert encode_replay(padded) != data
+    assert verify_replay(encode_replay(padded)).digest == verify_replay(data).digest
+    assert client.post("/api/leaderboard/replay", content=encode_replay(padded), headers=copier).status_code == 409
+
+    other = encode_replay(_chase_food(mode=GameMode.walls, seed=12))
+    assert client.post("/api/leaderboard/replay", content=other, headers=copier).status_code == 200
@@ -0,0 +1,132 @@
+import asyncio
+import pytest
+from app.response_cache import (
+    CacheBackend, MemoryCacheBackend, RedisCacheBackend, ResponseCache, leaderboard_namespace, response_cache, stats_namespace,
+)
+
+def test_leaderboard_is_cached_with_etag(client):
+    hits = response_cache.hits
+    first = client.get("/api/leaderboard", params={"mode": "walls"})
+    second = client.get("/api/leaderboard", params={"mode": "walls"})
+    assert response_cache.hits == hits + 1
+    assert first.content == second.content
+    assert first.headers["etag"] == second.headers["etag"]
+
+    res = client.get("/api/leaderboard", params={"mode": "walls"}, headers={"If-None-Match": first.headers["etag"]})
+    assert res.status_code == 304
+    assert res.content == b""
+
+def test_submit_invalidates_only_affected_modes(client, signup):
+    _, headers = signup("Invalidator")
+    walls = client.get("/api/leaderboard", params={"mode": "walls"})
+    passthrough = client.get("/api/leaderboard", params={"mode": "pass-through"})
+    everything = client.get("/api/leaderboard")
+
+    client.post("/api/leaderboard", json={"score": 3970, "mode": "walls"}, headers=headers)
+
+    hits = response_cache.hits
+    new_walls = client.get("/api/leaderboard", params={"mode": "walls"})
+    assert new_walls.json()[0]["username"] == "Invalidator"
+    assert new_walls.headers["etag"] != walls.headers["etag"]
+    new_everything = client.get("/api/leaderboard")
+    assert new_everything.json()[0]["username"] == "Invalidator"
+    assert new_everything.headers["etag"] != everything.headers["etag"]
+    assert response_cache.hits == hits
+
+    # Other mode untouched: still served from cache, client copy still valid
+    res = client.get("/api/leaderboard", params={"mode": "pass-through"}, headers={"If-None-Match": passthrough.headers["etag"]})
+    assert res.status_code == 304
+    assert response_cache.hits == hits + 1
+
+def test_cached_pages_keep_next_cursor(client):
+    first = client.get("/api/leaderboard", params={"limit": 1})
+    again = client.get("/api/leaderboard", params={"limit": 1})
+    assert first.headers["x-next-cursor"] == again.headers["x-next-cursor"]
+
+def test_stats_refresh_after_submit(client, signup):
+    user_id, headers = signup("StatsCached")
+    before = client.get(f"/api/users/{user_id}/stats")
+    assert before.json()["gamesPlayed"] == 0
+    assert client.get(f"/api/users/{user_id}/stats").headers["etag"] == before.headers["etag"]
+
+    client.post("/api/leaderboard", json={"score": 1230, "mode": "walls"}, headers=headers)
+    after = client.get(f"/api/users/{user_id}/stats").json()
+    assert after["gamesPlayed"] == 1
+    assert after["highScore"] == 1230
+
+def test_cache_counters_exposed(client):
+    client.get("/api/leaderboard")
+    stats = client.get("/api/_internal/cache").json()["responses"]
+    assert stats["backend"] == "MemoryCacheBackend"
+    assert stats["misses"] >= 1
+
+def test_idle_generation_counters_are_dropped():
+    now = [0.0]
+    backend = MemoryCacheBackend(maxsize=16, ttl=10, clock=lambda: now[0])
+    cache = ResponseCache(backend, ttl=10)
+
+    async def run():
+        _, stale_key = await cache.lookup(stats_namespace("gone"))
+        await cache.store(stale_key, b"old")
+        await cache.invalidate(stats_namespace("gone"), stats_namespace("active"))
+        for _ in range(4):
+            now[0] += 6
+            await cache.lookup(stats_namespace("active"))
+        # Unused for two entry lifetimes: dropped, along with every entry it keyed
+        assert "gen:stats:gone" not in backend.counters
+        assert backend.counters["gen:stats:active"][0] == 1
+        # Starting over reuses generation 0, whose entry has long expired
+        assert await cache.lookup(stats_namespace("gone")) == (None, stale_key)
+        assert await backend.get(stale_key) is None
+
+    asyncio.run(run())
+
+def test_backends_must_implement_every_method():
+    class Partial(CacheBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, b"0")) + 1).encode()
+        return int(self.data[key])
+
+def test_redis_backend_shares_invalidation_between_workers():
+    redis = FakeRedis()
+    worker_a = ResponseCache(RedisCacheBackend(redis))
+    worker_b = ResponseCache(RedisCacheBackend(redis))
+    namespace = leaderboard_namespace("walls")
+
+    async def run():
+        value, key = await worker_a.lookup(namespace, 0, 50, "")
+        assert value is None
+        await worker_a.store(key, b"page")
+        assert (await worker_b.lookup(namespace, 0, 50, ""))[0] == b"page"
+
+        await worker_b.invalidate(namespace)
+        assert (await worker_a.lookup(namespace, 0, 50, ""))[0] is None
+
+    asyncio.run(run())
+    assert worker_b.hits == 1 and worker_a.misses == 2
+
+def test_backend_errors_are_misses():
+    class Broken(FakeRedis):
+        async def get(self, key):
+            raise ConnectionError("down")
+
+    cache = ResponseCache(RedisCacheBackend(Broken()))
+    assert asyncio.run(cache.lookup("stats:x")) == (None, None)
+    assert cache.errors == 1
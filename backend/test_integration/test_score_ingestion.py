@@ -0,0 +1,176 @@
+import asyncio
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from app.database import Base, settings
+from app.db_models import DBLeaderboard, DBUser
+from app.scores import DuplicateReplayError, ScoreSubmission, ScoreWriteQueue
+
+def test_batch_endpoint_folds_user_stats(client, signup):
+    user_id, headers = signup("BatchPlayer")
+    scores = [{"score": s, "mode": "walls"} for s in (120, 480, 300)] + [{"score": 90, "mode": "pass-through"}]
+    res = client.post("/api/leaderboard/batch", json={"scores": scores}, headers=headers)
+    assert res.status_code == 200
+    ranks = res.json()["ranks"]
+    assert len(ranks) == 4
+    # Ranks are assigned in submission order, as if each score was posted on its own
+    assert ranks[1] < ranks[2]
+
+    stats = client.get(f"/api/users/{user_id}/stats").json()
+    assert stats["gamesPlayed"] == 4
+    assert stats["highScore"] == 480
+
+def test_batch_size_is_capped(client, monkeypatch, signup):
+    monkeypatch.setattr(settings, "SCORE_BATCH_MAX_SIZE", 2)
+    _, headers = signup("Flooder")
+    scores = [{"score": 10, "mode": "walls"}] * 3
+    assert client.post("/api/leaderboard/batch", json={"scores": scores}, headers=headers).status_code == 413
+    assert client.post("/api/leaderboard/batch", json={"scores": []}, headers=headers).status_code == 422
+
+
+@pytest.fixture
+def queue_db():
+    """A private in-memory database so the queue can commit for real."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement.split()[0].upper(), executemany))
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine)() as db:
+            db.add_all([DBUser(id=f"u{i}", username=f"user{i}", email=f"u{i}@q.com", password="x", highScore=100) for i in range(3)])
+            await db.commit()
+        statements.clear()
+
+    asyncio.run(setup())
+    yield engine, async_sessionmaker(engine, expire_on_commit=False), statements
+
+def test_queue_coalesces_submits_into_one_flush(queue_db):
+    engine, session_factory, statements = queue_db
+
+    async def run():
+        queue = ScoreWriteQueue(session_factory, flush_interval=0.05, max_batch=500)
+        queue.start()
+        submissions = [ScoreSubmission(userId=f"u{i % 3}", username=f"user{i % 3}", score=i * 10, mode="walls") for i in range(30)]
+        ranks = await asyncio.gather(*(queue.submit(s) for s in submissions))
+        await queue.stop()
+        return queue, ranks
+
+    queue, ranks = asyncio.run(run())
+    assert queue.flushes == 1
+    assert len(ranks) == 30
+    writes = [s for s in statements if s[0] in ("INSERT", "UPDATE")]
+    # Bulk INSERT, best-score and windowed upserts and one folded UPDATE (3 users) for 30 submits
+    assert writes == [("INSERT", True), ("INSERT", True), ("INSERT", True), ("UPDATE", True)]
+
+    async def check():
+        async with session_factory() as db:
+            assert await db.scalar(select(func.count()).select_from(DBLeaderboard)) == 30
+            user = await db.get(DBUser, "u2")
+            assert user.gamesPlayed == 10
+            assert user.highScore == 290
+    asyncio.run(check())
+
+def test_queue_failure_is_atomic_and_reported(queue_db):
+    engine, session_factory, statements = queue_db
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def fail_update(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE"):
+            raise RuntimeError("disk on fire")
+
+    async def run():
+        queue = ScoreWriteQueue(session_factory, flush_interval=0.01)
+        queue.start()
+        results = await asyncio.gather(
+            *(queue.submit(ScoreSubmission(userId="u0", username="user0", score=5, mode="walls")) for _ in range(5)),
+            return_exceptions=True,
+        )
+        await queue.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, Exception) for r in results)
+
+    async def check():
+        async with session_factory() as db:
+            # Nothing acknowledged, nothing written
+            assert await db.scalar(select(func.count()).select_from(DBLeaderboard)) == 0
+    asyncio.run(check())
+
+def test_queue_fails_only_duplicate_replays(queue_db):
+    engine, session_factory, statements = queue_db
+
+    def replayed(user, digest):
+        return ScoreSubmission(userId=user, username=user, score=10, mode="walls", replay=b"\x01", replayDigest=digest)
+
+    async def run():
+        queue = ScoreWriteQueue(session_factory, flush_interval=0.01)
+        queue.start()
+        results = await asyncio.gather(
+            queue.submit(replayed("u0", "same")), queue.submit(replayed("u1", "same")),
+            queue.submit(ScoreSubmission(userId="u2", username="user2", score=5, mode="walls")),
+            return_exceptions=True,
+        )
+        await queue.stop()
+        return results
+
+    first, copy, plain = asyncio.run(run())
+    assert isinstance(copy, DuplicateReplayError)
+    assert isinstance(first, int) and isinstance(plain, int)
+
+def test_queue_drains_on_stop(queue_db):
+    engine, session_factory, statements = queue_db
+
+    async def run():
+        # Long interval: only stop() can trigger the flush
+        queue = ScoreWriteQueue(session_factory, flush_interval=60)
+        queue.start()
+        pending = [asyncio.create_task(queue.submit(ScoreSubmission(userId="u1", username="user1", score=7, mode="walls"))) for _ in range(4)]
+        await asyncio.sleep(0)
+        await queue.stop()
+        return await asyncio.gather(*pending)
+
+    assert len(asyncio.run(run())) == 4
+
+def test_concurrent_writes_for_one_user_keep_rank_index_consistent(tmp_path, monkeypatch):
+    """
+    Two batches for the same user in flight at once must chain their high score
+    transitions (100 -> 300 -> 300), not both start from 100.
+    """
+    import app.scores as scores_module
+    from app.rank_index import RankIndex
+    from app.scores import write_scores
+
+    index = RankIndex()
+    index.add_user(100)
+    monkeypatch.setattr(scores_module, "rank_index", index)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'race.db'}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as db:
+            db.add(DBUser(id="u0", username="user0", email="u0@race.com", password="x", highScore=100))
+            await db.commit()
+
+        async def submit(score):
+            async with session_factory() as db:
+                return await write_scores(db, [ScoreSubmission(userId="u0", username="user0", score=score, mode="walls")])
+
+        await asyncio.gather(submit(300), submit(200))
+        async with session_factory() as db:
+            high_score = await db.scalar(select(DBUser.highScore).where(DBUser.id == "u0"))
+        await engine.dispose()
+        return high_score
+
+    assert asyncio.run(run()) == 300
+    assert len(index.high_scores) == 1
+    assert index.user_rank(300) == 1 and index.user_rank(0) == 2
+    assert index.user_rank(99) == 2 and index.user_rank(199) == 2
@@ -0,0 +1,93 @@
+import base64
+import struct
+import pytest
+from datetime import datetime
+from app.models import LiveGame, Point
+from app.snake_codec import SnakeBuffer, decode_game, decode_snake, encode_game, encode_games, games_to_base64_json
+
+def _game(**overrides):
+    fields = dict(id="g1", playerId="p1", playerName="Pixel", score=120, mode="pass-through",
+                  startedAt=datetime(2025, 5, 1, 12, 30, 0, 250000), snake=[{"x": 5, "y": 5}, {"x": 4, "y": 5}, {"x": 3, "y": 5}],
+                  food={"x": 10, "y": 2}, direction="RIGHT")
+    fields.update(overrides)
+    return LiveGame(**fields)
+
+def test_binary_round_trip():
+    game = _game()
+    data = encode_game(game)
+    assert len(data) < len(game.model_dump_json())
+    assert decode_game(data).model_dump() == game.model_dump()
+    assert decode_snake(data) == SnakeBuffer.from_points(game.snake)
+
+def _unpackable(x, y):
+    # Skips validation, like a game loaded from an older or foreign row
+    return _game().model_copy(update={"id": "bad", "snake": [Point.model_construct(x=x, y=y)]})
+
+def test_rejects_unpackable_coordinates():
+    with pytest.raises(ValueError):
+        encode_game(_unpackable(1.5, 2))
+    with pytest.raises(ValueError):
+        encode_game(_unpackable(-1, 2))
+    with pytest.raises(ValueError):
+        decode_game(encode_game(_game())[:-2])
+
+def test_listings_leave_out_unpackable_games():
+    good, bad = _game(), _unpackable(-1, 2)
+    assert encode_games([bad, good]) == encode_games([good])
+    assert [g["id"] for g in games_to_base64_json([bad, good])] == ["g1"]
+
+def test_live_game_coordinates_are_bounded(client, signup):
+    headers = signup("OffBoard").headers
+    body = {"mode": "walls", "snake": [{"x": 1, "y": 1}], "food": {"x": 2, "y": 2}, "direction": "UP"}
+    for snake in ([{"x": -1, "y": 1.5}], [{"x": 1.5, "y": 1}], [{"x": 20, "y": 0}], [{"x": 1, "y": 1}] * 401):
+        assert client.post("/api/games", json={**body, "snake": snake}, headers=headers).status_code == 422
+    assert client.post("/api/games", json={**body, "food": {"x": 0, "y": 20}}, headers=headers).status_code == 422
+    game_id = client.post("/api/games", json=body, headers=headers).json()["id"]
+    assert client.put(f"/api/games/{game_id}", json={"snake": [{"x": -1, "y": 1.5}]}, headers=headers).status_code == 422
+
+    for encoding in ("binary", "base64"):
+        assert client.get(f"/api/games?encoding={encoding}").status_code == 200
+    client.delete(f"/api/games/{game_id}", headers=headers)
+
+def test_rejects_unpackable_fields():
+    # Games built outside the request models are not range-checked by them
+    for bad in (_game(score=-1), _game(score=2**32), _game(playerName="x" * 70_000)):
+        with pytest.raises(ValueError):
+            encode_game(bad)
+
+def test_live_game_scores_are_bounded(client, signup):
+    headers = signup("Bounded").headers
+    body = {"mode": "walls", "snake": [{"x": 1, "y": 1}], "food": {"x": 2, "y": 2}, "direction": "UP"}
+    assert client.post("/api/games", json={**body, "score": -1}, headers=headers).status_code == 422
+    game_id = client.post("/api/games", json=body, headers=headers).json()["id"]
+    assert client.put(f"/api/games/{game_id}", json={"score": 2**32}, headers=headers).status_code == 422
+    assert client.get("/api/games?encoding=binary").status_code == 200
+    client.delete(f"/api/games/{game_id}", headers=headers)
+
+    long_name = {"username": "x" * 51, "email": "long@codec.com", "password": "pass"}
+    assert client.post("/api/auth/signup", json=long_name).status_code == 422
+
+def test_default_json_shape_unchanged(client):
+    game = client.get("/api/games/1").json()
+    assert isinstance(game["snake"], list)
+    assert set(game["snake"][0]) == {"x", "y"}
+
+def test_base64_encoding(client):
+    plain = client.get("/api/games/1").json()
+    res = client.get("/api/games/1?encoding=base64")
+    assert res.status_code == 200
+    packed = base64.b64decode(res.json()["snake"])
+    coords = struct.unpack(f"<{len(packed) // 2}H", packed)
+    assert [{"x": coords[i], "y": coords[i + 1]} for i in range(0, len(coords), 2)] == plain["snake"]
+    assert {k: v for k, v in res.json().items() if k != "snake"} == {k: v for k, v in plain.items() if k != "snake"}
+
+def test_binary_encoding(client):
+    res = client.get("/api/games/1?encoding=binary")
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/octet-stream"
+    game = decode_game(res.content)
+    assert LiveGame.model_validate(client.get("/api/games/1").json()).model_dump() == game.model_dump()
+
+    listing = client.get("/api/games?encoding=binary").content
+    (first_len,) = struct.unpack_from("<I", listing, 0)
+    assert decode_game(listing[4:4 + first_len]).id
@@ -0,0 +1,91 @@
+import json
+from datetime import datetime
+from app.models import LiveGame
+from app.spectators import GameChannel, Subscriber, delta_frame
+
+def _game(snake, score=0, food=(9, 9)):
+    return LiveGame(id="g", playerId="p", playerName="P", score=score, mode="walls", startedAt=datetime.now(),
+                    snake=[{"x": x, "y": y} for x, y in snake], food={"x": food[0], "y": food[1]}, direction="RIGHT")
+
+def test_delta_for_move_and_growth():
+    before = _game([(3, 3), (2, 3), (1, 3)])
+    moved = _game([(4, 3), (3, 3), (2, 3)])
+    assert delta_frame(before, moved, 1) == {"type": "delta", "seq": 1, "head": [[4, 3]], "tail": 1}
+
+    grown = _game([(4, 3), (3, 3), (2, 3), (1, 3)], score=10, food=(0, 0))
+    assert delta_frame(before, grown, 2) == {"type": "delta", "seq": 2, "head": [[4, 3]], "food": [0, 0], "score": 10}
+
+    teleported = _game([(15, 15), (15, 16), (15, 17)])
+    assert delta_frame(before, teleported, 3) is None
+
+def test_slow_subscriber_is_resynced_with_snapshot():
+    import asyncio
+    channel = GameChannel(_game([(3, 3), (2, 3)]))
+    subscriber = Subscriber(channel, max_pending=2)
+    channel.subscribers.add(subscriber)
+
+    async def run():
+        assert json.loads(await subscriber.next_message())["type"] == "snapshot"
+        x = 3
+        for _ in range(5):
+            x += 1
+            channel.publish(_game([(x, 3), (x - 1, 3)]))
+        message = json.loads(await subscriber.next_message())
+        # Backlog overflowed: one snapshot of the latest state replaces it
+        assert message["type"] == "snapshot"
+        assert message["game"]["snake"][0] == {"x": 8.0, "y": 3.0}
+        channel.publish(_game([(9, 3), (8, 3)]))
+        channel.publish(_game([(10, 3), (9, 3)]))
+        batch = json.loads(await subscriber.next_message())
+        assert batch["type"] == "batch"
+        assert [f["seq"] for f in batch["frames"]] == [6, 7]
+
+    asyncio.run(run())
+
+def test_slow_subscriber_still_gets_the_end_frame():
+    import asyncio
+
+    async def run():
+        for moves in (1, 5):
+            channel = GameChannel(_game([(3, 3), (2, 3)]))
+            subscriber = Subscriber(channel, max_pending=2)
+            channel.subscribers.add(subscriber)
+            assert json.loads(await subscriber.next_message())["type"] == "snapshot"
+            for x in range(4, 4 + moves):
+                channel.publish(_game([(x, 3), (x - 1, 3)]))
+            channel.publish(None)
+
+            messages = []
+            while (message := await subscriber.next_message()) is not None:
+                messages.append(json.loads(message))
+            # Queued deltas survive when they fit; an overflowed backlog is dropped, never the end
+            assert [m["type"] for m in messages] == (["delta", "end"] if moves == 1 else ["end"])
+
+    asyncio.run(run())
+
+def test_websocket_snapshot_then_deltas(client, signup):
+    headers = signup("Broadcaster").headers
+    body = {"mode": "walls", "snake": [{"x": 3, "y": 3}, {"x": 2, "y": 3}], "food": {"x": 9, "y": 9}, "direction": "RIGHT"}
+    game = client.post("/api/games", json=body, headers=headers).json()
+
+    with client.websocket_connect(f"/api/games/{game['id']}/ws") as ws:
+        snapshot = ws.receive_json()
+        assert snapshot["type"] == "snapshot"
+        assert snapshot["game"]["id"] == game["id"]
+
+        client.put(f"/api/games/{game['id']}", json={"snake": [{"x": 4, "y": 3}, {"x": 3, "y": 3}], "score": 10}, headers=headers)
+        delta = ws.receive_json()
+        if delta["type"] == "batch":
+            delta = delta["frames"][0]
+        assert delta == {"type": "delta", "seq": 1, "head": [[4, 3]], "tail": 1, "score": 10}
+
+        client.delete(f"/api/games/{game['id']}", headers=headers)
+        assert ws.receive_json()["type"] == "end"
+
+def test_websocket_unknown_game(client):
+    from starlette.websockets import WebSocketDisconnect
+    import pytest
+    with client.websocket_connect("/api/games/does-not-exist/ws") as ws:
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+        assert exc.value.code == 4404
@@ -0,0 +1,57 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+import app.main as main_module
+from app.database import SCHEMA_VERSION, Settings, engine, ensure_schema, schema_version, seed_db, settings
+from app.db_models import DBSchemaVersion
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+def test_boot_skips_current_schema(client):
+    assert schema_version() == SCHEMA_VERSION
+    assert ensure_schema() is False
+
+    # A database from before versioning is migrated once, then skipped again
+    with engine.begin() as conn:
+        conn.execute(delete(DBSchemaVersion))
+    assert ensure_schema() is True
+    assert ensure_schema() is False
+    assert seed_db() is False
+
+def test_seeding_defaults_by_environment():
+    assert Settings(APP_ENV="development").seed_on_startup
+    assert not Settings(APP_ENV="production").seed_on_startup
+    assert Settings(APP_ENV="production", SEED_ON_STARTUP=True).seed_on_startup
+
+def test_production_boot_does_not_seed(monkeypatch):
+    calls = []
+    monkeypatch.setattr(settings, "APP_ENV", "production")
+    monkeypatch.setattr(main_module, "seed_db", lambda: calls.append("seed_db"))
+    monkeypatch.setattr(main_module, "seed_live_games", lambda: calls.append("seed_live_games"))
+    with TestClient(main_module.app, client=("127.0.0.1", 50000)) as c:
+        stats = c.get("/api/_internal/startup").json()
+    assert calls == []
+    assert stats["totalSeconds"] > 0
+    assert set(stats["phases"]) == {"schema", "rank_index", "live_game_sync"}
+
+def test_seed_command_bulk_loads_once(tmp_path):
+    db_path = tmp_path / "seed.db"
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}", "PASSWORD_SCRYPT_LOG_N": "10"}
+
+    def run():
+        return subprocess.run([sys.executable, "-m", "app.init_db", "--seed"], cwd=BACKEND, env=env,
+                              capture_output=True, text=True, check=True).stdout
+
+    first = run()
+    assert "Schema migrated" in first and "Seeded demo users" in first
+    with sqlite3.connect(db_path) as conn:
+        counts = [conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ("users", "leaderboard", "user_best_scores")]
+    assert counts == [5, 5, 5]
+
+    second = run()
+    assert "Schema already at version" in second and "skipping seed" in second
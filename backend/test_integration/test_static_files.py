@@ -0,0 +1,66 @@
+import gzip
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from app.content_coding import accepted_encodings
+from app.static_files import IMMUTABLE, REVALIDATE, StaticSite
+
+INDEX = b"<!doctype html><title>Snake</title>" + b"<!-- padding -->" * 100
+SCRIPT = b"console.log('snake');" * 200
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_bytes(INDEX)
+    (tmp_path / "index.html.gz").write_bytes(gzip.compress(INDEX))
+    (tmp_path / "assets" / "index-B1x9kQ2a.js").write_bytes(SCRIPT)
+    (tmp_path / "assets" / "index-B1x9kQ2a.js.br").write_bytes(b"brotli bytes")
+    (tmp_path / "assets" / "index-B1x9kQ2a.js.gz").write_bytes(gzip.compress(SCRIPT))
+    (tmp_path / "robots.txt").write_bytes(b"User-agent: *\n")
+    site = StaticSite(str(tmp_path))
+    assert site.load() == 3
+    return site
+
+@pytest.fixture
+def static_client(site):
+    app = FastAPI()
+
+    @app.get("/{full_path:path}")
+    async def serve(request: Request, full_path: str):
+        return site.response(full_path, request.headers.get("accept-encoding"), request.headers.get("if-none-match"))
+
+    return TestClient(app)
+
+def test_hashed_assets_are_immutable_and_precompressed(static_client):
+    res = static_client.get("/assets/index-B1x9kQ2a.js", headers={"Accept-Encoding": "gzip, br"})
+    assert res.headers["cache-control"] == IMMUTABLE
+    assert res.headers["content-encoding"] == "br" and res.headers["vary"] == "Accept-Encoding"
+    assert res.headers["content-type"].startswith("text/javascript")
+
+    res = static_client.get("/assets/index-B1x9kQ2a.js", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip" and res.content == SCRIPT
+    res = static_client.get("/assets/index-B1x9kQ2a.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in res.headers and res.content == SCRIPT
+
+    # Missing assets 404 instead of falling back to index.html
+    assert static_client.get("/assets/index-gone1234.js").status_code == 404
+
+def test_index_is_served_for_client_routes_and_revalidated(static_client):
+    for path in ("/", "/leaderboard", "/watch/42"):
+        res = static_client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert res.status_code == 200 and res.content == INDEX
+        assert res.headers["cache-control"] == REVALIDATE
+
+    etag = res.headers["etag"]
+    cached = static_client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert cached.status_code == 304 and not cached.content
+    # The identity representation has its own ETag
+    assert static_client.get("/", headers={"Accept-Encoding": "identity", "If-None-Match": etag}).status_code == 200
+
+    robots = static_client.get("/robots.txt")
+    assert robots.content == b"User-agent: *\n" and robots.headers["cache-control"] == REVALIDATE
+
+def test_accept_encoding_parsing():
+    assert accepted_encodings("gzip;q=0.5, br") == {"gzip": 0.5, "br": 1.0}
+    assert accepted_encodings("br;q=0, *") == {"br": 0.0, "*": 1.0}
+    assert accepted_encodings(None) == {}
@@ -0,0 +1,35 @@
+from sqlalchemy import create_engine, func, inspect, select
+from app.database import Base
+from app.db_models import DBLeaderboard, DBUser, DBUserBestScore
+from app.synthetic_data import SyntheticDataset, bulk_load
+
+def _scores(dataset):
+    return [row for batch in dataset.score_batches(size=700) for row in batch]
+
+def test_same_seed_same_data():
+    first, second = SyntheticDataset(2000, seed=7), SyntheticDataset(2000, seed=7)
+    assert first.user_ids == second.user_ids
+    assert _scores(first) == _scores(second)
+    live = lambda dataset: [g.model_dump(exclude={"startedAt"}) for g in dataset.live_games(5)]
+    assert live(first) == live(second)
+    assert _scores(SyntheticDataset(2000, seed=8)) != _scores(first)
+
+def test_bulk_load_keeps_users_and_best_scores_consistent(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/synthetic.db")
+    Base.metadata.create_all(engine)
+    dataset = SyntheticDataset(3000, players=150)
+
+    report = bulk_load(engine, dataset, "hash", batch_size=1000)
+
+    assert (report["users"], report["scores"]) == (150, 3000)
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(DBLeaderboard)).scalar_one() == 3000
+        assert conn.execute(select(func.count()).select_from(DBUserBestScore)).scalar_one() == report["bestScores"]
+        totals = conn.execute(
+            select(DBLeaderboard.userId, func.max(DBLeaderboard.score), func.count()).group_by(DBLeaderboard.userId)
+        ).all()
+        users = {u.id: (u.highScore, u.gamesPlayed) for u in conn.execute(select(DBUser.__table__))}
+    assert {user_id: (high, played) for user_id, high, played in totals} == {k: v for k, v in users.items() if v[1]}
+    # Secondary indexes dropped for the load are back
+    assert "ix_leaderboard_mode_score_date_id" in {i["name"] for i in inspect(engine).get_indexes("leaderboard")}
+    assert "ix_user_best_scores_mode_score_date_entry" in {i["name"] for i in inspect(engine).get_indexes("user_best_scores")}
@@ -0,0 +1,46 @@
+// Writes .br and .gz next to every compressible file in the Vite build, so the
+// backend can serve them without compressing on each request. Runs after
+// `npm run build` (postbuild); pass a directory to compress something else.
+import { readdirSync, readFileSync, statSync, writeFileSync } from "node:fs";
+import { extname, join } from "node:path";
+import { brotliCompressSync, constants, gzipSync } from "node:zlib";
+
+const COMPRESSIBLE = new Set([".html", ".js", ".mjs", ".css", ".json", ".map", ".svg", ".txt", ".xml", ".ico", ".webmanifest"]);
+// Below this the headers outweigh the savings
+const MIN_BYTES = 1024;
+
+function* files(dir) {
+  for (const name of readdirSync(dir)) {
+    const path = join(dir, name);
+    if (statSync(path).isDirectory()) yield* files(path);
+    else yield path;
+  }
+}
+
+const dist = process.argv[2] ?? "dist";
+let written = 0;
+let before = 0;
+let after = 0;
+for (const path of files(dist)) {
+  if (!COMPRESSIBLE.has(extname(path))) continue;
+  const data = readFileSync(path);
+  if (data.length < MIN_BYTES) continue;
+  const variants = {
+    ".br": brotliCompressSync(data, {
+      params: {
+        [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY,
+        [constants.BROTLI_PARAM_SIZE_HINT]: data.length,
+      },
+    }),
+    ".gz": gzipSync(data, { level: 9 }),
+  };
+  for (const [suffix, compressed] of Object.entries(variants)) {
+    // A variant that is not smaller is never worth sending
+    if (compressed.length >= data.length) continue;
+    writeFileSync(path + suffix, compressed);
+    written++;
+  }
+  before += data.length;
+  after += variants[".br"].length;
+}
+console.log(`compress-dist: wrote ${written} variants, ${before} -> ${after} bytes with brotli`);
@@ -2,6 +2,7 @@ import { describe, it, expect } from 'vitest';
 import {
   createInitialState,
   generateFood,
+  mulberry32,
   getNextHeadPosition,
   wrapPosition,
   isOutOfBounds,
@@ -13,7 +14,8 @@ import {
   pauseGame,
   resetGame,
 } from './gameLogic';
-import { DEFAULT_CONFIG } from './gameTypes';
+import { DEFAULT_CONFIG, Position } from './gameTypes';
+import foodVectors from './foodPlacement.vectors.json';
 
 describe('gameLogic', () => {
   describe('createInitialState', () => {
@@ -56,6 +58,29 @@ describe('gameLogic', () => {
       expect(food.y).toBeGreaterThanOrEqual(0);
       expect(food.y).toBeLessThan(20);
     });
+
+    // Shared with backend/test_integration/test_replays.py: the server must place
+    // food exactly like the browser or recorded replays fail verification
+    it.each(foodVectors.cases)('should match the replay food vectors for seed $seed', (vector) => {
+      const size = foodVectors.gridSize;
+      let snake: Position[] = (vector.snake ?? []).map(([x, y]) => ({ x, y }));
+      if (vector.free) {
+        const free = new Set(vector.free.map(([x, y]) => `${x},${y}`));
+        snake = [];
+        for (let y = 0; y < size; y++) {
+          for (let x = 0; x < size; x++) {
+            if (!free.has(`${x},${y}`)) snake.push({ x, y });
+          }
+        }
+      }
+
+      const draws = mulberry32(vector.seed);
+      expect(vector.draws.map(() => draws())).toEqual(vector.draws);
+
+      const next = mulberry32(vector.seed);
+      const foods = vector.foods.map(() => generateFood(snake, size, next));
+      expect(foods).toEqual(vector.foods.map(([x, y]) => ({ x, y })));
+    });
   });
 
   describe('getNextHeadPosition', () => {
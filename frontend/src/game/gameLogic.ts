@@ -1,14 +1,15 @@
 import { Direction, GameMode, GameState, GameConfig, Position, DEFAULT_CONFIG } from './gameTypes';
 
-export function createInitialState(mode: GameMode, config: GameConfig = DEFAULT_CONFIG): GameState {
+export function createInitialState(mode: GameMode, config: GameConfig = DEFAULT_CONFIG, seed?: number): GameState {
   const center = Math.floor(config.gridSize / 2);
+  const nextU32 = seed === undefined ? randomU32 : mulberry32(seed);
   return {
     snake: [
       { x: center, y: center },
       { x: center - 1, y: center },
       { x: center - 2, y: center },
     ],
-    food: generateFood([{ x: center, y: center }, { x: center - 1, y: center }, { x: center - 2, y: center }], config.gridSize),
+    food: generateFood([{ x: center, y: center }, { x: center - 1, y: center }, { x: center - 2, y: center }], config.gridSize, nextU32),
     direction: 'RIGHT',
     nextDirection: 'RIGHT',
     score: 0,
@@ -16,15 +17,33 @@ export function createInitialState(mode: GameMode, config: GameConfig = DEFAULT_
     mode,
     speed: config.initialSpeed,
     gridSize: config.gridSize,
+    nextU32,
   };
 }
 
-export function generateFood(snake: Position[], gridSize: number): Position {
+// Seeded u32 generator, reproduced bit for bit by backend/app/engine/prng.py
+export function mulberry32(seed: number): () => number {
+  let a = seed | 0;
+  return () => {
+    let t = (a = (a + 0x6D2B79F5) | 0);
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return (t ^ (t >>> 14)) >>> 0;
+  };
+}
+
+function randomU32(): number {
+  return Math.floor(Math.random() * 0x100000000);
+}
+
+// Part of the replay format (backend/app/engine/replay.py): one draw per food,
+// indexing the free cells in row-major order (y, then x)
+export function generateFood(snake: Position[], gridSize: number, nextU32: () => number = randomU32): Position {
   const occupied = new Set(snake.map(p => `${p.x},${p.y}`));
   const available: Position[] = [];
   
-  for (let x = 0; x < gridSize; x++) {
-    for (let y = 0; y < gridSize; y++) {
+  for (let y = 0; y < gridSize; y++) {
+    for (let x = 0; x < gridSize; x++) {
       if (!occupied.has(`${x},${y}`)) {
         available.push({ x, y });
       }
@@ -35,7 +54,7 @@ export function generateFood(snake: Position[], gridSize: number): Position {
     return { x: 0, y: 0 }; // No space left - game essentially won
   }
   
-  return available[Math.floor(Math.random() * available.length)];
+  return available[nextU32() % available.length];
 }
 
 export function getNextHeadPosition(head: Position, direction: Direction): Position {
@@ -113,7 +132,7 @@ export function moveSnake(state: GameState, config: GameConfig = DEFAULT_CONFIG)
   
   const newScore = eating ? state.score + config.pointsPerFood : state.score;
   const newSpeed = eating ? Math.max(50, state.speed - config.speedIncrement) : state.speed;
-  const newFood = eating ? generateFood(newSnake, state.gridSize) : state.food;
+  const newFood = eating ? generateFood(newSnake, state.gridSize, state.nextU32) : state.food;
   
   return {
     ...state,
@@ -151,6 +170,6 @@ export function pauseGame(state: GameState): GameState {
   return state;
 }
 
-export function resetGame(mode: GameMode, config: GameConfig = DEFAULT_CONFIG): GameState {
-  return createInitialState(mode, config);
+export function resetGame(mode: GameMode, config: GameConfig = DEFAULT_CONFIG, seed?: number): GameState {
+  return createInitialState(mode, config, seed);
 }
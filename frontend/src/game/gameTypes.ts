@@ -17,6 +17,8 @@ export interface GameState {
   mode: GameMode;
   speed: number;
   gridSize: number;
+  // u32 source for food placement; mulberry32(seed) makes the game replayable
+  nextU32?: () => number;
 }
 
 export interface GameConfig {